@@ -5,8 +5,11 @@ from sqlalchemy import engine_from_config, pool
 
 from app.core.config import settings
 from app.models.base import Base
+from app.models.embedding_cache import EmbeddingCacheEntry
+from app.models.embedding_dead_letter import EmbeddingDeadLetter
 from app.models.message import Message
 from app.models.session import Session
+from app.models.session_summary import SessionSummary
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -28,6 +31,15 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+def include_name(name, type_, parent_names) -> bool:
+    """Only compare tables the models define: monthly `messages` partitions
+    are created at runtime and must not show up as tables to drop"""
+    if type_ == "table":
+        return name in target_metadata.tables
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -50,6 +62,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_name=include_name,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -72,7 +85,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_name=include_name,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
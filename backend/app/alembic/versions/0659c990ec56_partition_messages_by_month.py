@@ -0,0 +1,126 @@
+"""partition messages by month
+
+Revision ID: 0659c990ec56
+Revises: 69b8461829bc
+Create Date: 2026-10-18 09:19:23.034214
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "0659c990ec56"
+down_revision: Union[str, Sequence[str], None] = "69b8461829bc"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months created past the current one; the app keeps this window moving
+MONTHS_AHEAD = 2
+COLUMNS = "id, session_id, role, content, token_count, created_at"
+
+
+def _next_month(month: datetime) -> datetime:
+    if month.month == 12:
+        return month.replace(year=month.year + 1, month=1)
+    return month.replace(month=month.month + 1)
+
+
+def _messages_columns(partitioned: bool) -> list[sa.Column]:
+    return [
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column("session_id", sa.UUID(), nullable=True),
+        sa.Column("role", sa.String(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=True),
+        sa.Column("token_count", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=not partitioned),
+        sa.Column(
+            "content_tsv",
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "to_tsvector('english', coalesce(content, ''))", persisted=True
+            ),
+            nullable=True,
+        ),
+        sa.ForeignKeyConstraint(["session_id"], ["sessions.id"]),
+        sa.PrimaryKeyConstraint(*(["id", "created_at"] if partitioned else ["id"])),
+    ]
+
+
+def _create_indexes() -> None:
+    op.create_index(
+        "ix_messages_session_id_created_at_id",
+        "messages",
+        ["session_id", "created_at", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_messages_content_tsv",
+        "messages",
+        ["content_tsv"],
+        unique=False,
+        postgresql_using="gin",
+    )
+
+
+def _retire_messages_table() -> None:
+    """Rename `messages` out of the way, freeing its index names"""
+    op.drop_index("ix_messages_content_tsv", table_name="messages")
+    op.drop_index("ix_messages_session_id_created_at_id", table_name="messages")
+    op.rename_table("messages", "messages_old")
+    op.execute(
+        "ALTER TABLE messages_old RENAME CONSTRAINT messages_pkey TO messages_old_pkey"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _retire_messages_table()
+    op.create_table(
+        "messages",
+        *_messages_columns(partitioned=True),
+        postgresql_partition_by="RANGE (created_at)",
+    )
+    # Catches rows no monthly partition covers yet; the app moves them into
+    # their month when it creates it
+    op.execute("CREATE TABLE messages_default PARTITION OF messages DEFAULT")
+
+    now = datetime.now(timezone.utc)
+    oldest = op.get_bind().execute(sa.text("SELECT min(created_at) FROM messages_old"))
+    oldest = min(oldest.scalar() or now, now)
+    month = oldest.astimezone(timezone.utc).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+    last = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        upper = _next_month(month)
+        op.execute(
+            f"CREATE TABLE messages_y{month.year:04d}m{month.month:02d} "
+            f"PARTITION OF messages FOR VALUES FROM ('{month.isoformat()}') "
+            f"TO ('{upper.isoformat()}')"
+        )
+        month = upper
+
+    op.execute(
+        f"INSERT INTO messages ({COLUMNS}) "
+        f"SELECT id, session_id, role, content, token_count, "
+        f"coalesce(created_at, now()) FROM messages_old"
+    )
+    op.drop_table("messages_old")
+    _create_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _retire_messages_table()
+    op.create_table("messages", *_messages_columns(partitioned=False))
+    op.execute(f"INSERT INTO messages ({COLUMNS}) SELECT {COLUMNS} FROM messages_old")
+    # Dropping the partitioned parent drops every partition with it
+    op.drop_table("messages_old")
+    _create_indexes()
@@ -1,20 +1,143 @@
+from typing import Literal
+
+from pydantic import BaseModel
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
+class LLMBackendSettings(BaseModel):
+    """One OpenAI-compatible chat endpoint the LLM router can send to"""
+
+    name: str
+    model: str
+    base_url: str | None = None
+    # Defaults to openai_api_key
+    api_key: str | None = None
+    weight: float = 1.0
+    # Whether the endpoint continues a trailing assistant message rather than
+    # answering it anew. OpenAI chat completions do not, so a stream that
+    # drops midway is only resumed on backends that set this; elsewhere the
+    # drop is an error.
+    supports_prefill: bool = False
+
+
 class Settings(BaseSettings):
-    model_config = SettingsConfigDict(env_file=".env")
+    model_config = SettingsConfigDict(env_file=".env", env_ignore_empty=True)
 
     database_url: str
     database_url_sync: str
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout: float = 30.0
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_prepared_statement_cache_size: int = 500
     log_level: str = "INFO"
     openai_api_key: str
     openai_api_base: str | None = None
     llm_model: str = "gpt-4.1-nano"
     llm_temperature: float = 0.7
     llm_max_tokens: int = 1000
+    llm_context_window: int = 128000
+    llm_context_budget: int = 8000
+    llm_memory_budget: int = 1000
+    # JSON list of backends; empty means the single llm_model/openai_api_base
+    llm_backends: list[LLMBackendSettings] = []
+    llm_routing_policy: Literal["least_latency", "weighted"] = "least_latency"
+    llm_latency_ewma_alpha: float = 0.2
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_min_delay: float = 0.05
+    llm_hedge_max_delay: float = 2.0
+    llm_hedge_budget: float = 0.1
+    llm_stream_max_resumes: int = 2
+    # supports_prefill of the single llm_model backend; the mock LLM has it
+    llm_supports_prefill: bool = False
+    # Chat stream frames batch tokens for this long, or up to this size
+    sse_coalesce_window: float = 0.02
+    sse_coalesce_max_chars: int = 4096
+    llm_admission_enabled: bool = True
+    llm_max_concurrency: int = 64
+    # Provider limits; 0 means unlimited
+    llm_requests_per_minute: float = 0
+    llm_tokens_per_minute: float = 0
+    llm_admission_queue_size: int = 256
+    llm_admission_queue_timeout: float = 10.0
+    mock_llm: bool = False
+    mock_llm_latency_distribution: Literal["fixed", "uniform", "lognormal"] = "uniform"
+    mock_llm_latency_median: float = 0.9
+    mock_llm_latency_spread: float = 0.6
+    mock_llm_tokens_per_second: float = 50.0
+    mock_llm_rate_limit_rate: float = 0.0
+    mock_llm_timeout_rate: float = 0.0
+    mock_llm_connection_error_rate: float = 0.0
+    mock_llm_stream_drop_rate: float = 0.0
+    mock_llm_seed: int | None = None
+    embedding_model: str = "text-embedding-3-small"
+    embedding_dimensions: int = 1536
+    memory_enabled: bool = False
+    embedding_queue_size: int = 10000
+    embedding_batch_size: int = 64
+    embedding_batch_max_tokens: int = 8000
+    embedding_flush_interval: float = 0.5
+    # Seconds between moving dead-lettered messages back onto the embedding
+    # queue; 0 disables
+    embedding_replay_interval: float = 300.0
+    embedding_replay_batch_size: int = 1000
+    # Dead letters that failed this many times stay parked and are no longer
+    # replayed
+    embedding_replay_max_attempts: int = 5
+    memory_top_k: int = 5
+    memory_min_score: float = 0.3
+    memory_retrieval_timeout: float = 0.25
+    memory_lexical_enabled: bool = True
+    memory_candidates: int = 20
+    memory_rrf_k: int = 60
+    turn_stage_timeout: float = 5.0
+    memory_store_backend: Literal["numpy", "hnsw", "ivf"] = "numpy"
+    memory_store_path: str | None = None
+    hnsw_m: int = 16
+    hnsw_ef_construction: int = 100
+    hnsw_ef_search: int = 64
+    ivf_nlist: int = 256
+    ivf_nprobe: int = 8
+    retention_enabled: bool = False
+    retention_interval: float = 3600.0
+    retention_hot_days: float = 7
+    retention_evict_days: float = 90
+    retention_keep_hits: int = 3
+    retention_message_days: float = 0
+    retention_embedding_cache_days: float = 30
+    retention_compact_ratio: float = 0.25
+    retention_batch_size: int = 10000
+    message_partitions_ahead: int = 2
+    message_partition_retention_months: int = 0
+    message_partition_interval: float = 86400.0
+    session_list_total: Literal["exact", "estimate", "none"] = "exact"
+    embedding_cache_enabled: bool = True
+    embedding_cache_size: int = 4096
+    embedding_cache_encoding: Literal["float32", "float16", "int8"] = "float16"
+    response_cache_enabled: bool = False
+    response_cache_ttl: float = 3600.0
+    response_cache_max_entries: int = 1024
+    response_cache_max_bytes: int = 64 * 1024 * 1024
+    response_cache_semantic: bool = False
+    response_cache_similarity_threshold: float = 0.95
+    chat_history_window: int = 50
+    summary_enabled: bool = True
+    summary_trigger_tokens: int = 4000
+    summary_keep_recent_tokens: int = 1500
+    summary_max_messages: int = 500
+    token_count_cache_size: int = 4096
+    message_write_queue_size: int = 1000
+    message_write_batch_size: int = 100
+    message_write_flush_interval: float = 0.05
+    message_write_enqueue_timeout: float = 1.0
     langfuse_public_key: str = ""
     langfuse_secret_key: str = ""
     langfuse_host: str = ""
+    langfuse_sample_rate: float = 1.0
+    langfuse_flush_at: int = 512
+    langfuse_flush_interval: float = 5.0
 
 
 settings = Settings()
@@ -1,12 +1,70 @@
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from app.core.config import settings
+from app.core.metrics import (
+    DB_POOL_CHECKED_OUT,
+    DB_POOL_CHECKOUT_SECONDS,
+    DB_POOL_OVERFLOW,
+    DB_POOL_SIZE,
+    DB_POOL_TIMEOUTS,
+    DB_QUERY_SECONDS,
+)
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long callers wait for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - start)
+
 
 engine = create_async_engine(
     settings.database_url,
     echo=False,
+    poolclass=InstrumentedAsyncQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+    pool_timeout=settings.db_pool_timeout,
+    pool_recycle=settings.db_pool_recycle,
+    pool_pre_ping=settings.db_pool_pre_ping,
+    connect_args={
+        "prepared_statement_cache_size": settings.db_prepared_statement_cache_size
+    },
 )
 
+DB_POOL_SIZE.set_function(lambda: engine.pool.size())
+DB_POOL_CHECKED_OUT.set_function(lambda: engine.pool.checkedout())
+DB_POOL_OVERFLOW.set_function(lambda: max(engine.pool.overflow(), 0))
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the statement's own context: a statement that raises never
+    # reaches after_cursor_execute, and must not leave a stale start behind
+    context._query_start = time.perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "after_cursor_execute")
+def _observe_query_time(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._query_start
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement else ""
+    if operation not in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+        operation = "OTHER"
+    DB_QUERY_SECONDS.labels(operation=operation).observe(elapsed)
+
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
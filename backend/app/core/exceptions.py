@@ -12,3 +12,9 @@ class LLMConnectionError(Exception):
 
 class LLMTimeoutError(Exception):
     pass
+
+
+class LLMAdmissionError(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
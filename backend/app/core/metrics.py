@@ -0,0 +1,238 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+MESSAGE_WRITE_QUEUE_DEPTH = Gauge(
+    "memocha_message_write_queue_depth",
+    "Messages waiting in the write-behind queue",
+)
+MESSAGE_WRITE_QUEUE_FULL = Counter(
+    "memocha_message_write_queue_full_total",
+    "Enqueue attempts that found the write-behind queue full",
+)
+MESSAGE_WRITE_BATCH_SIZE = Histogram(
+    "memocha_message_write_batch_size",
+    "Messages per bulk insert",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500),
+)
+MESSAGE_WRITE_SECONDS = Histogram(
+    "memocha_message_write_seconds",
+    "Duration of a bulk message insert",
+)
+MESSAGES_WRITTEN = Counter(
+    "memocha_messages_written_total",
+    "Messages persisted by the write-behind queue",
+)
+MESSAGE_WRITE_FAILURES = Counter(
+    "memocha_message_write_failures_total",
+    "Messages the write-behind queue failed to persist",
+)
+
+DB_POOL_SIZE = Gauge(
+    "memocha_db_pool_size",
+    "Configured number of persistent connections in the pool",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "memocha_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "memocha_db_pool_overflow",
+    "Overflow connections currently open beyond pool_size",
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "memocha_db_pool_checkout_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+DB_POOL_TIMEOUTS = Counter(
+    "memocha_db_pool_timeouts_total",
+    "Checkouts that gave up after pool_timeout",
+)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "memocha_http_request_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+
+SSE_ACTIVE_STREAMS = Gauge(
+    "memocha_sse_active_streams",
+    "Chat streams currently open",
+)
+SSE_TTFT_SECONDS = Histogram(
+    "memocha_sse_ttft_seconds",
+    "Time from request arrival to the first streamed token",
+    buckets=(0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2, 3, 5, 10, 30),
+)
+SSE_TOKEN_FRAMES = Counter(
+    "memocha_sse_token_frames_total",
+    "Token frames written to chat streams (frames per second is its rate)",
+)
+SSE_FRAME_CHUNKS = Histogram(
+    "memocha_sse_frame_chunks",
+    "Token chunks coalesced into one stream frame",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128),
+)
+SSE_TOKENS_PER_SECOND = Histogram(
+    "memocha_sse_tokens_per_second",
+    "Generation speed of a completed stream after its first token",
+    buckets=(1, 5, 10, 20, 30, 50, 75, 100, 150, 200, 400),
+)
+
+LLM_CIRCUIT_BREAKER_STATE = Gauge(
+    "memocha_llm_circuit_breaker_state",
+    "Circuit breaker state (0 closed, 1 half-open, 2 open)",
+    ["breaker"],
+)
+LLM_CIRCUIT_BREAKER_FAILURES = Counter(
+    "memocha_llm_circuit_breaker_failures_total",
+    "Failures recorded by the circuit breaker",
+    ["breaker"],
+)
+LLM_BACKEND_REQUESTS = Counter(
+    "memocha_llm_backend_requests_total",
+    "LLM calls routed to each backend by outcome",
+    ["backend", "outcome"],
+)
+LLM_BACKEND_LATENCY = Gauge(
+    "memocha_llm_backend_latency_seconds",
+    "Moving average latency of each backend (full response or first chunk)",
+    ["backend", "operation"],
+)
+LLM_BACKEND_IN_FLIGHT = Gauge(
+    "memocha_llm_backend_in_flight",
+    "LLM calls and streams currently open on each backend",
+    ["backend"],
+)
+LLM_HEDGES = Counter(
+    "memocha_llm_hedges_total",
+    "Slow LLM calls by hedge outcome (which attempt answered, or over budget)",
+    ["outcome"],
+)
+LLM_ADMISSION_ACTIVE = Gauge(
+    "memocha_llm_admission_active",
+    "LLM calls admitted and still running",
+)
+LLM_ADMISSION_QUEUED = Gauge(
+    "memocha_llm_admission_queued",
+    "LLM calls waiting for admission",
+)
+LLM_ADMISSION_WAIT_SECONDS = Histogram(
+    "memocha_llm_admission_wait_seconds",
+    "Time an admitted LLM call waited in the admission queue",
+    buckets=(0, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+)
+LLM_ADMISSION_REJECTED = Counter(
+    "memocha_llm_admission_rejected_total",
+    "LLM calls turned away with 429 by reason",
+    ["reason"],
+)
+LLM_STREAM_RESUMES = Counter(
+    "memocha_llm_stream_resumes_total",
+    "Streams re-requested after dropping midway",
+)
+LLM_RETRIES = Counter(
+    "memocha_llm_retries_total",
+    "LLM calls retried after a transient error",
+    ["operation", "error"],
+)
+
+DB_QUERY_SECONDS = Histogram(
+    "memocha_db_query_seconds",
+    "Database statement execution time",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+
+RESPONSE_CACHE_LOOKUPS = Counter(
+    "memocha_response_cache_lookups_total",
+    "Response cache lookups by outcome",
+    ["result"],
+)
+RESPONSE_CACHE_EVICTIONS = Counter(
+    "memocha_response_cache_evictions_total",
+    "Entries dropped from the response cache",
+    ["reason"],
+)
+RESPONSE_CACHE_ENTRIES = Gauge(
+    "memocha_response_cache_entries",
+    "Responses currently held in the cache",
+)
+RESPONSE_CACHE_BYTES = Gauge(
+    "memocha_response_cache_bytes",
+    "Approximate memory used by cached responses",
+)
+
+EMBEDDING_QUEUE_DEPTH = Gauge(
+    "memocha_embedding_queue_depth",
+    "Messages waiting to be embedded",
+)
+EMBEDDING_BATCH_SIZE = Histogram(
+    "memocha_embedding_batch_size",
+    "Messages per embedding call",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250),
+)
+EMBEDDING_SECONDS = Histogram(
+    "memocha_embedding_seconds",
+    "Duration of an embedding call, retries included",
+)
+MESSAGES_EMBEDDED = Counter(
+    "memocha_messages_embedded_total",
+    "Messages embedded and added to the memory store",
+)
+EMBEDDING_RETRIES = Counter(
+    "memocha_embedding_retries_total",
+    "Embedding calls retried after a transient error",
+    ["error"],
+)
+EMBEDDING_DEAD_LETTERS = Counter(
+    "memocha_embedding_dead_letters_total",
+    "Messages sent to the embedding dead-letter table",
+)
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "memocha_embedding_cache_lookups_total",
+    "Texts looked up in the embedding cache, by the tier that answered",
+    ["tier"],
+)
+
+PIPELINE_STAGE_SECONDS = Histogram(
+    "memocha_pipeline_stage_seconds",
+    "Duration of a pre-LLM chat pipeline stage",
+    ["stage"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+PIPELINE_STAGE_DEGRADED = Counter(
+    "memocha_pipeline_stage_degraded_total",
+    "Optional pipeline stages skipped after a timeout or error",
+    ["stage", "reason"],
+)
+RETRIEVAL_RESULTS = Histogram(
+    "memocha_retrieval_results",
+    "Candidates returned by a memory retriever before fusion",
+    ["retriever"],
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+)
+
+RETENTION_ACTIONS = Counter(
+    "memocha_retention_actions_total",
+    "Memories demoted, evicted or compacted away, and messages and cached "
+    "embeddings deleted by retention",
+    ["action"],
+)
+MEMORY_STORE_ROWS = Gauge(
+    "memocha_memory_store_rows",
+    "Live memories per storage tier after the last retention run",
+    ["tier"],
+)
+
+MESSAGE_PARTITION_CHANGES = Counter(
+    "memocha_message_partition_changes_total",
+    "Monthly messages partitions created or dropped",
+    ["change"],
+)
+
+SESSION_SUMMARIES = Counter(
+    "memocha_session_summaries_total",
+    "Rolling summary runs by outcome",
+    ["result"],
+)
@@ -0,0 +1,37 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import HTTP_REQUEST_SECONDS
+
+
+class PrometheusMiddleware:
+    """Observe request latency per route template, not per raw path, so
+    `/sessions/{session_id}` stays one series however many sessions exist"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                method=scope["method"],
+                route=route.path if route is not None else "unmatched",
+                status=str(status),
+            ).observe(time.perf_counter() - start)
@@ -1,5 +1,58 @@
+import logging
+from typing import Optional
+
+from langfuse import Langfuse
 from langfuse.langchain import CallbackHandler
 
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_langfuse: Optional[Langfuse] = None
+_langfuse_handler: Optional[CallbackHandler] = None
+
+
+def tracing_enabled() -> bool:
+    return bool(settings.langfuse_public_key and settings.langfuse_secret_key)
+
+
+def init_tracing() -> None:
+    """Create the Langfuse client and the shared callback handler once.
+
+    Without keys nothing is created and `get_langfuse_handler` returns None,
+    so LLM calls run without any tracing callbacks.
+    """
+    global _langfuse, _langfuse_handler
+    if _langfuse is not None:
+        return
+    if not tracing_enabled():
+        logger.info("Langfuse keys not set, tracing disabled")
+        return
+
+    _langfuse = Langfuse(
+        public_key=settings.langfuse_public_key,
+        secret_key=settings.langfuse_secret_key,
+        host=settings.langfuse_host or None,
+        sample_rate=settings.langfuse_sample_rate,
+        flush_at=settings.langfuse_flush_at,
+        flush_interval=settings.langfuse_flush_interval,
+    )
+    _langfuse_handler = CallbackHandler(public_key=settings.langfuse_public_key)
+    logger.info(
+        f"Langfuse tracing enabled (sample rate {settings.langfuse_sample_rate})"
+    )
+
+
+def shutdown_tracing() -> None:
+    """Export buffered spans and release the client"""
+    global _langfuse, _langfuse_handler
+    if _langfuse is None:
+        return
+    _langfuse.flush()
+    _langfuse.shutdown()
+    _langfuse = None
+    _langfuse_handler = None
+
 
-def get_langfuse_handler():
-    return CallbackHandler()
+def get_langfuse_handler() -> Optional[CallbackHandler]:
+    return _langfuse_handler
@@ -6,3 +6,22 @@ BASE_SYSTEM_PROMPT = os.getenv(
     "You can remember past conversations and use that context to provide "
     "personalized responses. Be concise, helpful, and friendly.",
 )
+
+MEMORY_CONTEXT_PROMPT = os.getenv(
+    "MEMORY_CONTEXT_PROMPT",
+    "Relevant memories from earlier in the conversation:",
+)
+
+SUMMARY_CONTEXT_PROMPT = os.getenv(
+    "SUMMARY_CONTEXT_PROMPT",
+    "Summary of the conversation so far:",
+)
+
+SUMMARIZE_PROMPT = os.getenv(
+    "SUMMARIZE_PROMPT",
+    "You maintain a running summary of a conversation between a user and an "
+    "AI assistant. Update the current summary with the new messages. Keep "
+    "facts about the user, their preferences, decisions and open questions; "
+    "drop small talk. Write in the third person, at most 200 words, and "
+    "reply with the summary only.",
+)
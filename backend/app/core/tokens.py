@@ -0,0 +1,35 @@
+import logging
+from functools import lru_cache
+
+import tiktoken
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING = "o200k_base"
+
+# Rough characters-per-token ratio used when no tokenizer can be loaded
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def get_encoding() -> tiktoken.Encoding | None:
+    try:
+        try:
+            return tiktoken.encoding_for_model(settings.llm_model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        logger.warning(f"Tokenizer unavailable, falling back to estimates: {e}")
+        return None
+
+
+@lru_cache(maxsize=settings.token_count_cache_size)
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
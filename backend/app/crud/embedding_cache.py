@@ -0,0 +1,50 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.embedding_cache import EmbeddingCacheEntry
+
+
+async def get_cached_embeddings(
+    db: AsyncSession, content_hashes: list[str]
+) -> list[EmbeddingCacheEntry]:
+    result = await db.execute(
+        select(EmbeddingCacheEntry).where(
+            EmbeddingCacheEntry.content_hash.in_(content_hashes)
+        )
+    )
+    return list(result.scalars().all())
+
+
+async def put_cached_embeddings(db: AsyncSession, entries: list[dict]) -> None:
+    """Insert cache entries in one statement; hashes already cached are kept"""
+    now = datetime.now(timezone.utc)
+    await db.execute(
+        insert(EmbeddingCacheEntry)
+        .values([{**entry, "created_at": now} for entry in entries])
+        .on_conflict_do_nothing(index_elements=[EmbeddingCacheEntry.content_hash])
+    )
+    await db.commit()
+
+
+async def delete_expired_embeddings(
+    db: AsyncSession, older_than: datetime, limit: int = 1000
+) -> int:
+    """Delete up to `limit` entries cached before `older_than`, oldest first"""
+    expired = (
+        select(EmbeddingCacheEntry.content_hash)
+        .where(EmbeddingCacheEntry.created_at < older_than)
+        .order_by(EmbeddingCacheEntry.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("expired")
+    )
+    result = await db.execute(
+        delete(EmbeddingCacheEntry).where(
+            EmbeddingCacheEntry.content_hash.in_(select(expired.c.content_hash))
+        )
+    )
+    await db.commit()
+    return result.rowcount
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+from sqlalchemy import delete, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.embedding_dead_letter import EmbeddingDeadLetter
+from app.models.message import Message
+
+
+async def record_dead_letters(
+    db: AsyncSession, messages: list[dict], error: str
+) -> None:
+    """Park messages that failed to embed; a repeat failure bumps `attempts`"""
+    now = datetime.now(timezone.utc)
+    stmt = insert(EmbeddingDeadLetter).values(
+        [
+            {
+                "message_id": msg["id"],
+                "session_id": msg["session_id"],
+                "error": error,
+                "attempts": 1,
+                "created_at": now,
+            }
+            for msg in messages
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[EmbeddingDeadLetter.message_id],
+        set_={
+            "error": stmt.excluded.error,
+            "attempts": EmbeddingDeadLetter.attempts + 1,
+            "created_at": stmt.excluded.created_at,
+            "claimed_at": None,
+        },
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+async def claim_dead_letters(
+    db: AsyncSession,
+    limit: int = 100,
+    max_attempts: int = 5,
+    lease: timedelta = timedelta(minutes=5),
+) -> list[dict]:
+    """Claim up to `limit` dead letters, oldest first, and return their
+    messages in one statement.
+
+    Claimed rows stay in the table until `resolve_dead_letters` deletes
+    them, so a replay that dies midway loses nothing: its rows are claimed
+    again once `lease` has passed. Rows locked by another replay are
+    skipped, and rows that failed `max_attempts` times stay parked.
+    """
+    now = datetime.now(timezone.utc)
+    claimable = (
+        select(EmbeddingDeadLetter.message_id)
+        .where(
+            EmbeddingDeadLetter.attempts < max_attempts,
+            or_(
+                EmbeddingDeadLetter.claimed_at.is_(None),
+                EmbeddingDeadLetter.claimed_at < now - lease,
+            ),
+        )
+        .order_by(EmbeddingDeadLetter.created_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+        .cte("claimable")
+    )
+    claimed = (
+        update(EmbeddingDeadLetter)
+        .where(EmbeddingDeadLetter.message_id.in_(select(claimable.c.message_id)))
+        .values(claimed_at=now)
+        .returning(EmbeddingDeadLetter.message_id)
+        .cte("claimed")
+    )
+    result = await db.execute(
+        select(
+            Message.id,
+            Message.session_id,
+            Message.role,
+            Message.content,
+            Message.token_count,
+            Message.created_at,
+        ).join(claimed, Message.id == claimed.c.message_id)
+    )
+    messages = [dict(row._mapping) for row in result]
+    await db.commit()
+    return messages
+
+
+async def resolve_dead_letters(db: AsyncSession, message_ids: list[UUID]) -> None:
+    """Delete the dead letters of messages that are embedded at last"""
+    await db.execute(
+        delete(EmbeddingDeadLetter).where(
+            EmbeddingDeadLetter.message_id.in_(message_ids)
+        )
+    )
+    await db.commit()
@@ -1,47 +1,141 @@
+import re
 from datetime import datetime, timezone
 from uuid import UUID, uuid4
 
-from sqlalchemy import func, select
+from sqlalchemy import Row, delete, func, insert, literal, select, tuple_
+from sqlalchemy.dialects.postgresql import REGCONFIG
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.message import Message
+from app.core.tokens import count_tokens
+from app.crud.pagination import Cursor
+from app.models.message import TEXT_SEARCH_CONFIG, Message
+from app.models.session_summary import SessionSummary
+
+_WORD = re.compile(r"\w+")
+
+
+def build_message_values(session_id: UUID, role: str, content: str) -> dict:
+    return {
+        "id": uuid4(),
+        "session_id": session_id,
+        "role": role,
+        "content": content,
+        "token_count": count_tokens(content),
+        "created_at": datetime.now(timezone.utc),
+    }
 
 
 async def create_message(
     db: AsyncSession, session_id: UUID, role: str, content: str
 ) -> Message:
-    message = Message(
-        id=uuid4(),
-        session_id=session_id,
-        role=role,
-        content=content,
-        created_at=datetime.now(timezone.utc),
+    result = await db.execute(
+        insert(Message)
+        .values(build_message_values(session_id, role, content))
+        .returning(Message)
     )
-    db.add(message)
+    message = result.scalar_one()
     await db.commit()
-    await db.refresh(message)
     return message
 
 
+async def create_messages(db: AsyncSession, values: list[dict]) -> None:
+    """Insert prepared message rows with a single multi-row INSERT"""
+    await db.execute(insert(Message).values(values))
+    await db.commit()
+
+
 async def get_message(db: AsyncSession, message_id: UUID) -> Message | None:
     result = await db.execute(select(Message).filter(Message.id == message_id))
     return result.scalar_one_or_none()
 
 
 async def get_messages_by_session(
-    db: AsyncSession, session_id: UUID, skip: int = 0, limit: int = 100
+    db: AsyncSession,
+    session_id: UUID,
+    skip: int = 0,
+    limit: int = 100,
+    before: Cursor | None = None,
+    after: Cursor | None = None,
 ) -> list[Message]:
-    """Get all messages for a session with pagination"""
+    """Get messages for a session oldest first, paged by offset or keyset cursor.
+
+    Cursor filters repeat the row comparison's bound on `created_at` alone,
+    which is what lets Postgres skip the monthly partitions outside it.
+    """
+    query = select(Message).filter(Message.session_id == session_id)
+    position = tuple_(Message.created_at, Message.id)
+
+    if before is not None:
+        result = await db.execute(
+            query.filter(position < tuple_(*before), Message.created_at <= before[0])
+            .order_by(Message.created_at.desc(), Message.id.desc())
+            .limit(limit)
+        )
+        return list(reversed(result.scalars().all()))
+
+    if after is not None:
+        query = query.filter(position > tuple_(*after), Message.created_at >= after[0])
+    else:
+        query = query.offset(skip)
+
     result = await db.execute(
-        select(Message)
-        .filter(Message.session_id == session_id)
-        .order_by(Message.created_at)
-        .offset(skip)
-        .limit(limit)
+        query.order_by(Message.created_at, Message.id).limit(limit)
     )
     return result.scalars().all()
 
 
+def lexical_query(text: str, max_terms: int = 32) -> str | None:
+    """Turn free text into an OR `to_tsquery` expression of its words.
+
+    Any matching word is enough to be a candidate, ranking sorts out the
+    rest. Only word characters survive, so the result is always a valid
+    query. Returns None when the text has no words.
+    """
+    terms = list(dict.fromkeys(word.lower() for word in _WORD.findall(text)))
+    if not terms:
+        return None
+    return " | ".join(terms[:max_terms])
+
+
+async def search_messages(
+    db: AsyncSession,
+    query: str,
+    session_id: UUID | None = None,
+    limit: int = 20,
+    created_after: datetime | None = None,
+    created_before: datetime | None = None,
+) -> list[Row]:
+    """Full-text search over message content, best match first.
+
+    Matches through the GIN index on `content_tsv` and ranks with
+    `ts_rank_cd` normalized by document length. Returns an empty list when
+    the query has no searchable words.
+    """
+    expression = lexical_query(query)
+    if expression is None:
+        return []
+    tsquery = func.to_tsquery(literal(TEXT_SEARCH_CONFIG).cast(REGCONFIG), expression)
+    rank = func.ts_rank_cd(Message.content_tsv, tsquery, 1).label("rank")
+    statement = select(
+        Message.id,
+        Message.session_id,
+        Message.role,
+        Message.content,
+        Message.created_at,
+        rank,
+    ).filter(Message.content_tsv.bool_op("@@")(tsquery))
+    if session_id is not None:
+        statement = statement.filter(Message.session_id == session_id)
+    if created_after is not None:
+        statement = statement.filter(Message.created_at >= created_after)
+    if created_before is not None:
+        statement = statement.filter(Message.created_at < created_before)
+    result = await db.execute(
+        statement.order_by(rank.desc(), Message.created_at.desc()).limit(limit)
+    )
+    return result.all()
+
+
 async def count_messages_by_session(db: AsyncSession, session_id: UUID) -> int | None:
     result = await db.execute(
         select(func.count())
@@ -52,6 +146,36 @@ async def count_messages_by_session(db: AsyncSession, session_id: UUID) -> int |
     return total
 
 
+async def delete_summarized_messages(
+    db: AsyncSession, older_than: datetime, limit: int = 1000
+) -> list[UUID]:
+    """Delete up to `limit` messages created before `older_than` that their
+    session's rolling summary already covers; returns their ids.
+
+    Messages no summary covers are never deleted, so the conversation is
+    only forgotten once it survives in condensed form. Rows locked by a
+    concurrent run are skipped.
+    """
+    doomed = (
+        select(Message.id)
+        .join(SessionSummary, SessionSummary.session_id == Message.session_id)
+        .where(
+            Message.created_at < older_than,
+            tuple_(Message.created_at, Message.id)
+            <= tuple_(SessionSummary.covered_until, SessionSummary.covered_until_id),
+        )
+        .limit(limit)
+        .with_for_update(of=Message, skip_locked=True)
+        .cte("doomed")
+    )
+    result = await db.execute(
+        delete(Message).where(Message.id.in_(select(doomed.c.id))).returning(Message.id)
+    )
+    ids = list(result.scalars())
+    await db.commit()
+    return ids
+
+
 async def update_message(
     db: AsyncSession, message_id: UUID, content: str
 ) -> Message | None:
@@ -59,6 +183,7 @@ async def update_message(
     if not message:
         return None
     message.content = content
+    message.token_count = count_tokens(content)
     await db.commit()
     await db.refresh(message)
     return message
@@ -0,0 +1,130 @@
+import re
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+DEFAULT_PARTITION = "messages_default"
+_PARTITION_NAME = re.compile(r"^messages_y(\d{4})m(\d{2})$")
+_COLUMNS = "id, session_id, role, content, token_count, created_at"
+# Serializes partition changes between app instances
+_LOCK = "SELECT pg_advisory_xact_lock(hashtext('messages_partitions'))"
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"messages_y{month.year:04d}m{month.month:02d}"
+
+
+async def list_message_partitions(db: AsyncSession) -> list[datetime]:
+    """First day of every month that has its own partition, oldest first"""
+    result = await db.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = 'messages'::regclass"
+        )
+    )
+    months = []
+    for (name,) in result:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            year, month = map(int, match.groups())
+            months.append(datetime(year, month, 1, tzinfo=timezone.utc))
+    return sorted(months)
+
+
+async def stranded_months(db: AsyncSession, before: datetime) -> list[datetime]:
+    """Months before `before` with rows in the default partition, oldest
+    first: rows inserted while no partition covered their month"""
+    result = await db.execute(
+        text(
+            "SELECT DISTINCT date_trunc('month', created_at AT TIME ZONE 'UTC') "
+            f"FROM {DEFAULT_PARTITION} WHERE created_at < :before ORDER BY 1"
+        ),
+        {"before": before},
+    )
+    return [month.replace(tzinfo=timezone.utc) for (month,) in result]
+
+
+async def create_message_partition(db: AsyncSession, month: datetime) -> None:
+    """Give `month` its own partition, moving any of its rows that already
+    landed in the default partition.
+
+    The partition is built as a plain table and attached afterwards, the
+    one way that works whether or not the default partition holds rows of
+    that month. Attaching creates the partitioned indexes on it. Runs in
+    the caller's transaction.
+    """
+    name = partition_name(month)
+    lower = month.isoformat()
+    upper = add_months(month, 1).isoformat()
+    await db.execute(
+        text(
+            f"CREATE TABLE {name} (LIKE messages INCLUDING DEFAULTS INCLUDING GENERATED)"
+        )
+    )
+    await db.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} "
+            f"WHERE created_at >= '{lower}' AND created_at < '{upper}' "
+            f"RETURNING {_COLUMNS}) "
+            f"INSERT INTO {name} ({_COLUMNS}) SELECT {_COLUMNS} FROM moved"
+        )
+    )
+    await db.execute(
+        text(
+            f"ALTER TABLE messages ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{lower}') TO ('{upper}')"
+        )
+    )
+
+
+async def ensure_message_partitions(
+    db: AsyncSession, now: datetime, months_ahead: int = 2
+) -> list[datetime]:
+    """Create the partitions of the current month and `months_ahead` after
+    it that do not exist yet, in one transaction; returns the months
+    created.
+
+    Earlier months whose rows landed in the default partition (say, while
+    the maintainer was down over a month boundary) get their partition too,
+    which moves those rows out of the default.
+    """
+    await db.execute(text(_LOCK))
+    existing = set(await list_message_partitions(db))
+    current = month_start(now)
+    months = await stranded_months(db, current)
+    months += [add_months(current, offset) for offset in range(months_ahead + 1)]
+    created = []
+    for month in months:
+        if month not in existing:
+            await create_message_partition(db, month)
+            created.append(month)
+    await db.commit()
+    return created
+
+
+async def drop_message_partitions(db: AsyncSession, before: datetime) -> list[datetime]:
+    """Detach and drop every monthly partition that ends on or before
+    `before`, deleting all of its messages at once; returns their months"""
+    await db.execute(text(_LOCK))
+    dropped = []
+    for month in await list_message_partitions(db):
+        if add_months(month, 1) > before:
+            break
+        name = partition_name(month)
+        await db.execute(text(f"ALTER TABLE messages DETACH PARTITION {name}"))
+        await db.execute(text(f"DROP TABLE {name}"))
+        dropped.append(month)
+    await db.commit()
+    return dropped
@@ -0,0 +1,21 @@
+import base64
+from datetime import datetime
+from uuid import UUID
+
+Cursor = tuple[datetime, UUID]
+
+
+def encode_cursor(created_at: datetime, id: UUID) -> str:
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """Decode an opaque keyset cursor into its (created_at, id) position"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created_at, id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -1,17 +1,21 @@
 from datetime import datetime, timezone
 from uuid import UUID, uuid4
 
-from sqlalchemy import func, select
+from sqlalchemy import func, insert, select, text, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.crud.pagination import Cursor
 from app.models.session import Session as SessionModel
 
 
 async def create_session(db: AsyncSession) -> SessionModel:
-    session = SessionModel(id=uuid4(), created_at=datetime.now(timezone.utc))
-    db.add(session)
+    result = await db.execute(
+        insert(SessionModel)
+        .values(id=uuid4(), created_at=datetime.now(timezone.utc))
+        .returning(SessionModel)
+    )
+    session = result.scalar_one()
     await db.commit()
-    await db.refresh(session)
     return session
 
 
@@ -23,10 +27,32 @@ async def get_session(db: AsyncSession, session_id: UUID) -> SessionModel | None
 
 
 async def get_all_sessions(
-    db: AsyncSession, skip: int = 0, limit: int = 100
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    before: Cursor | None = None,
+    after: Cursor | None = None,
 ) -> list[SessionModel]:
-    """Get all sessions with pagination"""
-    result = await db.execute(select(SessionModel).offset(skip).limit(limit))
+    """Get sessions oldest first, paged by offset or keyset cursor"""
+    query = select(SessionModel)
+    position = tuple_(SessionModel.created_at, SessionModel.id)
+
+    if before is not None:
+        result = await db.execute(
+            query.filter(position < tuple_(*before))
+            .order_by(SessionModel.created_at.desc(), SessionModel.id.desc())
+            .limit(limit)
+        )
+        return list(reversed(result.scalars().all()))
+
+    if after is not None:
+        query = query.filter(position > tuple_(*after))
+    else:
+        query = query.offset(skip)
+
+    result = await db.execute(
+        query.order_by(SessionModel.created_at, SessionModel.id).limit(limit)
+    )
     return result.scalars().all()
 
 
@@ -36,6 +62,25 @@ async def count_sessions(db: AsyncSession) -> int | None:
     return total
 
 
+async def estimate_sessions(db: AsyncSession) -> int | None:
+    """Row count of `sessions` from the planner statistics.
+
+    Constant time at any table size, and as fresh as the last (auto)vacuum
+    or analyze. Falls back to an exact count while the table has never
+    been analyzed.
+    """
+    result = await db.execute(
+        text(
+            "SELECT reltuples::bigint FROM pg_class "
+            "WHERE oid = 'sessions'::regclass AND reltuples >= 0"
+        )
+    )
+    total = result.scalar()
+    if total is None:
+        return await count_sessions(db)
+    return total
+
+
 async def delete_session(db: AsyncSession, session_id: UUID) -> bool:
     session = await get_session(db, session_id)
     if not session:
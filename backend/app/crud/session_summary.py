@@ -0,0 +1,74 @@
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.message import Message
+from app.models.session_summary import SessionSummary
+
+
+async def get_summary(db: AsyncSession, session_id: UUID) -> Optional[SessionSummary]:
+    result = await db.execute(
+        select(SessionSummary).where(SessionSummary.session_id == session_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def get_unsummarized_messages(
+    db: AsyncSession,
+    session_id: UUID,
+    summary: Optional[SessionSummary] = None,
+    limit: int = 500,
+) -> list[Message]:
+    """Oldest `limit` messages of the session not covered by `summary`"""
+    query = select(Message).where(Message.session_id == session_id)
+    if summary is not None:
+        query = query.where(
+            tuple_(Message.created_at, Message.id)
+            > tuple_(summary.covered_until, summary.covered_until_id),
+            Message.created_at >= summary.covered_until,
+        )
+    result = await db.execute(
+        query.order_by(Message.created_at, Message.id).limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def save_summary(
+    db: AsyncSession,
+    session_id: UUID,
+    summary: str,
+    token_count: int,
+    covered_until: datetime,
+    covered_until_id: UUID,
+    previous_until_id: Optional[UUID] = None,
+) -> bool:
+    """Store a new summary unless another writer advanced it since it was
+    read (compare-and-set on the previous boundary). Returns whether it was
+    stored."""
+    stmt = insert(SessionSummary).values(
+        session_id=session_id,
+        summary=summary,
+        token_count=token_count,
+        covered_until=covered_until,
+        covered_until_id=covered_until_id,
+        updated_at=datetime.now(timezone.utc),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[SessionSummary.session_id],
+        set_={
+            "summary": stmt.excluded.summary,
+            "token_count": stmt.excluded.token_count,
+            "covered_until": stmt.excluded.covered_until,
+            "covered_until_id": stmt.excluded.covered_until_id,
+            "updated_at": stmt.excluded.updated_at,
+        },
+        where=SessionSummary.covered_until_id.is_not_distinct_from(previous_until_id),
+    ).returning(SessionSummary.session_id)
+    result = await db.execute(stmt)
+    stored = result.scalar_one_or_none() is not None
+    await db.commit()
+    return stored
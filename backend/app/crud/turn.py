@@ -0,0 +1,177 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import and_, func, insert, or_, select, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.message import build_message_values
+from app.models.message import Message
+from app.models.session import Session as SessionModel
+from app.models.session_summary import SessionSummary
+
+
+@dataclass
+class Turn:
+    session_id: UUID
+    history: list[dict] = field(default_factory=list)
+    message: dict = field(default_factory=dict)
+    summary: Optional[str] = None
+
+
+@dataclass
+class SessionContext:
+    history: list[dict] = field(default_factory=list)
+    summary: Optional[str] = None
+
+
+def _unsummarized_messages(limit: int, *columns):
+    """Lateral subquery of the last `limit` messages of the session in the
+    outer query that its rolling summary does not cover yet"""
+    return (
+        select(*columns)
+        .where(
+            Message.session_id == SessionModel.id,
+            or_(
+                SessionSummary.covered_until.is_(None),
+                and_(
+                    # Same bound on the partition key alone, so older
+                    # partitions are pruned
+                    Message.created_at >= SessionSummary.covered_until,
+                    tuple_(Message.created_at, Message.id)
+                    > tuple_(
+                        SessionSummary.covered_until, SessionSummary.covered_until_id
+                    ),
+                ),
+            ),
+        )
+        .order_by(Message.created_at.desc(), Message.id.desc())
+        .limit(limit)
+        .lateral()
+    )
+
+
+async def get_session_context(
+    db: AsyncSession, session_id: UUID, limit: int = 50
+) -> SessionContext | None:
+    """Check the session exists and load its rolling summary and the last
+    `limit` messages the summary does not cover, in one query.
+
+    Returns None when the session does not exist.
+    """
+    recent = _unsummarized_messages(
+        limit,
+        Message.id,
+        Message.role,
+        Message.content,
+        Message.token_count,
+        Message.created_at,
+    )
+    result = await db.execute(
+        select(
+            SessionModel.id.label("session_id"),
+            SessionSummary.summary,
+            recent.c.id.label("message_id"),
+            recent.c.role,
+            recent.c.content,
+            recent.c.token_count,
+        )
+        .select_from(SessionModel)
+        .outerjoin(SessionSummary, SessionSummary.session_id == SessionModel.id)
+        .outerjoin(recent, true())
+        .where(SessionModel.id == session_id)
+        .order_by(recent.c.created_at, recent.c.id)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+
+    return SessionContext(
+        summary=rows[0].summary,
+        history=[
+            {
+                "id": row.message_id,
+                "role": row.role,
+                "content": row.content,
+                "token_count": row.token_count,
+            }
+            for row in rows
+            if row.message_id is not None
+        ],
+    )
+
+
+async def get_context_size(
+    db: AsyncSession, session_id: UUID, limit: int = 50
+) -> SessionContext | None:
+    """`get_session_context` without the message contents: each history
+    entry holds only its id and token count, enough to size the prompt
+    before the turn starts. A message without a stored count is counted
+    at one token per character.
+
+    Returns None when the session does not exist.
+    """
+    recent = _unsummarized_messages(
+        limit,
+        Message.id,
+        func.coalesce(Message.token_count, func.length(Message.content)).label(
+            "token_count"
+        ),
+        Message.created_at,
+    )
+    result = await db.execute(
+        select(
+            SessionSummary.summary,
+            recent.c.id.label("message_id"),
+            recent.c.token_count,
+        )
+        .select_from(SessionModel)
+        .outerjoin(SessionSummary, SessionSummary.session_id == SessionModel.id)
+        .outerjoin(recent, true())
+        .where(SessionModel.id == session_id)
+    )
+    rows = result.all()
+    if not rows:
+        return None
+
+    return SessionContext(
+        summary=rows[0].summary,
+        history=[
+            {"id": row.message_id, "token_count": row.token_count}
+            for row in rows
+            if row.message_id is not None
+        ],
+    )
+
+
+async def start_turn(
+    db: AsyncSession,
+    session_id: UUID | None,
+    user_message: str,
+    history_limit: int = 50,
+) -> Turn | None:
+    """Load the context and record the user message of a chat turn in one
+    transaction, creating the session when no id is given.
+
+    Returns None when `session_id` does not exist.
+    """
+    if session_id is None:
+        turn = Turn(session_id=uuid4())
+        await db.execute(
+            insert(SessionModel).values(
+                id=turn.session_id, created_at=datetime.now(timezone.utc)
+            )
+        )
+    else:
+        context = await get_session_context(db, session_id, limit=history_limit)
+        if context is None:
+            return None
+        turn = Turn(
+            session_id=session_id, history=context.history, summary=context.summary
+        )
+
+    turn.message = build_message_values(turn.session_id, "user", user_message)
+    await db.execute(insert(Message).values(turn.message))
+    await db.commit()
+    return turn
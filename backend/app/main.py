@@ -1,33 +1,79 @@
-import json
-from uuid import UUID
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Literal, Optional
+from uuid import UUID, uuid4
 
 from fastapi import Depends, FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.background import BackgroundTask
 
 from app.core.config import settings
-from app.core.database import AsyncSessionLocal, get_db
+from app.core.database import get_db
 from app.core.exceptions import (
+    LLMAdmissionError,
     LLMConnectionError,
     LLMRateLimitError,
     LLMServiceError,
     LLMTimeoutError,
 )
 from app.core.logging import setup_logging
+from app.core.metrics import (
+    SSE_ACTIVE_STREAMS,
+    SSE_TOKENS_PER_SECOND,
+    SSE_TTFT_SECONDS,
+)
+from app.core.middleware import PrometheusMiddleware
+from app.core.observability import init_tracing, shutdown_tracing
 from app.core.prompts import BASE_SYSTEM_PROMPT
+from app.core.tokens import count_tokens, get_encoding
 from app.crud import message as message_crud
 from app.crud import session as session_crud
+from app.crud import turn as turn_crud
+from app.crud.pagination import decode_cursor, encode_cursor
 from app.models.message import Message
 from app.models.session import Session as SessionModel
 from app.schemas.chat import ChatRequest, ChatResponse
 from app.schemas.message import MessageHistoryResponse, MessageResponse
 from app.schemas.session import SessionListResponse, SessionResponse
+from app.services.admission import Admission, llm_admission
+from app.services.chat_pipeline import PreparedTurn, prepare_turn
+from app.services.context_builder import estimate_request_tokens
+from app.services.embedding_worker import embedding_worker
 from app.services.llm_service import get_llm_service
+from app.services.message_writer import message_write_queue
+from app.services.partition_maintainer import partition_maintainer
+from app.services.retention import retention_engine
+from app.services.sse import coalesce_chunks, encode_event
+from app.services.summarizer import session_summarizer
 
 setup_logging(settings.log_level)
 
-app = FastAPI(title="Memocha")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_tracing()
+    # Load (and on first run download) the tokenizer before taking traffic
+    await asyncio.to_thread(get_encoding)
+    partition_maintainer.start()
+    message_write_queue.start()
+    embedding_worker.start()
+    retention_engine.start()
+    yield
+    await retention_engine.stop()
+    await message_write_queue.stop()
+    await embedding_worker.stop()
+    await session_summarizer.stop()
+    await partition_maintainer.stop()
+    shutdown_tracing()
+
+
+app = FastAPI(title="Memocha", lifespan=lifespan)
+
+app.add_middleware(PrometheusMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
@@ -47,6 +93,11 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.post("/sessions", response_model=SessionResponse, status_code=201)
 async def create_session(db: AsyncSession = Depends(get_db)):
     session = await session_crud.create_session(db)
@@ -55,18 +106,49 @@ async def create_session(db: AsyncSession = Depends(get_db)):
 
 @app.get("/sessions", response_model=SessionListResponse)
 async def get_sessions(
-    skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_db)
+    skip: int = 0,
+    limit: int = 100,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    total: Optional[Literal["exact", "estimate", "none"]] = None,
+    db: AsyncSession = Depends(get_db),
 ):
-    sessions = await session_crud.get_all_sessions(db, skip=skip, limit=limit)
-    total = await session_crud.count_sessions(db)
+    if before and after:
+        raise HTTPException(
+            status_code=400, detail="Only one of before/after may be given"
+        )
+    try:
+        before_position = decode_cursor(before) if before else None
+        after_position = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    sessions = await session_crud.get_all_sessions(
+        db, skip=skip, limit=limit, before=before_position, after=after_position
+    )
+
+    # An exact total is a full scan of `sessions` on every page; the
+    # estimate reads the planner statistics instead
+    total_mode = total or settings.session_list_total
+    session_total = None
+    if total_mode == "exact":
+        session_total = await session_crud.count_sessions(db)
+    elif total_mode == "estimate":
+        session_total = await session_crud.estimate_sessions(db)
+
+    next_cursor = None
+    if sessions and len(sessions) == limit:
+        edge = sessions[0] if before else sessions[-1]
+        next_cursor = encode_cursor(edge.created_at, edge.id)
 
     return SessionListResponse(
         sessions=[
             SessionResponse.model_validate(s) for s in sessions
         ],  # Convert each ORM object to Pydantic model
-        total=total,
+        total=session_total,
         skip=skip,
         limit=limit,
+        next_cursor=next_cursor,
     )
 
 
@@ -83,17 +165,48 @@ async def get_message_history(
     session_id: UUID,
     skip: int = 0,
     limit: int = 100,
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    include_total: Optional[bool] = None,
     db: AsyncSession = Depends(get_db),
 ):
+    if before and after:
+        raise HTTPException(
+            status_code=400, detail="Only one of before/after may be given"
+        )
+    try:
+        before_position = decode_cursor(before) if before else None
+        after_position = decode_cursor(after) if after else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     session = await session_crud.get_session(db, session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
     messages = await message_crud.get_messages_by_session(
-        db, session_id, skip=skip, limit=limit
+        db,
+        session_id,
+        skip=skip,
+        limit=limit,
+        before=before_position,
+        after=after_position,
     )
 
-    total = await message_crud.count_messages_by_session(db, session_id)
+    # The count grows with the session; cursor pages skip it unless asked,
+    # so their latency stays flat however long the session gets
+    if include_total is None:
+        include_total = not (before or after)
+    total = None
+    if include_total:
+        total = await message_crud.count_messages_by_session(db, session_id)
+
+    # A full page means there may be more: point the cursor past its far edge
+    # in the direction the client is paging.
+    next_cursor = None
+    if messages and len(messages) == limit:
+        edge = messages[0] if before else messages[-1]
+        next_cursor = encode_cursor(edge.created_at, edge.id)
 
     return MessageHistoryResponse(
         messages=[MessageResponse.model_validate(m) for m in messages],
@@ -101,40 +214,81 @@ async def get_message_history(
         total=total,
         skip=skip,
         limit=limit,
+        next_cursor=next_cursor,
     )
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
-    if request.session_id:
-        session = await session_crud.get_session(db, request.session_id)
-        if not session:
+async def admit_turn(db: AsyncSession, request: ChatRequest) -> Admission:
+    """Wait for the admission controller to let a turn's LLM call through,
+    or turn the request away with 429 and Retry-After.
+
+    Runs before the turn writes anything, so a rejected request leaves no
+    message behind. The call is charged its estimated size, from the token
+    counts stored for the session's history (a read-only query) plus room
+    for the memories retrieval may add.
+    """
+    session_id = request.session_id
+    history, summary, memory_tokens = [], None, 0
+    if session_id is not None:
+        context = await turn_crud.get_context_size(
+            db, session_id, limit=settings.chat_history_window
+        )
+        # Not holding a connection while queued
+        await db.rollback()
+        if context is None:
             raise HTTPException(status_code=404, detail="Session not found")
-    else:
-        session = await session_crud.create_session(db)
-
-    await message_crud.create_message(
-        db=db, session_id=session.id, role="user", content=request.message
+        history = message_write_queue.with_pending(session_id, context.history)
+        summary = context.summary
+        if settings.memory_enabled:
+            memory_tokens = settings.llm_memory_budget
+    cost = estimate_request_tokens(
+        request.message,
+        history,
+        BASE_SYSTEM_PROMPT,
+        summary=summary,
+        memory_tokens=memory_tokens,
     )
+    try:
+        # A new session has no id yet and gets a queue of its own
+        return await llm_admission.acquire(session_id or uuid4(), cost)
+    except LLMAdmissionError as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
-    history_messages = await message_crud.get_messages_by_session(
-        db=db,
-        session_id=session.id,
-        skip=0,
-        limit=50,
-    )
 
-    message_history = [
-        {"role": msg.role, "content": msg.content} for msg in history_messages[:-1]
-    ]
+async def begin_turn(
+    db: AsyncSession, request: ChatRequest
+) -> tuple[PreparedTurn, list[dict]]:
+    """Store the user message and gather what the LLM call needs, returning
+    the turn with the history to send"""
+    try:
+        turn = await prepare_turn(db, request.session_id, request.message)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Timed out loading the session")
+    if turn is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    embedding_worker.submit([turn.message])
+    session_summarizer.maybe_schedule(turn.session_id, turn.history)
+    message_history = message_write_queue.with_pending(turn.session_id, turn.history)
+    return turn, message_history
+
 
-    llm_service = get_llm_service()
+@app.post("/chat", response_model=ChatResponse)
+async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
+    admission = await admit_turn(db, request)
     try:
+        turn, message_history = await begin_turn(db, request)
+        llm_service = get_llm_service()
         response_text = await llm_service.chat_with_history(
             user_message=request.message,
             message_history=message_history,
             system_prompt=BASE_SYSTEM_PROMPT,
-            session_id=str(session.id),
+            session_id=str(turn.session_id),
+            memories=turn.memories,
+            summary=turn.summary,
         )
     except LLMRateLimitError:
         raise HTTPException(status_code=429, detail="Rate limit exceeded")
@@ -144,84 +298,89 @@ async def chat(request: ChatRequest, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=504, detail="LLM request timed out")
     except LLMServiceError as e:
         raise HTTPException(status_code=500, detail=f"LLM service error: {str(e)}")
+    finally:
+        admission.release()
 
-    message_crud.create_message(
-        db=db, session_id=session.id, role="assistant", content=response_text
-    )
+    await message_write_queue.enqueue(turn.session_id, "assistant", response_text)
 
-    return ChatResponse(response=response_text, session_id=str(session.id))
+    return ChatResponse(response=response_text, session_id=str(turn.session_id))
 
 
 @app.post("/chat/stream")
 async def chat_stream(request: ChatRequest, db: AsyncSession = Depends(get_db)):
-    if request.session_id:
-        session = await session_crud.get_session(db, request.session_id)
-        if not session:
-            raise HTTPException(status_code=404, detail="Session not found")
-    else:
-        session = await session_crud.create_session(db)
-
-    await message_crud.create_message(
-        db=db, session_id=session.id, role="user", content=request.message
-    )
-
-    history_messages = await message_crud.get_messages_by_session(
-        db=db,
-        session_id=session.id,
-        skip=0,
-        limit=50,
-    )
-
-    message_history = [
-        {"role": msg.role, "content": msg.content} for msg in history_messages[:-1]
-    ]
+    request_started = time.perf_counter()
 
-    session_id = session.id
+    # Admitted before the response starts, so a rejection is still a 429
+    admission = await admit_turn(db, request)
+    try:
+        turn, message_history = await begin_turn(db, request)
+    except BaseException:
+        admission.release()
+        raise
+    session_id = turn.session_id
 
     async def generate_stream():
         llm_service = get_llm_service()
-        full_response = ""
+        received = []
+        first_token_at = None
+        SSE_ACTIVE_STREAMS.inc()
 
         try:
-            async for chunk in llm_service.stream_chat_with_history(
+            chunks = llm_service.stream_chat_with_history(
                 user_message=request.message,
                 message_history=message_history,
                 system_prompt=BASE_SYSTEM_PROMPT,
                 session_id=str(session_id),
+                memories=turn.memories,
+                summary=turn.summary,
+            )
+            # One frame per coalescing window rather than per token
+            async for batch in coalesce_chunks(
+                chunks,
+                window=settings.sse_coalesce_window,
+                max_chars=settings.sse_coalesce_max_chars,
             ):
-                full_response += chunk
-                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"  # ensure_ascii=False allows UTF-8 chars (emojis, etc.)
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    SSE_TTFT_SECONDS.observe(first_token_at - request_started)
+                received.extend(batch)
+                yield encode_event("".join(batch))
+
+            full_response = "".join(received)
+            if first_token_at is not None:
+                generation_time = time.perf_counter() - first_token_at
+                if generation_time > 0:
+                    SSE_TOKENS_PER_SECOND.observe(
+                        count_tokens(full_response) / generation_time
+                    )
 
-            async with AsyncSessionLocal() as new_db:
-                await message_crud.create_message(
-                    db=new_db,
-                    session_id=session.id,
-                    role="assistant",
-                    content=full_response,
-                )
+            await message_write_queue.enqueue(session_id, "assistant", full_response)
 
-            completion_data = json.dumps({"session_id": str(session.id)})
-            yield f"event: complete\ndata: {completion_data}\n\n"
+            yield encode_event({"session_id": str(session_id)}, event="complete")
 
         except LLMRateLimitError as e:
-            error_data = json.dumps({"error": "Rate limit exceeded", "detail": str(e)})
-            yield f"event: error\ndata: {error_data}\n\n"
+            yield encode_event(
+                {"error": "Rate limit exceeded", "detail": str(e)}, event="error"
+            )
         except LLMConnectionError as e:
-            error_data = json.dumps(
-                {"error": "LLM service unavailable", "detail": str(e)}
+            yield encode_event(
+                {"error": "LLM service unavailable", "detail": str(e)}, event="error"
             )
-            yield f"event: error\ndata: {error_data}\n\n"
         except LLMTimeoutError as e:
-            error_data = json.dumps(
-                {"error": "LLM request timed out", "detail": str(e)}
+            yield encode_event(
+                {"error": "LLM request timed out", "detail": str(e)}, event="error"
             )
-            yield f"event: error\ndata: {error_data}\n\n"
         except LLMServiceError as e:
-            error_data = json.dumps({"error": "LLM service error", "detail": str(e)})
-            yield f"event: error\ndata: {error_data}\n\n"
+            yield encode_event(
+                {"error": "LLM service error", "detail": str(e)}, event="error"
+            )
         except Exception as e:
-            error_data = json.dumps({"error": "Unexpected error", "detail": str(e)})
-            yield f"event: error\ndata: {error_data}\n\n"
+            yield encode_event(
+                {"error": "Unexpected error", "detail": str(e)}, event="error"
+            )
+        finally:
+            admission.release()
+            SSE_ACTIVE_STREAMS.dec()
 
     return StreamingResponse(
         generate_stream(),
@@ -231,4 +390,6 @@ async def chat_stream(request: ChatRequest, db: AsyncSession = Depends(get_db)):
             "Connection": "keep-alive",  # Keep connection open for streaming
             "X-Accel-Buffering": "no",  # Disable nginx buffering for real-time streaming
         },
+        # Also releases when the stream never started (client gone first)
+        background=BackgroundTask(admission.release),
     )
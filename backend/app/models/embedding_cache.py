@@ -0,0 +1,17 @@
+from sqlalchemy import Column, DateTime, Float, Index, LargeBinary, String
+
+from app.models.base import Base
+
+
+class EmbeddingCacheEntry(Base):
+    """Embedding of a normalized text, addressed by the SHA-256 of model and
+    text"""
+
+    __tablename__ = "embedding_cache"
+    __table_args__ = (Index("ix_embedding_cache_created_at", "created_at"),)
+
+    content_hash = Column(String(64), primary_key=True)
+    encoding = Column(String(16))
+    scale = Column(Float)
+    vector = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True))
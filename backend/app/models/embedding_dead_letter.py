@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, Integer, Text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base
+
+
+class EmbeddingDeadLetter(Base):
+    """A message the embedding worker gave up on, kept for replay"""
+
+    __tablename__ = "embedding_dead_letters"
+
+    message_id = Column(UUID, primary_key=True)
+    session_id = Column(UUID)
+    error = Column(Text)
+    attempts = Column(Integer, default=1)
+    created_at = Column(DateTime(timezone=True))
+    # Set while a replay has the message queued; deleted once it is embedded
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
@@ -1,14 +1,47 @@
-from sqlalchemy import Column, DateTime, ForeignKey, String, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import (
+    Column,
+    Computed,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred
 
 from app.models.base import Base
 
+# Text search configuration of `content_tsv`; queries must use the same one
+TEXT_SEARCH_CONFIG = "english"
+
 
 class Message(Base):
+    """A chat message. The table is range-partitioned by month on
+    `created_at` (see app.crud.message_partition), which therefore has to
+    be part of the primary key."""
+
     __tablename__ = "messages"
+    __table_args__ = (
+        Index("ix_messages_session_id_created_at_id", "session_id", "created_at", "id"),
+        Index("ix_messages_content_tsv", "content_tsv", postgresql_using="gin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     id = Column(UUID, primary_key=True)
     session_id = Column(UUID, ForeignKey("sessions.id"))
     role = Column(String)
     content = Column(Text)
-    created_at = Column(DateTime(timezone=True))
+    token_count = Column(Integer)
+    created_at = Column(DateTime(timezone=True), primary_key=True)
+    # Maintained by Postgres; deferred so loading messages does not fetch it
+    content_tsv = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                f"to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(content, ''))",
+                persisted=True,
+            ),
+        )
+    )
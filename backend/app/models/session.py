@@ -1,4 +1,4 @@
-from sqlalchemy import Column, DateTime
+from sqlalchemy import Column, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.models.base import Base
@@ -6,6 +6,7 @@ from app.models.base import Base
 
 class Session(Base):
     __tablename__ = "sessions"
+    __table_args__ = (Index("ix_sessions_created_at_id", "created_at", "id"),)
 
     id = Column(UUID, primary_key=True)
     created_at = Column(DateTime(timezone=True))
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, Text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base
+
+
+class SessionSummary(Base):
+    """Rolling summary of a session's messages up to and including
+    (covered_until, covered_until_id) in (created_at, id) order"""
+
+    __tablename__ = "session_summaries"
+
+    session_id = Column(UUID, ForeignKey("sessions.id"), primary_key=True)
+    summary = Column(Text)
+    token_count = Column(Integer)
+    covered_until = Column(DateTime(timezone=True))
+    covered_until_id = Column(UUID)
+    updated_at = Column(DateTime(timezone=True))
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict
@@ -24,6 +25,7 @@ class MessageResponse(MessageBase):
 class MessageHistoryResponse(BaseModel):
     messages: list[MessageResponse]
     session_id: UUID
-    total: int
+    total: Optional[int]
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import Optional
 from uuid import UUID
 
 from pydantic import BaseModel, ConfigDict
@@ -21,6 +22,7 @@ class SessionResponse(SessionBase):
 
 class SessionListResponse(BaseModel):
     sessions: list[SessionResponse]
-    total: int
+    total: Optional[int]
     skip: int
     limit: int
+    next_cursor: Optional[str] = None
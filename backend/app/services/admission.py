@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import math
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+from app.core.config import settings
+from app.core.exceptions import LLMAdmissionError
+from app.core.metrics import (
+    LLM_ADMISSION_ACTIVE,
+    LLM_ADMISSION_QUEUED,
+    LLM_ADMISSION_REJECTED,
+    LLM_ADMISSION_WAIT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Refills at `rate` per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available"""
+        return max(0.0, (amount - self.tokens) / self.rate)
+
+
+@dataclass(eq=False)
+class _Waiter:
+    key: Hashable
+    cost: float
+    future: asyncio.Future
+
+
+class Admission:
+    """One admitted LLM call; `release` is idempotent so every path that
+    may end the call can safely call it"""
+
+    def __init__(self, controller: Optional["AdmissionController"] = None):
+        self._controller = controller
+
+    def release(self) -> None:
+        controller, self._controller = self._controller, None
+        if controller is not None:
+            controller._release()
+
+
+class AdmissionController:
+    """Admits LLM calls at the rate the provider accepts them.
+
+    A call is admitted while fewer than `max_concurrency` are running and
+    the per-minute request and token buckets (`requests_per_minute`,
+    `tokens_per_minute`; 0 means no limit) can pay for it, its token cost
+    being the caller's estimate of prompt plus completion. Otherwise it
+    waits in a queue of at most `queue_size` calls, served round-robin
+    across keys (sessions) so one busy session cannot starve the others.
+
+    A call that would overflow the queue, or waits longer than
+    `queue_timeout`, fails fast with LLMAdmissionError carrying a
+    Retry-After estimate. Bursts queue briefly or bounce instead of
+    turning into provider 429s that retries then multiply.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 64,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        queue_size: int = 256,
+        queue_timeout: float = 10.0,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.enabled = enabled
+        self.clock = clock
+        now = clock()
+        self._requests = (
+            TokenBucket(requests_per_minute / 60, requests_per_minute, now)
+            if requests_per_minute > 0
+            else None
+        )
+        self._tokens = (
+            TokenBucket(tokens_per_minute / 60, tokens_per_minute, now)
+            if tokens_per_minute > 0
+            else None
+        )
+        self._active = 0
+        self._queues: OrderedDict[Hashable, deque[_Waiter]] = OrderedDict()
+        self._waiting = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    async def acquire(self, key: Hashable, cost: float = 0) -> Admission:
+        """Wait for a slot for one call of about `cost` tokens"""
+        if not self.enabled:
+            return Admission()
+        if self._tokens is not None:
+            # A call larger than the whole bucket would otherwise never run
+            cost = min(cost, self._tokens.capacity)
+
+        self._refill()
+        if not self._queues and self._can_grant(cost):
+            self._grant(cost)
+            LLM_ADMISSION_WAIT_SECONDS.observe(0)
+            return Admission(self)
+
+        if self._waiting >= self.queue_size:
+            self._reject("queue_full")
+            raise LLMAdmissionError(
+                "Too many requests waiting for the LLM", self.retry_after(cost)
+            )
+
+        waiter = _Waiter(key, cost, asyncio.get_running_loop().create_future())
+        self._queues.setdefault(key, deque()).append(waiter)
+        self._waiting += 1
+        LLM_ADMISSION_QUEUED.set(self._waiting)
+        self._dispatch()
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(waiter.future, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._remove(waiter)
+            self._reject("timeout")
+            raise LLMAdmissionError(
+                "Timed out waiting for the LLM", self.retry_after(cost)
+            )
+        except BaseException:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as the caller went away
+                self._release()
+            else:
+                self._remove(waiter)
+            raise
+        LLM_ADMISSION_WAIT_SECONDS.observe(time.perf_counter() - start)
+        return Admission(self)
+
+    def retry_after(self, cost: float = 0) -> int:
+        """Whole seconds until the queued calls and one more of `cost`
+        could have been paid for"""
+        self._refill()
+        queued = [waiter.cost for queue in self._queues.values() for waiter in queue]
+        seconds = 0.0
+        if self._requests is not None:
+            seconds = self._requests.time_until(len(queued) + 1)
+        if self._tokens is not None:
+            seconds = max(seconds, self._tokens.time_until(sum(queued) + cost))
+        return max(1, math.ceil(seconds))
+
+    def _can_grant(self, cost: float) -> bool:
+        if self.max_concurrency > 0 and self._active >= self.max_concurrency:
+            return False
+        if self._requests is not None and self._requests.tokens < 1:
+            return False
+        if self._tokens is not None and self._tokens.tokens < cost:
+            return False
+        return True
+
+    def _grant(self, cost: float) -> None:
+        if self._requests is not None:
+            self._requests.tokens -= 1
+        if self._tokens is not None:
+            self._tokens.tokens -= cost
+        self._active += 1
+        LLM_ADMISSION_ACTIVE.set(self._active)
+
+    def _release(self) -> None:
+        self._active -= 1
+        LLM_ADMISSION_ACTIVE.set(self._active)
+        self._dispatch()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        for bucket in (self._requests, self._tokens):
+            if bucket is not None:
+                bucket.refill(now)
+
+    def _remove(self, waiter: _Waiter) -> None:
+        queue = self._queues.get(waiter.key)
+        if queue is None or waiter not in queue:
+            return
+        queue.remove(waiter)
+        if not queue:
+            del self._queues[waiter.key]
+        self._waiting -= 1
+        LLM_ADMISSION_QUEUED.set(self._waiting)
+
+    def _reject(self, reason: str) -> None:
+        LLM_ADMISSION_REJECTED.labels(reason=reason).inc()
+        logger.warning(f"LLM call rejected ({reason}), {self._waiting} waiting")
+
+    def _dispatch(self) -> None:
+        """Admit queued calls in round-robin order of their keys while
+        capacity lasts; if only the buckets are short, check again once
+        they have refilled enough"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._refill()
+        while self._queues:
+            key, queue = next(iter(self._queues.items()))
+            waiter = queue[0]
+            # A waiter that timed out or was cancelled, not yet removed
+            abandoned = waiter.future.done()
+            if not abandoned and not self._can_grant(waiter.cost):
+                break
+            queue.popleft()
+            self._waiting -= 1
+            # The key goes to the back of the line
+            del self._queues[key]
+            if queue:
+                self._queues[key] = queue
+            if not abandoned:
+                self._grant(waiter.cost)
+                waiter.future.set_result(None)
+        LLM_ADMISSION_QUEUED.set(self._waiting)
+
+        if not self._queues:
+            return
+        if self.max_concurrency > 0 and self._active >= self.max_concurrency:
+            # A release will dispatch again
+            return
+        cost = next(iter(self._queues.values()))[0].cost
+        delay = 0.0
+        if self._requests is not None:
+            delay = self._requests.time_until(1)
+        if self._tokens is not None:
+            delay = max(delay, self._tokens.time_until(cost))
+        self._timer = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+
+llm_admission = AdmissionController(
+    max_concurrency=settings.llm_max_concurrency,
+    requests_per_minute=settings.llm_requests_per_minute,
+    tokens_per_minute=settings.llm_tokens_per_minute,
+    queue_size=settings.llm_admission_queue_size,
+    queue_timeout=settings.llm_admission_queue_timeout,
+    enabled=settings.llm_admission_enabled,
+)
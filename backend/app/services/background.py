@@ -0,0 +1,70 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundTask:
+    """The long-running task of a service, started and stopped with the app.
+
+    `start` is idempotent on the running event loop and starts a fresh task
+    on a new one (each test gets its own loop); `stop` cancels the task and
+    waits for it to finish.
+    """
+
+    def __init__(self, target: Callable[[], Awaitable[None]]):
+        self.target = target
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return (
+            self._task is not None
+            and not self._task.done()
+            and self._task.get_loop() is asyncio.get_running_loop()
+        )
+
+    def start(self) -> None:
+        if not self.running:
+            self._task = asyncio.create_task(self.target())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        task, self._task = self._task, None
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+class PeriodicTask(BackgroundTask):
+    """Calls `run` every `interval` seconds, first right away if `immediate`.
+
+    A failing run is logged as `description` and retried at the next tick.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[], Awaitable[object]],
+        interval: float,
+        description: str,
+        immediate: bool = False,
+    ):
+        super().__init__(self._loop)
+        self.run = run
+        self.interval = interval
+        self.description = description
+        self.immediate = immediate
+
+    async def _loop(self) -> None:
+        if not self.immediate:
+            await asyncio.sleep(self.interval)
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logger.warning(f"{self.description} failed: {e}")
+            await asyncio.sleep(self.interval)
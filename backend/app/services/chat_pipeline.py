@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import PIPELINE_STAGE_DEGRADED, PIPELINE_STAGE_SECONDS
+from app.crud import turn as turn_crud
+from app.services.embeddings import get_embeddings
+from app.services.hybrid_retrieval import hybrid_search
+from app.services.memory_store.factory import get_memory_store
+
+logger = logging.getLogger(__name__)
+
+_DEGRADED = object()
+
+
+@dataclass
+class PreparedTurn:
+    session_id: UUID
+    history: list[dict]
+    message: dict
+    memories: list[dict] = field(default_factory=list)
+    summary: Optional[str] = None
+
+
+async def run_stage(
+    name: str,
+    coro: Awaitable[Any],
+    timeout: float,
+    degrade: bool = False,
+) -> Any:
+    """Await one pipeline stage under `timeout`, recording its duration.
+
+    A degradable stage that fails or times out returns `_DEGRADED` instead
+    of raising, so the turn can go on without it.
+    """
+    start = time.perf_counter()
+    try:
+        return await asyncio.wait_for(coro, timeout)
+    except Exception as e:
+        if not degrade:
+            raise
+        reason = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+        PIPELINE_STAGE_DEGRADED.labels(stage=name, reason=reason).inc()
+        logger.warning(f"Pipeline stage {name} degraded ({reason}): {e!r}")
+        return _DEGRADED
+    finally:
+        PIPELINE_STAGE_SECONDS.labels(stage=name).observe(time.perf_counter() - start)
+
+
+async def gather_stages(*stages: Awaitable[Any]) -> list[Any]:
+    """Run stages concurrently; if one raises, cancel the rest and re-raise"""
+    tasks = [asyncio.ensure_future(stage) for stage in stages]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def retrieve_memories(session_id: UUID, query: str) -> list[dict]:
+    """Hybrid vector and full-text search for memories within the session"""
+    return await hybrid_search(
+        query,
+        k=settings.memory_top_k,
+        embeddings=get_embeddings(),
+        store=get_memory_store(),
+        session_factory=(
+            AsyncSessionLocal if settings.memory_lexical_enabled else None
+        ),
+        session_id=session_id,
+        candidates=settings.memory_candidates,
+        rrf_k=settings.memory_rrf_k,
+        min_vector_score=settings.memory_min_score,
+    )
+
+
+async def prepare_turn(
+    db: AsyncSession, session_id: Optional[UUID], user_message: str
+) -> Optional[PreparedTurn]:
+    """Everything a chat turn needs before calling the LLM.
+
+    The turn stage (session check, history and user message insert, one
+    transaction) and the retrieval stage (fused vector and full-text search)
+    are independent and run concurrently, so pre-LLM latency is the slower
+    of the two rather than their sum. Retrieval is bounded by
+    `memory_retrieval_timeout` and the turn continues without memories when
+    it is slow or failing. Returns None when `session_id` does not exist.
+    """
+    stages = [
+        run_stage(
+            "turn",
+            turn_crud.start_turn(
+                db=db,
+                session_id=session_id,
+                user_message=user_message,
+                history_limit=settings.chat_history_window,
+            ),
+            timeout=settings.turn_stage_timeout,
+        )
+    ]
+    # A brand new session has nothing to remember yet
+    if settings.memory_enabled and session_id is not None:
+        stages.append(
+            run_stage(
+                "retrieval",
+                retrieve_memories(session_id, user_message),
+                timeout=settings.memory_retrieval_timeout,
+                degrade=True,
+            )
+        )
+
+    turn, *retrieved = await gather_stages(*stages)
+    if turn is None:
+        return None
+
+    memories = []
+    if retrieved and retrieved[0] is not _DEGRADED:
+        # Memories still inside the history window would be sent twice, and
+        # full-text search can already see the message just inserted
+        seen = {msg["id"] for msg in turn.history} | {turn.message["id"]}
+        memories = [m for m in retrieved[0] if m["id"] not in seen]
+        # What gets used is what retention keeps
+        store = get_memory_store()
+
+        def touch():
+            with store.lock:
+                store.touch([m["id"] for m in memories])
+
+        # The embedding worker and retention change the store from threads
+        await asyncio.to_thread(touch)
+
+    return PreparedTurn(
+        session_id=turn.session_id,
+        history=turn.history,
+        message=turn.message,
+        memories=memories,
+        summary=turn.summary,
+    )
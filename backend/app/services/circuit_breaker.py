@@ -1,36 +1,109 @@
+import asyncio
 import logging
+from typing import Optional
 
 from openai import AuthenticationError, BadRequestError, RateLimitError
-from pybreaker import CircuitBreaker, CircuitBreakerListener
+from pybreaker import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    CircuitBreakerError,
+    CircuitBreakerListener,
+)
+
+from app.core.metrics import LLM_CIRCUIT_BREAKER_FAILURES, LLM_CIRCUIT_BREAKER_STATE
 
 logger = logging.getLogger(__name__)
 
+BREAKER_STATE_VALUES = {STATE_CLOSED: 0, STATE_HALF_OPEN: 1, STATE_OPEN: 2}
+
 
 class LLMCircuitBreakerListener(CircuitBreakerListener):
     def state_change(self, cb, old_state, new_state):
-        if new_state.name == "open":
-            logger.warning(
-                f"Circuit breaker opened for LLM service (was {old_state.name})"
-            )
-        elif new_state.name == "half_open":
-            logger.info(
-                f"Circuit breaker half-open for LLM service (was {old_state.name})"
-            )
-        elif new_state.name == "closed":
-            logger.info(
-                f"Circuit breaker closed for LLM service (was {old_state.name})"
-            )
+        LLM_CIRCUIT_BREAKER_STATE.labels(breaker=cb.name).set(
+            BREAKER_STATE_VALUES[new_state.name]
+        )
+        if new_state.name == STATE_OPEN:
+            logger.warning(f"Circuit breaker {cb.name} opened (was {old_state.name})")
+        elif new_state.name == STATE_HALF_OPEN:
+            logger.info(f"Circuit breaker {cb.name} half-open (was {old_state.name})")
+        elif new_state.name == STATE_CLOSED:
+            logger.info(f"Circuit breaker {cb.name} closed (was {old_state.name})")
 
     def failure(self, cb, exc):
+        LLM_CIRCUIT_BREAKER_FAILURES.labels(breaker=cb.name).inc()
         logger.debug(f"Circuit breaker recorded failure: {exc}")
 
     def success(self, cb):
         logger.debug(f"Circuit breaker recorded success")
 
 
-llm_circuit_breaker = CircuitBreaker(
-    fail_max=3,
-    reset_timeout=60,
-    exclude=[RateLimitError, BadRequestError, AuthenticationError],
-    listeners=[LLMCircuitBreakerListener()],
-)
+def create_circuit_breaker(name: str) -> CircuitBreaker:
+    """Breaker with the policy shared by every upstream model API"""
+    breaker = CircuitBreaker(
+        name=name,
+        fail_max=3,
+        reset_timeout=60,
+        exclude=[RateLimitError, BadRequestError, AuthenticationError],
+        listeners=[LLMCircuitBreakerListener()],
+    )
+    LLM_CIRCUIT_BREAKER_STATE.labels(breaker=name).set(
+        BREAKER_STATE_VALUES[breaker.current_state]
+    )
+    return breaker
+
+
+def _probe():
+    yield
+
+
+class BreakerCall:
+    """One call through `breaker` whose outcome is reported when it ends,
+    possibly much later and from another task, as for a stream.
+
+    Creating it raises CircuitBreakerError while the breaker is open, or
+    lets the call through as the half-open trial, like `breaker.calling()`.
+    `finish` reports success or failure as `calling()` would, except that a
+    cancelled call reports nothing: the losing half of a hedged request says
+    nothing about its backend. pybreaker has no neutral way out of a call;
+    closing `calling()` counts a failure and an excluded exception counts a
+    success, which resets the failure count and closes a half-open breaker.
+    Hence the breaker state internals used here; pybreaker is pinned for
+    them and tests/test_circuit_breaker.py checks they still behave.
+    """
+
+    def __init__(self, breaker: CircuitBreaker):
+        self.breaker = breaker
+        with breaker._lock:
+            # Once the reset timeout has passed, the open state half-opens
+            # and calls `_probe` through the breaker; a generator function is
+            # only created by that, so no outcome is recorded for it
+            breaker.state.before_call(_probe)
+            self._state = breaker.state
+        self._finished = False
+
+    def finish(self, error: Optional[BaseException] = None) -> Optional[BaseException]:
+        """Report how the call ended; returns the error to surface, which
+        is CircuitBreakerError if this failure tripped the breaker"""
+        if self._finished or isinstance(error, asyncio.CancelledError):
+            self._finished = True
+            return error
+        self._finished = True
+        with self.breaker._lock:
+            try:
+                if error is None:
+                    self._state._handle_success()
+                else:
+                    self._state._handle_error(error, reraise=False)
+            except CircuitBreakerError as tripped:
+                return tripped
+            except BaseException as e:
+                # Tripping the breaker re-raises the failure itself
+                if e is not error:
+                    raise
+        return error
+
+
+llm_circuit_breaker = create_circuit_breaker("llm")
+embedding_circuit_breaker = create_circuit_breaker("embedding")
@@ -0,0 +1,116 @@
+from typing import Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage
+
+from app.core.config import settings
+from app.core.prompts import MEMORY_CONTEXT_PROMPT, SUMMARY_CONTEXT_PROMPT
+from app.core.tokens import count_tokens
+
+# Chat-format framing each message costs on top of its content (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def message_tokens(content: str, token_count: Optional[int] = None) -> int:
+    if token_count is None:
+        token_count = count_tokens(content)
+    return token_count + MESSAGE_OVERHEAD_TOKENS
+
+
+def get_prompt_budget() -> int:
+    """Input tokens a request may use: the configured budget, capped so the
+    completion still fits in the model window"""
+    return min(
+        settings.llm_context_budget,
+        settings.llm_context_window - settings.llm_max_tokens,
+    )
+
+
+def estimate_request_tokens(
+    user_message: str,
+    message_history: Optional[list[dict]] = None,
+    system_prompt: str = "",
+    summary: Optional[str] = None,
+    memory_tokens: int = 0,
+) -> int:
+    """Upper estimate of the tokens one request costs against a provider's
+    token limit: the prompt `build_context` would assemble at most, plus
+    the completion allowance.
+
+    History entries only need their `token_count`. `memory_tokens` reserves
+    room for memories that are not retrieved yet.
+    """
+    prompt = message_tokens(system_prompt) + message_tokens(user_message)
+    if summary:
+        prompt += count_tokens(summary)
+    prompt += min(memory_tokens, settings.llm_memory_budget)
+    for msg in message_history or []:
+        prompt += message_tokens(msg.get("content", ""), msg.get("token_count"))
+    return min(prompt, get_prompt_budget()) + settings.llm_max_tokens
+
+
+def pack_memories(memories: list[dict], budget: int) -> tuple[str, int]:
+    """Render the best memories that fit `budget` as a system prompt section,
+    returning it with its token cost"""
+    lines, used = [], 0
+    for memory in memories:
+        line = f"- {memory['role']}: {memory['content']}"
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        lines.append(line)
+        used += cost
+    if not lines:
+        return "", 0
+    section = "\n\n" + MEMORY_CONTEXT_PROMPT + "\n" + "\n".join(lines)
+    return section, used + count_tokens(MEMORY_CONTEXT_PROMPT) + 2
+
+
+def build_context(
+    user_message: str,
+    message_history: Optional[list[dict]] = None,
+    system_prompt: str = "",
+    budget: Optional[int] = None,
+    memories: Optional[list[dict]] = None,
+    summary: Optional[str] = None,
+) -> list[BaseMessage]:
+    """Assemble the prompt, keeping the newest history that fits the budget.
+
+    A rolling `summary` of the older conversation is always included in the
+    system prompt. Retrieved `memories` (best first) are added to the system prompt first,
+    capped at `llm_memory_budget` tokens. History is then packed from the
+    most recent message backwards and stops at the first message that does
+    not fit, so the model always sees a contiguous tail of the conversation.
+    """
+    if budget is None:
+        budget = get_prompt_budget()
+
+    if summary:
+        system_prompt += f"\n\n{SUMMARY_CONTEXT_PROMPT}\n{summary}"
+    remaining = budget - message_tokens(system_prompt) - message_tokens(user_message)
+
+    if memories:
+        section, cost = pack_memories(
+            memories, min(settings.llm_memory_budget, remaining)
+        )
+        system_prompt += section
+        remaining -= cost
+
+    packed = []
+    for msg in reversed(message_history or []):
+        if msg["role"] not in ("user", "assistant"):
+            continue
+        cost = message_tokens(msg["content"], msg.get("token_count"))
+        if cost > remaining:
+            break
+        remaining -= cost
+        packed.append(msg)
+
+    messages = [SystemMessage(content=system_prompt)]
+    for msg in reversed(packed):
+        if msg["role"] == "user":
+            messages.append(HumanMessage(content=msg["content"]))
+        else:
+            messages.append(AIMessage(content=msg["content"]))
+    messages.append(HumanMessage(content=user_message))
+
+    return messages
@@ -0,0 +1,145 @@
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.metrics import EMBEDDING_CACHE_LOOKUPS
+from app.crud import embedding_cache as embedding_cache_crud
+from app.services.response_cache import normalize
+from app.services.vector_codec import VectorEncoding, decode_vector, encode_vector
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(namespace: str, normalized: str) -> str:
+    return hashlib.sha256(f"{namespace}\0{normalized}".encode()).hexdigest()
+
+
+class CachedEmbeddings(Embeddings):
+    """Content-addressed cache in front of an embedding model.
+
+    Texts are keyed by the SHA-256 of the namespace (model and dimensions)
+    and the whitespace-normalized text, which is also what gets embedded, so
+    equal keys always mean equal model input. Lookups go through an
+    in-process LRU of `max_entries` vectors, then the `embedding_cache`
+    table, where vectors are stored as `encoding` bytes, and only the
+    remaining texts reach the model, in a single call per batch. Database
+    errors degrade to a miss. The retention run deletes table entries older
+    than `retention_embedding_cache_days`.
+    The synchronous methods use the LRU tier only.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        namespace: str,
+        max_entries: int = 4096,
+        encoding: VectorEncoding = "float16",
+        session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
+    ):
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.encoding = encoding
+        self.session_factory = session_factory
+        self._lru: OrderedDict[str, np.ndarray] = OrderedDict()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        texts = [normalize(text) for text in texts]
+        keys = [content_hash(self.namespace, text) for text in texts]
+        found = self._from_lru(keys)
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing, vectors)
+            }
+            found.update(computed)
+            self._remember(computed)
+        return [found[key].tolist() for key in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        texts = [normalize(text) for text in texts]
+        keys = [content_hash(self.namespace, text) for text in texts]
+        found = self._from_lru(keys)
+        EMBEDDING_CACHE_LOOKUPS.labels(tier="memory").inc(len(found))
+
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing and self.session_factory is not None:
+            stored = await self._load(list(missing))
+            EMBEDDING_CACHE_LOOKUPS.labels(tier="database").inc(len(stored))
+            found.update(stored)
+            self._remember(stored)
+            for key in stored:
+                del missing[key]
+
+        if missing:
+            EMBEDDING_CACHE_LOOKUPS.labels(tier="miss").inc(len(missing))
+            vectors = await self.embeddings.aembed_documents(list(missing.values()))
+            computed = {
+                key: np.asarray(vector, dtype=np.float32)
+                for key, vector in zip(missing, vectors)
+            }
+            found.update(computed)
+            self._remember(computed)
+            if self.session_factory is not None:
+                await self._save(computed)
+
+        return [found[key].tolist() for key in keys]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    def _from_lru(self, keys: list[str]) -> dict[str, np.ndarray]:
+        # Hits are collected before misses are added, which may evict them
+        found = {}
+        for key in keys:
+            if key in self._lru:
+                self._lru.move_to_end(key)
+                found[key] = self._lru[key]
+        return found
+
+    def _remember(self, vectors: dict) -> None:
+        for key, vector in vectors.items():
+            self._lru[key] = np.asarray(vector, dtype=np.float32)
+            self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    async def _load(self, keys: list[str]) -> dict[str, np.ndarray]:
+        try:
+            async with self.session_factory() as db:
+                entries = await embedding_cache_crud.get_cached_embeddings(db, keys)
+        except Exception as e:
+            logger.warning(f"Embedding cache read failed: {e}")
+            return {}
+        return {
+            entry.content_hash: decode_vector(entry.vector, entry.encoding, entry.scale)
+            for entry in entries
+        }
+
+    async def _save(self, vectors: dict[str, np.ndarray]) -> None:
+        entries = []
+        for key, vector in vectors.items():
+            data, scale = encode_vector(vector, self.encoding)
+            entries.append(
+                {
+                    "content_hash": key,
+                    "encoding": self.encoding,
+                    "scale": scale,
+                    "vector": data,
+                }
+            )
+        try:
+            async with self.session_factory() as db:
+                await embedding_cache_crud.put_cached_embeddings(db, entries)
+        except Exception as e:
+            logger.warning(f"Embedding cache write failed: {e}")
@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import time
+from datetime import timedelta
+from typing import Callable, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from openai import APIConnectionError, RateLimitError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from tenacity import (
+    RetryCallState,
+    before_sleep_log,
+    retry,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_exponential,
+)
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_DEAD_LETTERS,
+    EMBEDDING_QUEUE_DEPTH,
+    EMBEDDING_RETRIES,
+    EMBEDDING_SECONDS,
+    MESSAGES_EMBEDDED,
+)
+from app.crud import embedding_dead_letter as dead_letter_crud
+from app.services.background import BackgroundTask, PeriodicTask
+from app.services.circuit_breaker import embedding_circuit_breaker
+from app.services.embeddings import get_embeddings
+from app.services.memory_store.base import MemoryRecord, MemoryStore
+from app.services.memory_store.factory import get_memory_store
+
+logger = logging.getLogger(__name__)
+
+_log_retry = before_sleep_log(logger, logging.WARNING)
+
+
+def log_and_count_retry(retry_state: RetryCallState) -> None:
+    _log_retry(retry_state)
+    EMBEDDING_RETRIES.labels(error=type(retry_state.outcome.exception()).__name__).inc()
+
+
+embedding_retry = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=4),
+    retry=retry_if_exception_type((APIConnectionError, RateLimitError)),
+    before_sleep=log_and_count_retry,
+    reraise=True,
+)
+
+
+class EmbeddingWorker:
+    """Embeds persisted messages in the background and upserts them into the
+    memory store.
+
+    `submit` never blocks: messages are queued and a single worker groups
+    them into batches of at most `batch_size` messages and `max_batch_tokens`
+    tokens, waiting up to `flush_interval` seconds for a batch to fill, then
+    makes one embedding call per batch. Calls go through their own retry
+    policy and the embedding circuit breaker; batches that still fail, and
+    messages that arrive while the queue is full, go to the dead-letter table.
+    Every `replay_interval` seconds, while the embedding breaker is not open,
+    dead letters are moved back onto the queue as far as it has room. A dead
+    letter is deleted only once its message is in the store, and one that
+    failed `max_replay_attempts` times stays parked instead of being replayed.
+
+    Index inserts run in a worker thread under the store lock, so a slow
+    insert (an HNSW graph walk) does not stall the event loop.
+    """
+
+    def __init__(
+        self,
+        embeddings_factory: Callable[[], Embeddings] = get_embeddings,
+        store_factory: Callable[[], MemoryStore] = get_memory_store,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        max_size: int = 10000,
+        batch_size: int = 64,
+        max_batch_tokens: int = 8000,
+        flush_interval: float = 0.5,
+        replay_interval: float = 300.0,
+        replay_batch_size: int = 1000,
+        max_replay_attempts: int = 5,
+        enabled: bool = True,
+    ):
+        self.embeddings_factory = embeddings_factory
+        self.store_factory = store_factory
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.flush_interval = flush_interval
+        self.replay_interval = replay_interval
+        self.replay_batch_size = replay_batch_size
+        self.max_replay_attempts = max_replay_attempts
+        self.enabled = enabled
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker = BackgroundTask(self._run)
+        self._replayer = PeriodicTask(
+            self._replay_once, replay_interval, "Dead letter replay"
+        )
+        self._carry: Optional[dict] = None
+        self._background: set[asyncio.Task] = set()
+
+    def start(self) -> None:
+        if not self.enabled or self._worker.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._carry = None
+        self._worker.start()
+        if self.replay_interval > 0:
+            self._replayer.start()
+
+    async def stop(self) -> None:
+        """Embed everything still queued, then stop the worker"""
+        await self._replayer.stop()
+        if self._worker.running:
+            await self.flush()
+        await self._worker.stop()
+        if self._background:
+            await asyncio.gather(*self._background, return_exceptions=True)
+
+    async def flush(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+
+    def submit(self, messages: list[dict]) -> None:
+        """Queue persisted messages (dicts with the message columns)"""
+        if not self.enabled or not messages:
+            return
+        self.start()
+        overflow = []
+        for values in messages:
+            try:
+                self._queue.put_nowait(values)
+            except asyncio.QueueFull:
+                overflow.append(values)
+        EMBEDDING_QUEUE_DEPTH.set(self._queue.qsize())
+        if overflow:
+            logger.warning(
+                f"Embedding queue is full, dead-lettering {len(overflow)} messages"
+            )
+            self._spawn(self._dead_letter(overflow, "embedding queue full"))
+
+    async def replay_dead_letters(self, limit: int = 1000) -> int:
+        """Move up to `limit` dead-lettered messages back onto the queue"""
+        async with self.session_factory() as db:
+            messages = await dead_letter_crud.claim_dead_letters(
+                db,
+                limit=limit,
+                max_attempts=self.max_replay_attempts,
+                # A claim outlives one replay period before it is retried
+                lease=timedelta(seconds=self.replay_interval),
+            )
+        for values in messages:
+            values["dead_lettered"] = True
+        self.submit(messages)
+        return len(messages)
+
+    async def _replay_once(self) -> None:
+        # Replaying into an open breaker would only dead-letter them again
+        if embedding_circuit_breaker.current_state == "open":
+            return
+        room = self.max_size - self._queue.qsize()
+        if room <= 0:
+            return
+        replayed = await self.replay_dead_letters(
+            limit=min(room, self.replay_batch_size)
+        )
+        if replayed:
+            logger.info(f"Replaying {replayed} dead-lettered messages")
+
+    def _spawn(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    async def _next_batch(self) -> list[dict]:
+        if self._carry is not None:
+            batch, self._carry = [self._carry], None
+        else:
+            batch = [await self._queue.get()]
+        tokens = batch[0].get("token_count") or 0
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            if self._queue.empty():
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    values = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                values = self._queue.get_nowait()
+
+            value_tokens = values.get("token_count") or 0
+            if tokens + value_tokens > self.max_batch_tokens:
+                # Starts the next batch; task_done is called once it is embedded
+                self._carry = values
+                break
+            batch.append(values)
+            tokens += value_tokens
+
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            EMBEDDING_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                await self._process(batch)
+            except Exception as e:
+                logger.error(f"Embedding batch failed: {e}", exc_info=True)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    @embedding_retry
+    async def _embed(self, texts: list[str]) -> list[list[float]]:
+        return await self.embeddings_factory().aembed_documents(texts)
+
+    async def _process(self, batch: list[dict]) -> None:
+        start = time.perf_counter()
+        try:
+            with embedding_circuit_breaker.calling():
+                vectors = await self._embed([values["content"] for values in batch])
+        except Exception as e:
+            logger.warning(f"Embedding {len(batch)} messages failed: {e}")
+            await self._dead_letter(batch, f"{type(e).__name__}: {e}")
+            return
+        EMBEDDING_SECONDS.observe(time.perf_counter() - start)
+        EMBEDDING_BATCH_SIZE.observe(len(batch))
+
+        records = [
+            MemoryRecord(
+                id=values["id"],
+                session_id=values["session_id"],
+                role=values["role"],
+                content=values["content"],
+                created_at=values["created_at"],
+            )
+            for values in batch
+        ]
+        store = self.store_factory()
+
+        def add():
+            with store.lock:
+                store.add(records, np.asarray(vectors, dtype=np.float32))
+
+        await asyncio.to_thread(add)
+        MESSAGES_EMBEDDED.inc(len(batch))
+
+        replayed = [values["id"] for values in batch if values.get("dead_lettered")]
+        if replayed:
+            async with self.session_factory() as db:
+                await dead_letter_crud.resolve_dead_letters(db, replayed)
+
+    async def _dead_letter(self, messages: list[dict], error: str) -> None:
+        EMBEDDING_DEAD_LETTERS.inc(len(messages))
+        try:
+            async with self.session_factory() as db:
+                await dead_letter_crud.record_dead_letters(db, messages, error)
+        except Exception as e:
+            logger.error(
+                f"Could not dead-letter {len(messages)} messages: {e}", exc_info=True
+            )
+
+
+embedding_worker = EmbeddingWorker(
+    max_size=settings.embedding_queue_size,
+    batch_size=settings.embedding_batch_size,
+    max_batch_tokens=settings.embedding_batch_max_tokens,
+    flush_interval=settings.embedding_flush_interval,
+    replay_interval=settings.embedding_replay_interval,
+    replay_batch_size=settings.embedding_replay_batch_size,
+    max_replay_attempts=settings.embedding_replay_max_attempts,
+    enabled=settings.memory_enabled,
+)
@@ -0,0 +1,78 @@
+import hashlib
+import re
+from functools import lru_cache
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_openai import OpenAIEmbeddings
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.services.embedding_cache import CachedEmbeddings
+
+_WORD_RE = re.compile(r"\w+")
+
+
+class HashingEmbeddings(Embeddings):
+    """Deterministic, offline embeddings for tests and MOCK_LLM runs.
+
+    Words and character trigrams are hashed into a fixed number of buckets
+    and the result is L2-normalized, so texts sharing vocabulary land close
+    together without calling any model.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def _features(self, text: str) -> list[str]:
+        words = _WORD_RE.findall(text.lower())
+        trigrams = [w[i : i + 3] for w in words for i in range(max(len(w) - 2, 1))]
+        return words + trigrams
+
+    def embed(self, text: str) -> list[float]:
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        for feature in self._features(text):
+            digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest, "little")
+            sign = 1.0 if bucket & 1 else -1.0
+            vector[(bucket >> 1) % self.dimensions] += sign
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector.tolist()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed(text)
+
+
+def create_embedding_model() -> Embeddings:
+    if settings.mock_llm:
+        return HashingEmbeddings(dimensions=settings.embedding_dimensions)
+
+    kwargs = {
+        "model": settings.embedding_model,
+        "api_key": settings.openai_api_key,
+        "dimensions": settings.embedding_dimensions,
+    }
+    if settings.openai_api_base:
+        kwargs["base_url"] = settings.openai_api_base
+    return OpenAIEmbeddings(**kwargs)
+
+
+@lru_cache(maxsize=1)
+def get_embeddings() -> Embeddings:
+    embeddings = create_embedding_model()
+    if not settings.embedding_cache_enabled:
+        return embeddings
+
+    model = "hashing" if settings.mock_llm else settings.embedding_model
+    return CachedEmbeddings(
+        embeddings,
+        namespace=f"{model}:{settings.embedding_dimensions}",
+        max_entries=settings.embedding_cache_size,
+        encoding=settings.embedding_cache_encoding,
+        session_factory=AsyncSessionLocal,
+    )
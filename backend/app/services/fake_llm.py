@@ -0,0 +1,187 @@
+import asyncio
+import math
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, Literal, Optional
+
+import httpx
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForLLMRun,
+    CallbackManagerForLLMRun,
+)
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from openai import APIConnectionError, APITimeoutError, RateLimitError
+from pydantic import Field, PrivateAttr
+
+MOCK_RESPONSES = [
+    "I understand your question. Based on my knowledge, here's what I can tell you about that topic.",
+    "That's an interesting question! Let me break it down for you.",
+    "Thanks for asking! Here's my perspective on this matter.",
+    "Great question! The answer depends on several variables.",
+    "I'd be happy to help with that. Here are the main points.",
+]
+
+_FAKE_REQUEST = httpx.Request("POST", "http://mock-llm/v1/chat/completions")
+# One streamed token: a word with its leading and one trailing space
+_TOKEN = re.compile(r"\s*\S+\s?")
+
+
+class FakeChatModel(BaseChatModel):
+    """In-process stand-in for an OpenAI chat model.
+
+    Latency before the first token follows `latency_distribution`:
+    "fixed" waits `latency_median`, "uniform" draws from
+    median +/- `latency_spread` and "lognormal" uses `latency_spread` as sigma
+    around the median, giving the long tail real providers have. Tokens are
+    then produced at `tokens_per_second`. Failures are injected as the same
+    openai exceptions ChatOpenAI raises, so retry and circuit breaker paths
+    behave as they do against the real API. With `stream_drop_rate`, a
+    stream may break off with a connection error after its first token.
+
+    A conversation ending in an assistant message is treated as a prefix to
+    continue: when it starts one of the responses, only the rest is sent.
+    """
+
+    model_name: str = "mock"
+    temperature: float = 0.0
+    responses: list[str] = Field(default_factory=lambda: list(MOCK_RESPONSES))
+    latency_distribution: Literal["fixed", "uniform", "lognormal"] = "uniform"
+    latency_median: float = 0.5
+    latency_spread: float = 0.3
+    tokens_per_second: float = 50.0
+    rate_limit_rate: float = 0.0
+    timeout_rate: float = 0.0
+    connection_error_rate: float = 0.0
+    stream_drop_rate: float = 0.0
+    seed: Optional[int] = None
+
+    _rng: random.Random = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "memocha-fake"
+
+    def sample_latency(self) -> float:
+        if self.latency_distribution == "fixed":
+            latency = self.latency_median
+        elif self.latency_distribution == "uniform":
+            latency = self._rng.uniform(
+                self.latency_median - self.latency_spread,
+                self.latency_median + self.latency_spread,
+            )
+        else:
+            latency = self.latency_median * math.exp(
+                self._rng.gauss(0, self.latency_spread)
+            )
+        return max(latency, 0.0)
+
+    def maybe_fail(self) -> None:
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            raise RateLimitError(
+                "Rate limit reached (injected)",
+                response=httpx.Response(429, request=_FAKE_REQUEST),
+                body=None,
+            )
+        roll -= self.rate_limit_rate
+        if roll < self.timeout_rate:
+            raise APITimeoutError(request=_FAKE_REQUEST)
+        roll -= self.timeout_rate
+        if roll < self.connection_error_rate:
+            raise APIConnectionError(
+                message="Connection error (injected)", request=_FAKE_REQUEST
+            )
+
+    def _tokens(self, messages: list[BaseMessage]) -> list[str]:
+        if messages and isinstance(messages[-1], AIMessage):
+            prefix = messages[-1].content
+            for response in self.responses:
+                text = " ".join(response.split())
+                if text.startswith(prefix):
+                    return _TOKEN.findall(text[len(prefix) :])
+        return _TOKEN.findall(" ".join(self._rng.choice(self.responses).split()))
+
+    def _drop_after(self, tokens: list[str]) -> Optional[int]:
+        """How many tokens a stream sends before it drops, if it does"""
+        if len(tokens) > 1 and self._rng.random() < self.stream_drop_rate:
+            return self._rng.randrange(1, len(tokens))
+        return None
+
+    def _dropped(self) -> APIConnectionError:
+        return APIConnectionError(
+            message="Stream dropped (injected)", request=_FAKE_REQUEST
+        )
+
+    def _token_delay(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.maybe_fail()
+        tokens = self._tokens(messages)
+        time.sleep(self.sample_latency() + len(tokens) * self._token_delay())
+        message = AIMessage(content="".join(tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        self.maybe_fail()
+        tokens = self._tokens(messages)
+        await asyncio.sleep(self.sample_latency() + len(tokens) * self._token_delay())
+        message = AIMessage(content="".join(tokens))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        self.maybe_fail()
+        time.sleep(self.sample_latency())
+        tokens = self._tokens(messages)
+        drop_after = self._drop_after(tokens)
+        for i, token in enumerate(tokens):
+            if i == drop_after:
+                raise self._dropped()
+            if i:
+                time.sleep(self._token_delay())
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        self.maybe_fail()
+        await asyncio.sleep(self.sample_latency())
+        tokens = self._tokens(messages)
+        drop_after = self._drop_after(tokens)
+        for i, token in enumerate(tokens):
+            if i == drop_after:
+                raise self._dropped()
+            if i:
+                await asyncio.sleep(self._token_delay())
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
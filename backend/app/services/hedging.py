@@ -0,0 +1,57 @@
+from collections import deque
+
+import numpy as np
+
+
+class HedgePolicy:
+    """When to send a duplicate of a slow LLM call, and how many to allow.
+
+    The hedge delay is the `percentile` of the last `window` call latencies,
+    clamped to [`min_delay`, `max_delay`]; until `min_samples` calls were
+    seen it is `max_delay`. So only calls already slower than nearly all
+    recent ones get a duplicate, and most of the tail is cut for a few
+    percent extra requests.
+
+    Hedges spend from a token bucket that every call refills by `budget`,
+    holding at most `burst` tokens: over time at most a `budget` fraction
+    of calls is duplicated, however slow the backends get.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+        max_delay: float = 2.0,
+        budget: float = 0.1,
+        burst: float = 10.0,
+        window: int = 1000,
+        min_samples: int = 50,
+    ):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.budget = budget
+        self.burst = burst
+        self.min_samples = min_samples
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._tokens = burst
+
+    def delay(self) -> float:
+        if len(self._latencies) < self.min_samples:
+            return self.max_delay
+        delay = float(np.quantile(self._latencies, self.percentile))
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    def observe(self, seconds: float) -> None:
+        self._latencies.append(seconds)
+
+    def credit(self) -> None:
+        """Refill the budget for one call"""
+        self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def try_spend(self) -> bool:
+        """Take one hedge from the budget, if there is one left"""
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Hashable, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.metrics import RETRIEVAL_RESULTS
+from app.crud import message as message_crud
+from app.services.memory_store.base import MemoryStore
+
+logger = logging.getLogger(__name__)
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[Hashable]], k: int = 60
+) -> list[tuple[Hashable, float]]:
+    """Fuse ranked id lists, scoring each id by the sum of 1 / (k + rank).
+
+    Only ranks are used, so retrievers with incomparable scores (cosine
+    similarity, text rank) combine without calibration. Best first.
+    """
+    scores: dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking, start=1):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+async def vector_search(
+    embeddings: Embeddings,
+    store: MemoryStore,
+    query: str,
+    limit: int,
+    session_id: Optional[UUID] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    min_score: float = 0.0,
+) -> list[dict]:
+    vector = await embeddings.aembed_query(query)
+
+    def search():
+        with store.lock:
+            return store.search(
+                np.asarray(vector, dtype=np.float32),
+                k=limit,
+                session_id=session_id,
+                created_after=created_after,
+                created_before=created_before,
+            )
+
+    # Off the loop: an HNSW walk is pure Python, and the store lock may be
+    # held by an insert or a compaction
+    results = await asyncio.to_thread(search)
+    return [
+        {
+            "id": result.record.id,
+            "role": result.record.role,
+            "content": result.record.content,
+        }
+        for result in results
+        if result.score >= min_score
+    ]
+
+
+async def lexical_search(
+    session_factory: async_sessionmaker[AsyncSession],
+    query: str,
+    limit: int,
+    session_id: Optional[UUID] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> list[dict]:
+    async with session_factory() as db:
+        rows = await message_crud.search_messages(
+            db,
+            query,
+            session_id=session_id,
+            limit=limit,
+            created_after=created_after,
+            created_before=created_before,
+        )
+    return [{"id": row.id, "role": row.role, "content": row.content} for row in rows]
+
+
+async def hybrid_search(
+    query: str,
+    k: int,
+    embeddings: Embeddings,
+    store: MemoryStore,
+    session_factory: Optional[async_sessionmaker[AsyncSession]] = None,
+    session_id: Optional[UUID] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    candidates: int = 20,
+    rrf_k: int = 60,
+    min_vector_score: float = 0.0,
+) -> list[dict]:
+    """Top `k` memories for `query` from vector and full-text search.
+
+    Both retrievers fetch `candidates` hits under the same session and time
+    filters, concurrently, and the lists are merged with reciprocal rank
+    fusion; each result's `score` is its fused score. Vector hits below
+    `min_vector_score` are dropped before fusion. Without a
+    `session_factory` only vector search runs. If one retriever fails the
+    other's results are used alone; if both fail the first error is raised.
+    """
+    filters = {
+        "session_id": session_id,
+        "created_after": created_after,
+        "created_before": created_before,
+    }
+    retrievers = {
+        "vector": vector_search(
+            embeddings,
+            store,
+            query,
+            candidates,
+            min_score=min_vector_score,
+            **filters,
+        )
+    }
+    if session_factory is not None:
+        retrievers["lexical"] = lexical_search(
+            session_factory, query, candidates, **filters
+        )
+
+    outcomes = await asyncio.gather(*retrievers.values(), return_exceptions=True)
+    rankings, errors = [], []
+    hits: dict[Hashable, dict] = {}
+    for name, outcome in zip(retrievers, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.warning(f"{name} retrieval failed: {outcome!r}")
+            errors.append(outcome)
+            continue
+        RETRIEVAL_RESULTS.labels(retriever=name).observe(len(outcome))
+        rankings.append([hit["id"] for hit in outcome])
+        for hit in outcome:
+            hits.setdefault(hit["id"], hit)
+    if errors and not rankings:
+        raise errors[0]
+
+    return [
+        {**hits[key], "score": score}
+        for key, score in reciprocal_rank_fusion(rankings, k=rrf_k)[:k]
+    ]
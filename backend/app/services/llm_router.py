@@ -0,0 +1,312 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Literal,
+    Optional,
+    TypeVar,
+)
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from openai import BadRequestError
+from pybreaker import STATE_OPEN, CircuitBreaker, CircuitBreakerError
+
+from app.core.metrics import (
+    LLM_BACKEND_IN_FLIGHT,
+    LLM_BACKEND_LATENCY,
+    LLM_BACKEND_REQUESTS,
+    LLM_HEDGES,
+)
+from app.services.circuit_breaker import BreakerCall
+from app.services.hedging import HedgePolicy
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+@dataclass(eq=False)
+class LLMBackend:
+    name: str
+    llm: BaseChatModel
+    breaker: CircuitBreaker
+    weight: float = 1.0
+    # Continues a trailing assistant message, so a dropped stream can resume
+    supports_prefill: bool = False
+    in_flight: int = 0
+    # Moving average seconds per operation: a full response for "invoke",
+    # the first chunk for "stream"
+    latency: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def available(self) -> bool:
+        return self.breaker.current_state != STATE_OPEN
+
+
+class TrackedStream:
+    """Wraps a backend's chunk stream so it counts as in flight on that
+    backend until it ends, and so the backend's breaker call lasts as long
+    as the stream: running to completion counts as a success, breaking off
+    midway as a failure. A stream the caller closes early counts as a
+    success, as everything it delivered arrived, and one cancelled while
+    waiting for a chunk counts as neither."""
+
+    def __init__(
+        self,
+        router: "LLMRouter",
+        backend: LLMBackend,
+        stream: AsyncIterator,
+        breaker_call: BreakerCall,
+    ):
+        self.router = router
+        self.backend = backend
+        self.stream = stream
+        self._breaker_call: Optional[BreakerCall] = breaker_call
+        router._acquire(backend)
+
+    def __aiter__(self) -> "TrackedStream":
+        return self
+
+    async def __anext__(self):
+        try:
+            return await anext(self.stream)
+        except StopAsyncIteration:
+            self._finish(None)
+            raise
+        except BaseException as e:
+            self._finish(e)
+            raise
+
+    async def aclose(self) -> None:
+        self._finish(None)
+        await self.stream.aclose()
+
+    def _finish(self, error: Optional[BaseException]) -> None:
+        breaker_call, self._breaker_call = self._breaker_call, None
+        if breaker_call is None:
+            return
+        self.router._release(self.backend)
+        breaker_call.finish(error)
+
+
+class LLMRouter:
+    """Spreads LLM calls over several backends and falls back between them.
+
+    Every call tries the backends in the order the policy ranks them. A
+    backend that fails, or whose circuit breaker is open, hands the call to
+    the next one; only a BadRequestError, which any backend would reject
+    alike, ends it early. When every backend fails, the last real error is
+    raised, or CircuitBreakerError when all of them were open.
+
+    Policies:
+
+    - "least_latency": lowest moving-average latency scaled by the calls
+      already in flight, so a fast backend stops taking everything once it
+      queues up. Backends not measured yet go first.
+    - "weighted": a random order drawn in proportion to `weight`.
+
+    Open backends are ranked last rather than skipped, so that once their
+    reset timeout passes a call can still reach them half-open.
+    """
+
+    def __init__(
+        self,
+        backends: list[LLMBackend],
+        policy: Literal["least_latency", "weighted"] = "least_latency",
+        alpha: float = 0.2,
+        rng: Optional[random.Random] = None,
+    ):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = backends
+        self.policy = policy
+        self.alpha = alpha
+        self.rng = rng or random.Random()
+
+    @property
+    def primary(self) -> LLMBackend:
+        return self.backends[0]
+
+    @property
+    def supports_prefill(self) -> bool:
+        return any(backend.supports_prefill for backend in self.backends)
+
+    def rank(self, operation: str) -> list[LLMBackend]:
+        """Backends in the order a call should try them"""
+        if self.policy == "weighted":
+            # Sorting by u ** (1 / weight) samples an order without
+            # replacement in proportion to the weights
+            keys = {
+                backend: (
+                    self.rng.random() ** (1 / backend.weight)
+                    if backend.weight > 0
+                    else 0.0
+                )
+                for backend in self.backends
+            }
+            ordered = sorted(self.backends, key=keys.get, reverse=True)
+        else:
+            ordered = sorted(
+                self.backends,
+                key=lambda backend: (
+                    backend.latency.get(operation, 0.0) * (backend.in_flight + 1),
+                    backend.in_flight,
+                ),
+            )
+        return sorted(ordered, key=lambda backend: not backend.available)
+
+    async def call(
+        self,
+        operation: str,
+        fn: Callable[[LLMBackend], Awaitable[T]],
+        avoid: Optional[LLMBackend] = None,
+    ) -> T:
+        """Run `fn` against backends in ranked order until one succeeds,
+        trying `avoid` last"""
+        return await self._call(operation, fn, avoid)
+
+    async def _call(
+        self,
+        operation: str,
+        fn: Callable[[LLMBackend], Awaitable[Any]],
+        avoid: Optional[LLMBackend] = None,
+        stream: bool = False,
+        prefill: bool = False,
+    ) -> Any:
+        error: Optional[Exception] = None
+        ranked = self.rank(operation)
+        if prefill:
+            ranked = [backend for backend in ranked if backend.supports_prefill]
+        if avoid in ranked and len(ranked) > 1:
+            ranked.remove(avoid)
+            ranked.append(avoid)
+        for backend in ranked:
+            start = time.perf_counter()
+            self._acquire(backend)
+            try:
+                breaker_call = BreakerCall(backend.breaker)
+                try:
+                    result = await fn(backend)
+                except BaseException as e:
+                    raise breaker_call.finish(e)
+                if not stream:
+                    breaker_call.finish()
+            except BadRequestError:
+                LLM_BACKEND_REQUESTS.labels(backend=backend.name, outcome="error").inc()
+                raise
+            except CircuitBreakerError as e:
+                LLM_BACKEND_REQUESTS.labels(backend=backend.name, outcome="open").inc()
+                if error is None or isinstance(error, CircuitBreakerError):
+                    error = e
+                continue
+            except Exception as e:
+                LLM_BACKEND_REQUESTS.labels(backend=backend.name, outcome="error").inc()
+                logger.warning(f"LLM backend {backend.name} failed: {e!r}")
+                error = e
+                continue
+            finally:
+                self._release(backend)
+
+            self._observe(backend, operation, time.perf_counter() - start)
+            LLM_BACKEND_REQUESTS.labels(backend=backend.name, outcome="success").inc()
+            if stream:
+                first, chunks = result
+                return first, TrackedStream(self, backend, chunks, breaker_call)
+            return result
+        raise error
+
+    async def open_stream(
+        self,
+        fn: Callable[[LLMBackend], Awaitable[tuple[Any, AsyncIterator]]],
+        avoid: Optional[LLMBackend] = None,
+        prefill: bool = False,
+    ) -> tuple[Any, TrackedStream]:
+        """`call` for a stream: `fn` opens it and returns its first chunk
+        with the rest. The backend's breaker call stays open until the
+        returned stream ends, so a stream that breaks off midway counts
+        against its backend. With `prefill`, only backends that support it
+        are tried"""
+        return await self._call("stream", fn, avoid, stream=True, prefill=prefill)
+
+    async def hedged_call(
+        self,
+        operation: str,
+        fn: Callable[[LLMBackend], Awaitable[T]],
+        hedging: HedgePolicy,
+    ) -> T:
+        """`call`, duplicated if it has not answered after the hedge delay.
+
+        The duplicate goes to another backend than the one the first
+        attempt is on, when there is one. The first success is returned and
+        the other attempt cancelled; if both fail, the first error is
+        raised.
+        """
+        started: list[LLMBackend] = []
+
+        async def attempt(backend: LLMBackend) -> T:
+            started.append(backend)
+            return await fn(backend)
+
+        hedging.credit()
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(self.call(operation, attempt))
+        attempts = {primary: "primary"}
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedging.delay())
+            if not done:
+                if hedging.try_spend():
+                    hedge = asyncio.ensure_future(
+                        self.call(
+                            operation, attempt, avoid=started[-1] if started else None
+                        )
+                    )
+                    attempts[hedge] = "hedge"
+                else:
+                    LLM_HEDGES.labels(outcome="over_budget").inc()
+
+            error: Optional[BaseException] = None
+            pending = set(attempts)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        hedging.observe(time.perf_counter() - start)
+                        if len(attempts) > 1:
+                            LLM_HEDGES.labels(outcome=attempts[task]).inc()
+                        return task.result()
+                    error = error or task.exception()
+            if len(attempts) > 1:
+                LLM_HEDGES.labels(outcome="failed").inc()
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+            await asyncio.gather(*attempts, return_exceptions=True)
+
+    def _observe(self, backend: LLMBackend, operation: str, seconds: float) -> None:
+        previous = backend.latency.get(operation)
+        latency = (
+            seconds
+            if previous is None
+            else self.alpha * seconds + (1 - self.alpha) * previous
+        )
+        backend.latency[operation] = latency
+        LLM_BACKEND_LATENCY.labels(backend=backend.name, operation=operation).set(
+            latency
+        )
+
+    def _acquire(self, backend: LLMBackend) -> None:
+        backend.in_flight += 1
+        LLM_BACKEND_IN_FLIGHT.labels(backend=backend.name).set(backend.in_flight)
+
+    def _release(self, backend: LLMBackend) -> None:
+        backend.in_flight -= 1
+        LLM_BACKEND_IN_FLIGHT.labels(backend=backend.name).set(backend.in_flight)
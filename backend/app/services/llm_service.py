@@ -1,7 +1,15 @@
 import logging
 from typing import AsyncIterator, Optional
 
-from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+import httpx
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    BaseMessage,
+    BaseMessageChunk,
+    HumanMessage,
+    SystemMessage,
+)
 from langchain_openai import ChatOpenAI
 from openai import (
     APIConnectionError,
@@ -13,6 +21,7 @@ from openai import (
 )
 from pybreaker import CircuitBreakerError
 from tenacity import (
+    RetryCallState,
     before_sleep_log,
     retry,
     retry_if_exception_type,
@@ -20,66 +29,303 @@ from tenacity import (
     wait_exponential,
 )
 
-from app.core.config import settings
+from app.core.config import LLMBackendSettings, settings
 from app.core.exceptions import (
     LLMConnectionError,
     LLMRateLimitError,
     LLMServiceError,
     LLMTimeoutError,
 )
+from app.core.metrics import LLM_RETRIES, LLM_STREAM_RESUMES
 from app.core.observability import get_langfuse_handler
 from app.core.prompts import BASE_SYSTEM_PROMPT
-from app.services.circuit_breaker import llm_circuit_breaker
+from app.services.circuit_breaker import create_circuit_breaker, llm_circuit_breaker
+from app.services.context_builder import build_context
+from app.services.embeddings import get_embeddings
+from app.services.fake_llm import FakeChatModel
+from app.services.hedging import HedgePolicy
+from app.services.llm_router import LLMBackend, LLMRouter
+from app.services.response_cache import ResponseCache, replay_chunks
 
 logger = logging.getLogger(__name__)
 
+_log_retry = before_sleep_log(logger, logging.WARNING)
+
+
+def log_and_count_retry(retry_state: RetryCallState) -> None:
+    _log_retry(retry_state)
+    LLM_RETRIES.labels(
+        operation=retry_state.fn.__name__,
+        error=type(retry_state.outcome.exception()).__name__,
+    ).inc()
+
+
+def create_openai_chat_model(
+    model_name: str,
+    api_key: str,
+    temperature: float = 0.7,
+    max_tokens: int = 1000,
+    timeout: int = 30,
+    base_url: str | None = None,
+) -> BaseChatModel:
+    kwargs = {
+        "model": model_name,
+        "api_key": api_key,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "timeout": timeout,
+    }
+    if base_url:
+        kwargs["base_url"] = base_url
+    return ChatOpenAI(**kwargs)
+
+
+def create_mock_chat_model(model_name: Optional[str] = None) -> BaseChatModel:
+    return FakeChatModel(
+        model_name=model_name or settings.llm_model,
+        temperature=settings.llm_temperature,
+        latency_distribution=settings.mock_llm_latency_distribution,
+        latency_median=settings.mock_llm_latency_median,
+        latency_spread=settings.mock_llm_latency_spread,
+        tokens_per_second=settings.mock_llm_tokens_per_second,
+        rate_limit_rate=settings.mock_llm_rate_limit_rate,
+        timeout_rate=settings.mock_llm_timeout_rate,
+        connection_error_rate=settings.mock_llm_connection_error_rate,
+        stream_drop_rate=settings.mock_llm_stream_drop_rate,
+        seed=settings.mock_llm_seed,
+    )
+
+
+def create_chat_model() -> BaseChatModel:
+    """Build the chat model backend selected by settings"""
+    if settings.mock_llm:
+        logger.info("MOCK_LLM is set, using the in-process fake LLM")
+        return create_mock_chat_model()
+    return create_openai_chat_model(
+        model_name=settings.llm_model,
+        api_key=settings.openai_api_key,
+        temperature=settings.llm_temperature,
+        max_tokens=settings.llm_max_tokens,
+        base_url=settings.openai_api_base,
+    )
+
+
+def create_backend_chat_model(backend: LLMBackendSettings) -> BaseChatModel:
+    if settings.mock_llm:
+        return create_mock_chat_model(backend.model)
+    return create_openai_chat_model(
+        model_name=backend.model,
+        api_key=backend.api_key or settings.openai_api_key,
+        temperature=settings.llm_temperature,
+        max_tokens=settings.llm_max_tokens,
+        base_url=backend.base_url,
+    )
+
+
+def create_llm_router() -> LLMRouter:
+    """Route over `llm_backends`, or over the single configured model"""
+    if not settings.llm_backends:
+        backends = [
+            LLMBackend(
+                "llm",
+                create_chat_model(),
+                llm_circuit_breaker,
+                supports_prefill=settings.mock_llm or settings.llm_supports_prefill,
+            )
+        ]
+    else:
+        backends = [
+            LLMBackend(
+                name=backend.name,
+                llm=create_backend_chat_model(backend),
+                breaker=create_circuit_breaker(f"llm:{backend.name}"),
+                weight=backend.weight,
+                supports_prefill=settings.mock_llm or backend.supports_prefill,
+            )
+            for backend in settings.llm_backends
+        ]
+    return LLMRouter(
+        backends,
+        policy=settings.llm_routing_policy,
+        alpha=settings.llm_latency_ewma_alpha,
+    )
+
+
+# Connection drops (timeouts included) that a resumed request can recover
+RESUMABLE_STREAM_ERRORS = (APIConnectionError, httpx.TransportError)
+
+llm_retry = retry(
+    stop=stop_after_attempt(3),
+    wait=wait_exponential(multiplier=1, min=1, max=4),
+    retry=retry_if_exception_type((APIConnectionError, RateLimitError)),
+    before_sleep=log_and_count_retry,
+    reraise=True,
+)
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    if not settings.response_cache_enabled:
+        return None
+    return ResponseCache(
+        ttl=settings.response_cache_ttl,
+        max_entries=settings.response_cache_max_entries,
+        max_bytes=settings.response_cache_max_bytes,
+        embeddings=get_embeddings() if settings.response_cache_semantic else None,
+        similarity_threshold=settings.response_cache_similarity_threshold,
+    )
+
+
+def create_hedge_policy() -> Optional[HedgePolicy]:
+    if not settings.llm_hedge_enabled:
+        return None
+    return HedgePolicy(
+        percentile=settings.llm_hedge_percentile,
+        min_delay=settings.llm_hedge_min_delay,
+        max_delay=settings.llm_hedge_max_delay,
+        budget=settings.llm_hedge_budget,
+    )
+
 
 class LLMService:
 
     def __init__(
         self,
-        model_name: str,
-        api_key: str,
-        temperature: float = 0.7,
-        max_tokens: int = 1000,
-        timeout: int = 30,
-        base_url: str | None = None,
+        llm: BaseChatModel | LLMRouter,
+        cache: Optional[ResponseCache] = None,
+        hedging: Optional[HedgePolicy] = None,
+        max_stream_resumes: int = 2,
     ):
-        kwargs = {
-            "model": model_name,
-            "api_key": api_key,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-            "timeout": timeout,
+        if isinstance(llm, LLMRouter):
+            self.router = llm
+        else:
+            self.router = LLMRouter([LLMBackend("llm", llm, llm_circuit_breaker)])
+        self.llm = self.router.primary.llm
+        self.cache = cache
+        self.hedging = hedging
+        self.max_stream_resumes = max_stream_resumes
+
+    @property
+    def cache_namespace(self) -> str:
+        # Any backend may answer, so a cached response is keyed by all of them
+        model_names = "+".join(
+            getattr(backend.llm, "model_name", backend.llm._llm_type)
+            for backend in self.router.backends
+        )
+        return f"{model_names}:{getattr(self.llm, 'temperature', '')}"
+
+    def _build_config(self, session_id: str = None) -> dict:
+        langfuse_handler = get_langfuse_handler()
+        if langfuse_handler is None:
+            return {}
+
+        config = {
+            "callbacks": [langfuse_handler],
+            "metadata": {
+                "model": self.llm.model_name,
+                "temperature": self.llm.temperature,
+            },
         }
-        if base_url:
-            kwargs["base_url"] = base_url
-        self.llm = ChatOpenAI(**kwargs)
-
-    @llm_circuit_breaker
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=4),
-        retry=retry_if_exception_type((APIConnectionError, RateLimitError)),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-        reraise=True,
-    )
+        if session_id:
+            config["run_name"] = f"session-{session_id}"
+            config["tags"] = [f"session:{session_id}"]
+        return config
+
+    @llm_retry
+    async def invoke(
+        self, llm: BaseChatModel, messages: list, config: dict
+    ) -> BaseMessage:
+        return await llm.ainvoke(messages, config=config)
+
+    @llm_retry
+    async def open_stream(
+        self, llm: BaseChatModel, messages: list, config: dict
+    ) -> tuple[Optional[BaseMessageChunk], AsyncIterator[BaseMessageChunk]]:
+        """Start a stream and wait for its first chunk, so that failures
+        before anything reached the client can still be retried"""
+        stream = llm.astream(messages, config=config)
+        try:
+            first = await anext(stream)
+        except StopAsyncIteration:
+            first = None
+        except BaseException:
+            await stream.aclose()
+            raise
+        return first, stream
+
+    async def resumable_stream(
+        self, messages: list, config: dict
+    ) -> AsyncIterator[str]:
+        """Stream the response text, surviving transient drops.
+
+        Failures before the first chunk are retried by `open_stream` and
+        fall back across backends like any call. When the connection drops
+        midway, the request is sent again with the text received so far as
+        an assistant prefix to continue from, up to `max_stream_resumes`
+        times, so the caller sees one uninterrupted stream.
+
+        Only backends with `supports_prefill` continue such a prefix; the
+        others would answer from scratch and repeat what the caller already
+        has. Resumed requests go to those backends alone, and without any
+        a drop after the first text is raised.
+        """
+        received = []
+        resumes = 0
+
+        while True:
+            prompt = messages
+            if received:
+                prompt = messages + [AIMessage(content="".join(received))]
+
+            async def start(backend: LLMBackend):
+                return await self.open_stream(backend.llm, prompt, config)
+
+            first, stream = await self.router.open_stream(start, prefill=bool(received))
+            try:
+                if first is None:
+                    return
+                if first.content:
+                    received.append(first.content)
+                    yield first.content
+                async for chunk in stream:
+                    if chunk.content:
+                        received.append(chunk.content)
+                        yield chunk.content
+                return
+            except RESUMABLE_STREAM_ERRORS as e:
+                if resumes >= self.max_stream_resumes or (
+                    received and not self.router.supports_prefill
+                ):
+                    raise
+                resumes += 1
+                LLM_STREAM_RESUMES.inc()
+                logger.warning(
+                    f"Stream dropped after {len(received)} chunks, "
+                    f"resuming ({resumes}/{self.max_stream_resumes}): {e!r}"
+                )
+            finally:
+                await stream.aclose()
+
     async def generate_response(self, messages: list, session_id: str = None) -> str:
+        lookup = None
+        if self.cache is not None:
+            lookup = await self.cache.lookup(messages, self.cache_namespace)
+            if lookup.response is not None:
+                return lookup.response
+
         try:
-            config = {}
-            langfuse_handler = get_langfuse_handler()
-
-            if langfuse_handler:
-                config["callbacks"] = [langfuse_handler]
-                config["metadata"] = {
-                    "model": self.llm.model_name,
-                    "temperature": self.llm.temperature,
-                }
-                if session_id:
-                    config["run_name"] = f"session-{session_id}"
-                    config["tags"] = [f"session:{session_id}"]
-
-            response = await self.llm.ainvoke(messages, config=config)
+            config = self._build_config(session_id)
+
+            # Each backend retries transient errors under its own breaker
+            # before the router falls back to the next one
+            def invoke(backend: LLMBackend):
+                return self.invoke(backend.llm, messages, config)
+
+            if self.hedging is not None:
+                response = await self.router.hedged_call("invoke", invoke, self.hedging)
+            else:
+                response = await self.router.call("invoke", invoke)
+            if lookup is not None:
+                self.cache.store(lookup, response.content)
             return response.content
         except CircuitBreakerError as e:
             logger.error(f"Circuit breaker is open: {e}")
@@ -134,20 +380,19 @@ class LLMService:
         message_history: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
         session_id: str = None,
+        memories: Optional[list[dict]] = None,
+        summary: Optional[str] = None,
     ) -> str:
         if system_prompt is None:
             system_prompt = BASE_SYSTEM_PROMPT
 
-        messages = [SystemMessage(content=system_prompt)]
-
-        if message_history:
-            for msg in message_history:
-                if msg["role"] == "user":
-                    messages.append(HumanMessage(content=msg["content"]))
-                elif msg["role"] == "assistant":
-                    messages.append(AIMessage(content=msg["content"]))
-
-        messages.append(HumanMessage(content=user_message))
+        messages = build_context(
+            user_message,
+            message_history,
+            system_prompt,
+            memories=memories,
+            summary=summary,
+        )
 
         response = await self.generate_response(messages, session_id)
 
@@ -157,52 +402,43 @@ class LLMService:
 
         return response
 
-    @llm_circuit_breaker
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=1, max=4),
-        retry=retry_if_exception_type((APIConnectionError, RateLimitError)),
-        before_sleep=before_sleep_log(logger, logging.WARNING),
-        reraise=True,
-    )
     async def stream_chat_with_history(
         self,
         user_message: str,
         message_history: Optional[list[dict]] = None,
         system_prompt: Optional[str] = None,
         session_id: str = None,
+        memories: Optional[list[dict]] = None,
+        summary: Optional[str] = None,
     ) -> AsyncIterator[str]:
         if system_prompt is None:
             system_prompt = BASE_SYSTEM_PROMPT
 
-        messages = [SystemMessage(content=system_prompt)]
-
-        if message_history:
-            for msg in message_history:
-                if msg["role"] == "user":
-                    messages.append(HumanMessage(content=msg["content"]))
-                elif msg["role"] == "assistant":
-                    messages.append(AIMessage(content=msg["content"]))
-
-        messages.append(HumanMessage(content=user_message))
+        messages = build_context(
+            user_message,
+            message_history,
+            system_prompt,
+            memories=memories,
+            summary=summary,
+        )
 
-        config = {}
-        langfuse_handler = get_langfuse_handler()
+        lookup = None
+        if self.cache is not None:
+            lookup = await self.cache.lookup(messages, self.cache_namespace)
+            if lookup.response is not None:
+                for chunk in replay_chunks(lookup.response):
+                    yield chunk
+                return
 
-        if langfuse_handler:
-            config["callbacks"] = [langfuse_handler]
-            config["metadata"] = {
-                "model": self.llm.model_name,
-                "temperature": self.llm.temperature,
-            }
-            if session_id:
-                config["run_name"] = f"session-{session_id}"
-                config["tags"] = [f"session:{session_id}"]
+        config = self._build_config(session_id)
 
         try:
-            async for chunk in self.llm.astream(messages, config=config):
-                if chunk.content:
-                    yield chunk.content
+            chunks = []
+            async for chunk in self.resumable_stream(messages, config):
+                chunks.append(chunk)
+                yield chunk
+            if lookup is not None:
+                self.cache.store(lookup, "".join(chunks))
         except CircuitBreakerError as e:
             logger.error(f"Circuit breaker is open: {e}")
             raise LLMServiceError(
@@ -236,10 +472,9 @@ def get_llm_service() -> LLMService:
     global _llm_service
     if _llm_service is None:
         _llm_service = LLMService(
-            model_name=settings.llm_model,
-            api_key=settings.openai_api_key,
-            temperature=settings.llm_temperature,
-            max_tokens=settings.llm_max_tokens,
-            base_url=settings.openai_api_base,
+            create_llm_router(),
+            cache=create_response_cache(),
+            hedging=create_hedge_policy(),
+            max_stream_resumes=settings.llm_stream_max_resumes,
         )
     return _llm_service
@@ -0,0 +1,236 @@
+import threading
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+
+
+@dataclass
+class MemoryRecord:
+    id: UUID
+    session_id: UUID
+    role: str
+    content: str
+    created_at: datetime
+    # How often and when the memory was last put into a prompt; used by
+    # retention to judge importance. Kept in memory only.
+    hits: int = 0
+    last_used: Optional[datetime] = None
+
+
+@dataclass
+class SearchResult:
+    record: MemoryRecord
+    score: float
+
+
+def to_micros(value: datetime) -> int:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1_000_000)
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class MemoryStore(ABC):
+    """Vector index of memories with session and time filters.
+
+    Vectors are L2-normalized on the way in, so scores are cosine
+    similarities. Records are appended in rows and never moved: deleting one
+    leaves a tombstone that searches skip. Subclasses own the vectors and the
+    search strategy; the metadata columns used for filtering live here as
+    NumPy arrays so filters are evaluated in one vectorized pass.
+
+    A store is not thread-safe: code that uses it off the event loop holds
+    `lock` for the whole call.
+    """
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+        self.lock = threading.Lock()
+        self._records: list[MemoryRecord] = []
+        self._rows: dict[UUID, int] = {}
+        self._session_keys: dict[UUID, int] = {}
+        self._sessions = np.empty(0, dtype=np.int64)
+        self._created = np.empty(0, dtype=np.int64)
+        self._alive = np.empty(0, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, memory_id: UUID) -> bool:
+        return memory_id in self._rows
+
+    def get(self, memory_id: UUID) -> Optional[MemoryRecord]:
+        row = self._rows.get(memory_id)
+        return None if row is None else self._records[row]
+
+    def records(self) -> list[MemoryRecord]:
+        """Live records in insertion order"""
+        return [self._records[row] for row in sorted(self._rows.values())]
+
+    @property
+    def tombstones(self) -> int:
+        return len(self._records) - len(self._rows)
+
+    def touch(self, ids: Sequence[UUID], at: Optional[datetime] = None) -> None:
+        """Record that these memories were used"""
+        at = at or datetime.now(timezone.utc)
+        for memory_id in ids:
+            record = self.get(memory_id)
+            if record is not None:
+                record.hits += 1
+                record.last_used = at
+
+    def vectors(self, ids: Sequence[UUID]) -> np.ndarray:
+        """Stored (normalized) vectors of `ids`, which must all be present"""
+        rows = np.array([self._rows[memory_id] for memory_id in ids], dtype=np.int64)
+        if not len(rows):
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        return self._read_vectors(rows)
+
+    def compact(self) -> int:
+        """Rebuild the index over live rows only, dropping tombstones;
+        returns how many rows were reclaimed"""
+        dropped = self.tombstones
+        if dropped == 0:
+            return 0
+        records = self.records()
+        vectors = self.vectors([record.id for record in records])
+
+        self._records, self._rows, self._session_keys = [], {}, {}
+        self._sessions = np.empty(0, dtype=np.int64)
+        self._created = np.empty(0, dtype=np.int64)
+        self._alive = np.empty(0, dtype=bool)
+        self._reset_vectors()
+        if records:
+            self._ensure_capacity(len(records))
+            for row, record in enumerate(records):
+                self._set_row(row, record)
+            self._add_vectors(0, vectors)
+        return dropped
+
+    def add(self, records: Sequence[MemoryRecord], vectors: np.ndarray) -> None:
+        vectors = normalize_rows(vectors).reshape(len(records), -1)
+        if vectors.shape[1] != self.dimensions:
+            raise ValueError(
+                f"Expected {self.dimensions}-dimensional vectors, "
+                f"got {vectors.shape[1]}"
+            )
+        self.delete([record.id for record in records])
+
+        start = len(self._records)
+        self._ensure_capacity(start + len(records))
+        for offset, record in enumerate(records):
+            self._set_row(start + offset, record)
+        self._add_vectors(start, vectors)
+
+    def _set_row(self, row: int, record: MemoryRecord) -> None:
+        self._records.append(record)
+        self._rows[record.id] = row
+        self._sessions[row] = self._session_keys.setdefault(
+            record.session_id, len(self._session_keys)
+        )
+        self._created[row] = to_micros(record.created_at)
+        self._alive[row] = True
+
+    def delete(self, ids: Sequence[UUID]) -> int:
+        deleted = 0
+        for memory_id in ids:
+            row = self._rows.pop(memory_id, None)
+            if row is not None:
+                self._alive[row] = False
+                deleted += 1
+        return deleted
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 5,
+        session_id: Optional[UUID] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> list[SearchResult]:
+        """Return up to `k` memories most similar to `query`, best first"""
+        if k <= 0 or not self._rows:
+            return []
+        mask = self._filter_mask(session_id, created_after, created_before)
+        if mask is None:
+            return []
+
+        query = normalize_rows(query).reshape(-1)
+        rows, scores = self._search(query, k, mask)
+        return [
+            SearchResult(record=self._records[row], score=float(score))
+            for row, score in zip(rows, scores)
+        ]
+
+    def _filter_mask(
+        self,
+        session_id: Optional[UUID],
+        created_after: Optional[datetime],
+        created_before: Optional[datetime],
+    ) -> Optional[np.ndarray]:
+        """Rows a search may return, or None when no row can match"""
+        n = len(self._records)
+        mask = self._alive[:n].copy()
+        if session_id is not None:
+            key = self._session_keys.get(session_id)
+            if key is None:
+                return None
+            mask &= self._sessions[:n] == key
+        if created_after is not None:
+            mask &= self._created[:n] >= to_micros(created_after)
+        if created_before is not None:
+            mask &= self._created[:n] < to_micros(created_before)
+        return mask if mask.any() else None
+
+    def _ensure_capacity(self, size: int) -> None:
+        capacity = len(self._alive)
+        if size <= capacity:
+            return
+        capacity = max(size, capacity * 2, 64)
+        for name in ("_sessions", "_created", "_alive"):
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: len(column)] = column
+            setattr(self, name, grown)
+        self._resize_vectors(capacity)
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """Indices of the `k` highest scores, best first"""
+        if k < len(scores):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(scores))
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    @abstractmethod
+    def _resize_vectors(self, capacity: int) -> None:
+        """Make room for `capacity` rows of vectors"""
+
+    @abstractmethod
+    def _reset_vectors(self) -> None:
+        """Drop every stored vector and any index built over them"""
+
+    @abstractmethod
+    def _read_vectors(self, rows: np.ndarray) -> np.ndarray:
+        """float32 copies of the vectors at `rows`"""
+
+    @abstractmethod
+    def _add_vectors(self, start: int, vectors: np.ndarray) -> None:
+        """Store normalized `vectors` at rows starting from `start`"""
+
+    @abstractmethod
+    def _search(
+        self, query: np.ndarray, k: int, mask: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Rows and scores of the best `k` matches among rows allowed by `mask`"""
@@ -0,0 +1,42 @@
+import os
+from functools import lru_cache
+
+from app.core.config import settings
+from app.services.memory_store.base import MemoryStore
+from app.services.memory_store.hnsw_store import HNSWMemoryStore
+from app.services.memory_store.ivf_store import IVFMemoryStore
+from app.services.memory_store.numpy_store import NumpyMemoryStore
+from app.services.memory_store.tiered_store import TieredMemoryStore
+
+
+def create_memory_store(backend: str, dimensions: int) -> MemoryStore:
+    if backend == "numpy":
+        return NumpyMemoryStore(dimensions, path=settings.memory_store_path)
+    if backend == "hnsw":
+        return HNSWMemoryStore(
+            dimensions,
+            m=settings.hnsw_m,
+            ef_construction=settings.hnsw_ef_construction,
+            ef_search=settings.hnsw_ef_search,
+        )
+    if backend == "ivf":
+        return IVFMemoryStore(
+            dimensions, nlist=settings.ivf_nlist, nprobe=settings.ivf_nprobe
+        )
+    raise ValueError(f"Unknown memory store backend: {backend}")
+
+
+@lru_cache(maxsize=1)
+def get_memory_store() -> MemoryStore | TieredMemoryStore:
+    store = create_memory_store(
+        settings.memory_store_backend, settings.embedding_dimensions
+    )
+    if not settings.retention_enabled:
+        return store
+    path = settings.memory_store_path
+    warm = NumpyMemoryStore(
+        settings.embedding_dimensions,
+        path=os.path.join(path, "warm") if path else None,
+        encoding="int8",
+    )
+    return TieredMemoryStore(store, warm)
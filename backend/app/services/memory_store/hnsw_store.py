@@ -0,0 +1,191 @@
+import heapq
+import math
+import random
+from typing import Optional
+
+import numpy as np
+
+from app.services.memory_store.base import MemoryStore
+
+
+class HNSWMemoryStore(MemoryStore):
+    """Approximate search over a Hierarchical Navigable Small World graph.
+
+    Each row is linked to up to `m` neighbours per layer (`2 * m` on the
+    bottom layer) chosen with the diversity heuristic of Malkov & Yashunin,
+    and a search walks greedily from the sparse top layers down to layer 0,
+    where it keeps `ef_search` candidates. Filtered-out and deleted rows are
+    still traversed but never returned. When a filter leaves fewer than
+    `exact_search_threshold` rows, those rows are scored exactly instead:
+    that is both faster and avoids the recall loss of walking a graph whose
+    matches are sparse.
+    """
+
+    def __init__(
+        self,
+        dimensions: int,
+        m: int = 16,
+        ef_construction: int = 100,
+        ef_search: int = 64,
+        exact_search_threshold: int = 2048,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(dimensions)
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.exact_search_threshold = exact_search_threshold
+        self._level_mult = 1 / math.log(m)
+        self._rng = random.Random(seed)
+        self._vectors = np.zeros((0, dimensions), dtype=np.float32)
+        # _links[row][level] is the neighbour list of `row` on `level`
+        self._links: list[list[list[int]]] = []
+        self._entry_point: Optional[int] = None
+        self._max_level = -1
+
+    def _resize_vectors(self, capacity: int) -> None:
+        grown = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        grown[: len(self._vectors)] = self._vectors
+        self._vectors = grown
+
+    def _reset_vectors(self) -> None:
+        self._vectors = np.zeros((0, self.dimensions), dtype=np.float32)
+        self._links = []
+        self._entry_point = None
+        self._max_level = -1
+
+    def _read_vectors(self, rows: np.ndarray) -> np.ndarray:
+        return self._vectors[rows].copy()
+
+    def _add_vectors(self, start: int, vectors: np.ndarray) -> None:
+        self._vectors[start : start + len(vectors)] = vectors
+        for row in range(start, start + len(vectors)):
+            self._insert(row)
+
+    def _insert(self, row: int) -> None:
+        level = int(-math.log(1 - self._rng.random()) * self._level_mult)
+        self._links.append([[] for _ in range(level + 1)])
+        if self._entry_point is None:
+            self._entry_point, self._max_level = row, level
+            return
+
+        query = self._vectors[row]
+        entry = [self._entry_point]
+        for layer in range(self._max_level, level, -1):
+            entry = [self._search_layer(query, entry, 1, layer)[0][1]]
+
+        for layer in range(min(level, self._max_level), -1, -1):
+            candidates = self._search_layer(query, entry, self.ef_construction, layer)
+            neighbours = self._select_neighbours(candidates, self.m)
+            self._links[row][layer] = neighbours
+            max_links = self._max_links(layer)
+            for neighbour in neighbours:
+                links = self._links[neighbour][layer]
+                links.append(row)
+                if len(links) > max_links:
+                    self._links[neighbour][layer] = self._prune(
+                        neighbour, links, max_links
+                    )
+            entry = [node for _, node in candidates]
+
+        if level > self._max_level:
+            self._entry_point, self._max_level = row, level
+
+    def _max_links(self, layer: int) -> int:
+        return 2 * self.m if layer == 0 else self.m
+
+    def _search_layer(
+        self,
+        query: np.ndarray,
+        entry: list[int],
+        ef: int,
+        layer: int,
+        mask: Optional[np.ndarray] = None,
+    ) -> list[tuple[float, int]]:
+        """Best-first search of one layer; returns (score, row) best first.
+
+        With a `mask`, only allowed rows are collected as results, but every
+        row is still used to navigate.
+        """
+        visited = set(entry)
+        scores = self._vectors[entry] @ query
+        candidates = [(-float(s), node) for s, node in zip(scores, entry)]
+        heapq.heapify(candidates)
+        results = [
+            (float(s), node)
+            for s, node in zip(scores, entry)
+            if mask is None or mask[node]
+        ]
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            neg_score, node = heapq.heappop(candidates)
+            if len(results) >= ef and -neg_score < results[0][0]:
+                break
+            unvisited = [n for n in self._links[node][layer] if n not in visited]
+            if not unvisited:
+                continue
+            visited.update(unvisited)
+            for score, neighbour in zip(
+                (self._vectors[unvisited] @ query).tolist(), unvisited
+            ):
+                if len(results) < ef or score > results[0][0]:
+                    heapq.heappush(candidates, (-score, neighbour))
+                    if mask is None or mask[neighbour]:
+                        heapq.heappush(results, (score, neighbour))
+                        if len(results) > ef:
+                            heapq.heappop(results)
+
+        return sorted(results, reverse=True)
+
+    def _select_neighbours(
+        self, candidates: list[tuple[float, int]], m: int
+    ) -> list[int]:
+        """Keep a candidate only if it is closer to the new row than to any
+        neighbour already kept, then top up with the closest rejected ones"""
+        if len(candidates) <= 1:
+            return [node for _, node in candidates]
+        nodes = [node for _, node in candidates]
+        vectors = self._vectors[nodes]
+        pairwise = vectors @ vectors.T
+        # Highest similarity of each candidate to any neighbour kept so far
+        closest_kept = np.full(len(nodes), -np.inf, dtype=np.float32)
+
+        selected, rejected = [], []
+        for i, (score, _) in enumerate(candidates):
+            if len(selected) >= m:
+                break
+            if closest_kept[i] > score:
+                rejected.append(i)
+            else:
+                selected.append(i)
+                np.maximum(closest_kept, pairwise[i], out=closest_kept)
+        kept = selected + rejected[: m - len(selected)]
+        return [nodes[i] for i in kept]
+
+    def _prune(self, row: int, links: list[int], max_links: int) -> list[int]:
+        scores = (self._vectors[links] @ self._vectors[row]).tolist()
+        candidates = sorted(zip(scores, links), reverse=True)
+        return self._select_neighbours(candidates, max_links)
+
+    def _search(
+        self, query: np.ndarray, k: int, mask: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        allowed = np.flatnonzero(mask)
+        if len(allowed) <= max(self.exact_search_threshold, k):
+            scores = self._vectors[allowed] @ query
+            best = self.top_k(scores, k)
+            return allowed[best], scores[best]
+
+        entry = [self._entry_point]
+        for layer in range(self._max_level, 0, -1):
+            entry = [self._search_layer(query, entry, 1, layer)[0][1]]
+        results = self._search_layer(
+            query, entry, max(self.ef_search, k), 0, mask=mask
+        )[:k]
+        return (
+            np.array([node for _, node in results], dtype=np.int64),
+            np.array([score for score, _ in results], dtype=np.float32),
+        )
@@ -0,0 +1,130 @@
+from typing import Optional
+
+import numpy as np
+
+from app.services.memory_store.base import MemoryStore, normalize_rows
+
+
+class IVFMemoryStore(MemoryStore):
+    """Approximate search over an inverted file of `nlist` k-means clusters.
+
+    Rows are exact-searched until the store first holds `train_size` rows
+    (default `40 * nlist`); the centroids are then trained with spherical
+    k-means on those rows and every row, existing and later, is filed under
+    its nearest centroid. A search scores the centroids, then only the rows
+    of the `nprobe` best lists. Centroids are never retrained, so a corpus
+    whose distribution drifts far from the first `train_size` rows slowly
+    loses recall. Filters that leave fewer than `exact_search_threshold`
+    rows are scored exactly, as in the HNSW store.
+    """
+
+    def __init__(
+        self,
+        dimensions: int,
+        nlist: int = 256,
+        nprobe: int = 8,
+        train_size: Optional[int] = None,
+        train_iterations: int = 10,
+        exact_search_threshold: int = 2048,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(dimensions)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_size = train_size or 40 * nlist
+        self.train_iterations = train_iterations
+        self.exact_search_threshold = exact_search_threshold
+        self._rng = np.random.default_rng(seed)
+        self._vectors = np.zeros((0, dimensions), dtype=np.float32)
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: list[list[int]] = []
+        # Array copies of `_lists`, rebuilt lazily after a list grows
+        self._list_arrays: list[Optional[np.ndarray]] = []
+        self._size = 0
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    def _resize_vectors(self, capacity: int) -> None:
+        grown = np.zeros((capacity, self.dimensions), dtype=np.float32)
+        grown[: len(self._vectors)] = self._vectors
+        self._vectors = grown
+
+    def _reset_vectors(self) -> None:
+        # Centroids are kept: compaction refiles rows, it does not retrain
+        self._vectors = np.zeros((0, self.dimensions), dtype=np.float32)
+        self._size = 0
+        if self.trained:
+            self._lists = [[] for _ in range(len(self._centroids))]
+            self._list_arrays = [None] * len(self._centroids)
+
+    def _read_vectors(self, rows: np.ndarray) -> np.ndarray:
+        return self._vectors[rows].copy()
+
+    def _add_vectors(self, start: int, vectors: np.ndarray) -> None:
+        self._vectors[start : start + len(vectors)] = vectors
+        self._size = start + len(vectors)
+        if self.trained:
+            self._assign(start, self._size)
+        elif self._size >= self.train_size:
+            self._train()
+            self._assign(0, self._size)
+
+    def _train(self) -> None:
+        sample = self._vectors[: self._size]
+        if len(sample) > self.train_size:
+            sample = sample[self._rng.choice(len(sample), self.train_size, False)]
+        nlist = min(self.nlist, len(sample))
+        centroids = sample[self._rng.choice(len(sample), nlist, replace=False)]
+        for _ in range(self.train_iterations):
+            labels = self._nearest(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=nlist) == 0
+            # Reseed empty clusters from random rows instead of losing them
+            sums[empty] = sample[self._rng.choice(len(sample), int(empty.sum()))]
+            centroids = normalize_rows(sums)
+        self._centroids = centroids
+        self._lists = [[] for _ in range(nlist)]
+        self._list_arrays = [None] * nlist
+
+    @staticmethod
+    def _nearest(
+        vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192
+    ) -> np.ndarray:
+        return np.concatenate(
+            [
+                np.argmax(vectors[i : i + chunk] @ centroids.T, axis=1)
+                for i in range(0, len(vectors), chunk)
+            ]
+        )
+
+    def _assign(self, start: int, stop: int) -> None:
+        labels = self._nearest(self._vectors[start:stop], self._centroids)
+        for row, label in enumerate(labels.tolist(), start=start):
+            self._lists[label].append(row)
+            self._list_arrays[label] = None
+
+    def _list_rows(self, label: int) -> np.ndarray:
+        rows = self._list_arrays[label]
+        if rows is None:
+            rows = np.array(self._lists[label], dtype=np.int64)
+            self._list_arrays[label] = rows
+        return rows
+
+    def _search(
+        self, query: np.ndarray, k: int, mask: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        allowed = np.flatnonzero(mask)
+        if not self.trained or len(allowed) <= max(self.exact_search_threshold, k):
+            scores = self._vectors[allowed] @ query
+            best = self.top_k(scores, k)
+            return allowed[best], scores[best]
+
+        probes = self.top_k(self._centroids @ query, min(self.nprobe, self.nlist))
+        rows = np.concatenate([self._list_rows(label) for label in probes])
+        rows = rows[mask[rows]]
+        scores = self._vectors[rows] @ query
+        best = self.top_k(scores, k)
+        return rows[best], scores[best]
@@ -0,0 +1,188 @@
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Literal, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from app.services.memory_store.base import MemoryRecord, MemoryStore
+from app.services.vector_codec import quantize_int8
+
+
+class NumpyMemoryStore(MemoryStore):
+    """Exact cosine search: one matrix-vector product over all rows.
+
+    With a `path`, vectors live in a memory-mapped `.npy` file and records
+    in an append-only JSON lines log next to it, so the store survives
+    restarts and the OS pages the matrix in on demand. Without one,
+    everything stays in memory. The `int8` encoding stores each row
+    quantized with its own scale, a quarter of the float32 size, at about
+    1% error in the scores.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    SCALES_FILE = "scales.npy"
+    RECORDS_FILE = "records.jsonl"
+
+    def __init__(
+        self,
+        dimensions: int,
+        path: Optional[str] = None,
+        encoding: Literal["float32", "int8"] = "float32",
+    ):
+        super().__init__(dimensions)
+        self.path = Path(path) if path else None
+        self.encoding = encoding
+        self._vectors = np.zeros((0, dimensions), dtype=encoding)
+        self._scales = np.zeros(0, dtype=np.float32)
+        if self.path is not None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    @property
+    def quantized(self) -> bool:
+        return self.encoding == "int8"
+
+    def flush(self) -> None:
+        for array in (self._vectors, self._scales):
+            if isinstance(array, np.memmap):
+                array.flush()
+
+    def add(self, records: Sequence[MemoryRecord], vectors: np.ndarray) -> None:
+        super().add(records, vectors)
+        self._log([self._encode(record) for record in records])
+
+    def delete(self, ids: Sequence[UUID]) -> int:
+        ids = [memory_id for memory_id in ids if memory_id in self._rows]
+        deleted = super().delete(ids)
+        self._log([{"deleted": str(memory_id)} for memory_id in ids])
+        return deleted
+
+    def compact(self) -> int:
+        dropped = super().compact()
+        if dropped and self.path is not None:
+            # The old log replays rows that no longer exist
+            self.flush()
+            target = self.path / self.RECORDS_FILE
+            tmp = self.path / f"{self.RECORDS_FILE}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for record in self._records:
+                    f.write(json.dumps(self._encode(record)) + "\n")
+            os.replace(tmp, target)
+        return dropped
+
+    def _resize_vectors(self, capacity: int) -> None:
+        self._vectors = self._grow(
+            self.VECTORS_FILE, self._vectors, (capacity, self.dimensions)
+        )
+        if self.quantized:
+            self._scales = self._grow(self.SCALES_FILE, self._scales, (capacity,))
+
+    def _grow(self, name: str, array: np.ndarray, shape: tuple) -> np.ndarray:
+        if self.path is None:
+            grown = np.zeros(shape, dtype=array.dtype)
+            grown[: len(array)] = array
+            return grown
+
+        target = self.path / name
+        tmp = self.path / f"{name}.tmp"
+        grown = np.lib.format.open_memmap(
+            tmp, mode="w+", dtype=array.dtype, shape=shape
+        )
+        grown[: len(array)] = array
+        grown.flush()
+        del grown, array
+        os.replace(tmp, target)
+        return np.load(target, mmap_mode="r+")
+
+    def _reset_vectors(self) -> None:
+        self._vectors = np.zeros((0, self.dimensions), dtype=self.encoding)
+        self._scales = np.zeros(0, dtype=np.float32)
+
+    def _read_vectors(self, rows: np.ndarray) -> np.ndarray:
+        vectors = self._vectors[rows].astype(np.float32)
+        if self.quantized:
+            vectors *= self._scales[rows, None]
+        return vectors
+
+    def _add_vectors(self, start: int, vectors: np.ndarray) -> None:
+        stop = start + len(vectors)
+        if self.quantized:
+            self._vectors[start:stop], self._scales[start:stop] = quantize_int8(vectors)
+        else:
+            self._vectors[start:stop] = vectors
+
+    def _search(
+        self, query: np.ndarray, k: int, mask: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        rows = np.flatnonzero(mask)
+        if len(rows) == len(mask):
+            scores = self._vectors[: len(mask)] @ query
+        else:
+            scores = self._vectors[rows] @ query
+        if self.quantized:
+            scores *= self._scales[rows]
+        best = self.top_k(scores, k)
+        return rows[best], scores[best]
+
+    @staticmethod
+    def _encode(record: MemoryRecord) -> dict:
+        return {
+            "id": str(record.id),
+            "session_id": str(record.session_id),
+            "role": record.role,
+            "content": record.content,
+            "created_at": record.created_at.isoformat(),
+        }
+
+    def _log(self, entries: list[dict]) -> None:
+        if self.path is None or not entries:
+            return
+        self.flush()
+        with open(self.path / self.RECORDS_FILE, "a", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+
+    def _load(self) -> None:
+        vectors_path = self.path / self.VECTORS_FILE
+        records_path = self.path / self.RECORDS_FILE
+        if not vectors_path.exists() or not records_path.exists():
+            return
+
+        vectors = np.load(vectors_path, mmap_mode="r+")
+        if vectors.shape[1] != self.dimensions:
+            raise ValueError(
+                f"{vectors_path} holds {vectors.shape[1]}-dimensional vectors, "
+                f"expected {self.dimensions}"
+            )
+        if vectors.dtype != self.encoding:
+            raise ValueError(
+                f"{vectors_path} holds {vectors.dtype} vectors, "
+                f"expected {self.encoding}"
+            )
+
+        self._vectors = vectors
+        if self.quantized:
+            self._scales = np.load(self.path / self.SCALES_FILE, mmap_mode="r+")
+        capacity = len(vectors)
+        self._sessions = np.zeros(capacity, dtype=np.int64)
+        self._created = np.zeros(capacity, dtype=np.int64)
+        self._alive = np.zeros(capacity, dtype=bool)
+
+        # Replay the log in order: a row per added record, tombstones after
+        with open(records_path, encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if "deleted" in entry:
+                    super().delete([UUID(entry["deleted"])])
+                    continue
+                record = MemoryRecord(
+                    id=UUID(entry["id"]),
+                    session_id=UUID(entry["session_id"]),
+                    role=entry["role"],
+                    content=entry["content"],
+                    created_at=datetime.fromisoformat(entry["created_at"]),
+                )
+                self._set_row(len(self._records), record)
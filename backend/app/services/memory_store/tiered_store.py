@@ -0,0 +1,73 @@
+import threading
+from datetime import datetime
+from typing import Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from app.services.memory_store.base import MemoryRecord, MemoryStore, SearchResult
+from app.services.memory_store.numpy_store import NumpyMemoryStore
+
+
+class TieredMemoryStore:
+    """A full-precision hot store in front of an int8 warm store.
+
+    New memories go to `hot`, which can be any backend. `demote` moves
+    memories to `warm`, an exact int8 store a quarter of the size, and
+    searches query both tiers and merge by score. Retention decides what
+    moves and what is evicted; the public methods otherwise mirror
+    `MemoryStore`, so callers do not need to know about tiers.
+    """
+
+    def __init__(self, hot: MemoryStore, warm: NumpyMemoryStore):
+        self.hot = hot
+        self.warm = warm
+        self.dimensions = hot.dimensions
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.hot) + len(self.warm)
+
+    def __contains__(self, memory_id: UUID) -> bool:
+        return memory_id in self.hot or memory_id in self.warm
+
+    def get(self, memory_id: UUID) -> Optional[MemoryRecord]:
+        return self.hot.get(memory_id) or self.warm.get(memory_id)
+
+    def add(self, records: Sequence[MemoryRecord], vectors: np.ndarray) -> None:
+        self.warm.delete([record.id for record in records])
+        self.hot.add(records, vectors)
+
+    def delete(self, ids: Sequence[UUID]) -> int:
+        return self.hot.delete(ids) + self.warm.delete(ids)
+
+    def touch(self, ids: Sequence[UUID], at: Optional[datetime] = None) -> None:
+        self.hot.touch(ids, at)
+        self.warm.touch(ids, at)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 5,
+        session_id: Optional[UUID] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> list[SearchResult]:
+        filters = {
+            "session_id": session_id,
+            "created_after": created_after,
+            "created_before": created_before,
+        }
+        results = self.hot.search(query, k, **filters) + self.warm.search(
+            query, k, **filters
+        )
+        return sorted(results, key=lambda result: result.score, reverse=True)[:k]
+
+    def demote(self, ids: Sequence[UUID]) -> int:
+        """Move memories from the hot tier to the warm one"""
+        ids = [memory_id for memory_id in ids if memory_id in self.hot]
+        if not ids:
+            return 0
+        records = [self.hot.get(memory_id) for memory_id in ids]
+        self.warm.add(records, self.hot.vectors(ids))
+        return self.hot.delete(ids)
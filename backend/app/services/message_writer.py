@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+from typing import Callable, Optional
+from uuid import UUID
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import (
+    MESSAGE_WRITE_BATCH_SIZE,
+    MESSAGE_WRITE_FAILURES,
+    MESSAGE_WRITE_QUEUE_DEPTH,
+    MESSAGE_WRITE_QUEUE_FULL,
+    MESSAGE_WRITE_SECONDS,
+    MESSAGES_WRITTEN,
+)
+from app.crud import message as message_crud
+from app.services.background import BackgroundTask
+from app.services.embedding_worker import embedding_worker
+
+logger = logging.getLogger(__name__)
+
+
+class MessageWriteQueue:
+    """Write-behind buffer that persists messages off the request path.
+
+    Messages get their id and created_at when enqueued, so ordering is decided
+    by the request, not by when the batch lands. A single worker drains the
+    queue and writes up to `batch_size` messages per multi-row INSERT, waiting
+    at most `flush_interval` seconds for a batch to fill. When the queue is
+    full, enqueue waits (backpressure) and after `enqueue_timeout` writes the
+    message itself instead of dropping it.
+
+    Until a message is committed it stays visible through `with_pending`, so a
+    follow-up turn never builds its context without the previous reply.
+    Written batches are handed to `on_written` (the embedding worker).
+
+    A batch rejected for its data (say, a reply to a session deleted in the
+    meantime) is not retried as a whole: it is split in halves until only
+    the offending rows are left, and only those are dropped.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        max_size: int = 1000,
+        batch_size: int = 100,
+        flush_interval: float = 0.05,
+        enqueue_timeout: float = 1.0,
+        max_retries: int = 3,
+        on_written: Optional[Callable[[list[dict]], None]] = None,
+    ):
+        self.session_factory = session_factory
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_retries = max_retries
+        self.on_written = on_written
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker = BackgroundTask(self._run)
+        self._pending: dict[UUID, list[dict]] = {}
+
+    def start(self) -> None:
+        if self._worker.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._worker.start()
+
+    async def stop(self) -> None:
+        """Flush everything still queued, then stop the worker"""
+        if self._worker.running:
+            await self.flush()
+        await self._worker.stop()
+
+    async def flush(self) -> None:
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def enqueue(self, session_id: UUID, role: str, content: str) -> None:
+        self.start()
+        values = message_crud.build_message_values(session_id, role, content)
+        self._pending.setdefault(session_id, []).append(values)
+
+        if self._queue.full():
+            MESSAGE_WRITE_QUEUE_FULL.inc()
+        try:
+            await asyncio.wait_for(self._queue.put(values), self.enqueue_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Message write queue is saturated, writing inline")
+            await self._write_batch([values])
+            return
+        except BaseException:
+            # Cancelled while waiting for room: the message will never be
+            # written, so it must not linger in the history either
+            self._release([values])
+            raise
+        MESSAGE_WRITE_QUEUE_DEPTH.set(self._queue.qsize())
+
+    def with_pending(self, session_id: UUID, history: list[dict]) -> list[dict]:
+        """Append messages of `session_id` that are queued but not yet written"""
+        seen = {msg.get("id") for msg in history}
+        pending = [
+            {key: values[key] for key in ("id", "role", "content", "token_count")}
+            for values in self._pending.get(session_id, [])
+            if values["id"] not in seen
+        ]
+        return history + pending
+
+    def _release(self, batch: list[dict]) -> None:
+        for values in batch:
+            pending = self._pending.get(values["session_id"])
+            if pending is None or values not in pending:
+                continue
+            pending.remove(values)
+            if not pending:
+                del self._pending[values["session_id"]]
+
+    async def _next_batch(self) -> list[dict]:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            MESSAGE_WRITE_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                await self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write_batch(self, batch: list[dict]) -> None:
+        try:
+            await self._write_with_retries(batch)
+        finally:
+            self._release(batch)
+
+    async def _write_with_retries(self, batch: list[dict]) -> None:
+        for attempt in range(1, self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                async with self.session_factory() as db:
+                    await message_crud.create_messages(db, batch)
+            except (IntegrityError, DataError) as e:
+                # Retrying the same rows would fail the same way
+                if len(batch) == 1:
+                    MESSAGE_WRITE_FAILURES.inc()
+                    logger.error(f"Dropping message {batch[0]['id']}: {e}")
+                    return
+                middle = len(batch) // 2
+                await self._write_with_retries(batch[:middle])
+                await self._write_with_retries(batch[middle:])
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    MESSAGE_WRITE_FAILURES.inc(len(batch))
+                    logger.error(
+                        f"Dropping {len(batch)} messages after {attempt} "
+                        f"failed writes: {e}",
+                        exc_info=True,
+                    )
+                    return
+                logger.warning(f"Message batch write failed (attempt {attempt}): {e}")
+                await asyncio.sleep(0.1 * 2**attempt)
+            else:
+                MESSAGE_WRITE_SECONDS.observe(time.perf_counter() - start)
+                MESSAGE_WRITE_BATCH_SIZE.observe(len(batch))
+                MESSAGES_WRITTEN.inc(len(batch))
+                if self.on_written is not None:
+                    try:
+                        self.on_written(batch)
+                    except Exception as e:
+                        logger.error(
+                            f"Handing {len(batch)} written messages on failed: {e}",
+                            exc_info=True,
+                        )
+                return
+
+
+message_write_queue = MessageWriteQueue(
+    max_size=settings.message_write_queue_size,
+    batch_size=settings.message_write_batch_size,
+    flush_interval=settings.message_write_flush_interval,
+    enqueue_timeout=settings.message_write_enqueue_timeout,
+    on_written=embedding_worker.submit,
+)
@@ -0,0 +1,80 @@
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import MESSAGE_PARTITION_CHANGES
+from app.crud import message_partition as partition_crud
+from app.services.background import PeriodicTask
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionMaintainer:
+    """Keeps monthly `messages` partitions ahead of the clock.
+
+    On start and then every `interval` seconds it creates the partitions of
+    the current month and the next `months_ahead`, so inserts never fall
+    into the default partition, and of any earlier month whose rows fell
+    into it anyway. With `retention_months`, whole partitions older than
+    that many months are dropped, which deletes their messages without the
+    row-by-row cost of DELETE and the vacuum that follows it.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        months_ahead: int = 2,
+        retention_months: int = 0,
+        interval: float = 86400.0,
+        enabled: bool = True,
+    ):
+        self.session_factory = session_factory
+        self.months_ahead = months_ahead
+        self.retention_months = retention_months
+        self.interval = interval
+        self.enabled = enabled
+        self._task = PeriodicTask(
+            self.run_once, interval, "Message partition maintenance", immediate=True
+        )
+
+    def start(self) -> None:
+        if self.enabled:
+            self._task.start()
+
+    async def stop(self) -> None:
+        await self._task.stop()
+
+    async def run_once(
+        self, now: Optional[datetime] = None
+    ) -> tuple[list[datetime], list[datetime]]:
+        """Returns the months whose partitions were created and dropped"""
+        now = now or datetime.now(timezone.utc)
+        async with self.session_factory() as db:
+            created = await partition_crud.ensure_message_partitions(
+                db, now, months_ahead=self.months_ahead
+            )
+            dropped = []
+            if self.retention_months > 0:
+                cutoff = partition_crud.add_months(
+                    partition_crud.month_start(now), -self.retention_months
+                )
+                dropped = await partition_crud.drop_message_partitions(db, cutoff)
+
+        MESSAGE_PARTITION_CHANGES.labels(change="created").inc(len(created))
+        MESSAGE_PARTITION_CHANGES.labels(change="dropped").inc(len(dropped))
+        for month in created:
+            logger.info(f"Created messages partition for {month:%Y-%m}")
+        for month in dropped:
+            logger.info(f"Dropped messages partition for {month:%Y-%m}")
+        return created, dropped
+
+
+partition_maintainer = PartitionMaintainer(
+    months_ahead=settings.message_partitions_ahead,
+    retention_months=settings.message_partition_retention_months,
+    interval=settings.message_partition_interval,
+)
@@ -0,0 +1,215 @@
+import hashlib
+import logging
+import re
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import BaseMessage
+
+from app.core.metrics import (
+    RESPONSE_CACHE_BYTES,
+    RESPONSE_CACHE_ENTRIES,
+    RESPONSE_CACHE_EVICTIONS,
+    RESPONSE_CACHE_LOOKUPS,
+)
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_REPLAY_RE = re.compile(r"\S+\s*|\s+")
+
+
+def normalize(text: str) -> str:
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def digest(parts: list[str]) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        hasher.update(part.encode())
+        hasher.update(b"\0")
+    return hasher.hexdigest()
+
+
+def replay_chunks(response: str) -> list[str]:
+    """Split a cached answer into word-sized chunks for streaming replay"""
+    return _REPLAY_RE.findall(response)
+
+
+@dataclass
+class CacheLookup:
+    key: str
+    prefix_key: str
+    query: str
+    embedding: Optional[np.ndarray] = None
+    response: Optional[str] = None
+    result: str = "miss"
+
+
+@dataclass
+class _Entry:
+    response: str
+    prefix_key: str
+    expires_at: float
+    size: int
+    slot: Optional[int] = None
+
+
+class ResponseCache:
+    """Two-level cache of LLM answers.
+
+    The exact level is keyed on the normalized message list (plus a namespace
+    such as model and temperature). The optional semantic level embeds the
+    last user message and reuses an answer whose message is at least
+    `similarity_threshold` cosine-similar, but only when everything before it
+    (system prompt and history) is identical, so answers never leak across
+    conversations. Entries expire after `ttl` seconds, and the least recently
+    used ones are evicted beyond `max_entries` or `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 3600.0,
+        max_entries: int = 1024,
+        max_bytes: int = 64 * 1024 * 1024,
+        embeddings: Optional[Embeddings] = None,
+        similarity_threshold: float = 0.95,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        # Semantic index: one row per slot, rows of evicted entries are reused
+        self._vectors: Optional[np.ndarray] = None
+        self._slot_keys: list[Optional[str]] = [None] * max_entries
+        self._slot_prefixes: list[Optional[str]] = [None] * max_entries
+        self._free_slots = list(range(max_entries - 1, -1, -1))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def lookup(
+        self, messages: list[BaseMessage], namespace: str = ""
+    ) -> CacheLookup:
+        normalized = [f"{msg.type}:{normalize(msg.text)}" for msg in messages]
+        prefix_key = digest([namespace] + normalized[:-1])
+        lookup = CacheLookup(
+            key=digest([prefix_key, normalized[-1]]),
+            prefix_key=prefix_key,
+            query=normalize(messages[-1].text),
+        )
+
+        entry = self._get(lookup.key)
+        if entry is not None:
+            lookup.response, lookup.result = entry.response, "exact_hit"
+        elif self.embeddings is not None:
+            await self._semantic_lookup(lookup)
+
+        RESPONSE_CACHE_LOOKUPS.labels(result=lookup.result).inc()
+        return lookup
+
+    def store(self, lookup: CacheLookup, response: str) -> None:
+        if not response or not response.strip():
+            return
+        self._remove(lookup.key)
+
+        size = sys.getsizeof(response) + sys.getsizeof(lookup.key)
+        if lookup.embedding is not None:
+            size += lookup.embedding.nbytes
+        if size > self.max_bytes:
+            return
+
+        entry = _Entry(
+            response=response,
+            prefix_key=lookup.prefix_key,
+            expires_at=time.monotonic() + self.ttl,
+            size=size,
+        )
+        while self._entries and (
+            len(self._entries) >= self.max_entries
+            or self._bytes + size > self.max_bytes
+        ):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            RESPONSE_CACHE_EVICTIONS.labels(reason="capacity").inc()
+
+        if lookup.embedding is not None:
+            entry.slot = self._free_slots.pop()
+            if self._vectors is None:
+                self._vectors = np.zeros(
+                    (self.max_entries, lookup.embedding.shape[0]), dtype=np.float32
+                )
+            self._vectors[entry.slot] = lookup.embedding
+            self._slot_keys[entry.slot] = lookup.key
+            self._slot_prefixes[entry.slot] = lookup.prefix_key
+
+        self._entries[lookup.key] = entry
+        self._bytes += size
+        self._update_gauges()
+
+    def clear(self) -> None:
+        for key in list(self._entries):
+            self._remove(key)
+        self._update_gauges()
+
+    def _get(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._remove(key)
+            RESPONSE_CACHE_EVICTIONS.labels(reason="ttl").inc()
+            self._update_gauges()
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._bytes -= entry.size
+        if entry.slot is not None:
+            self._slot_keys[entry.slot] = None
+            self._slot_prefixes[entry.slot] = None
+            self._free_slots.append(entry.slot)
+
+    async def _semantic_lookup(self, lookup: CacheLookup) -> None:
+        try:
+            vector = await self.embeddings.aembed_query(lookup.query)
+        except Exception as e:
+            logger.warning(f"Response cache embedding failed: {e}")
+            return
+        lookup.embedding = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(lookup.embedding)
+        if norm > 0:
+            lookup.embedding /= norm
+
+        candidates = [
+            slot
+            for slot, prefix in enumerate(self._slot_prefixes)
+            if prefix == lookup.prefix_key
+        ]
+        if not candidates:
+            return
+
+        scores = self._vectors[candidates] @ lookup.embedding
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return
+
+        entry = self._get(self._slot_keys[candidates[best]])
+        if entry is not None:
+            lookup.response, lookup.result = entry.response, "semantic_hit"
+
+    def _update_gauges(self) -> None:
+        RESPONSE_CACHE_ENTRIES.set(len(self._entries))
+        RESPONSE_CACHE_BYTES.set(self._bytes)
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import MEMORY_STORE_ROWS, RETENTION_ACTIONS
+from app.crud import embedding_cache as embedding_cache_crud
+from app.crud import message as message_crud
+from app.services.background import PeriodicTask
+from app.services.memory_store.base import MemoryRecord, MemoryStore
+from app.services.memory_store.factory import get_memory_store
+from app.services.memory_store.tiered_store import TieredMemoryStore
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetentionReport:
+    demoted: int = 0
+    evicted: int = 0
+    compacted: int = 0
+    messages_deleted: int = 0
+    cache_entries_deleted: int = 0
+
+
+class RetentionEngine:
+    """Keeps the memory index and the messages table from growing forever.
+
+    Every `interval` seconds, at most `batch_size` memories per action:
+
+    - memories not created or used for `hot_age` move from the float32 hot
+      tier to the int8 warm tier;
+    - memories of sessions idle for `evict_age` are evicted from the index,
+      unless they were used at least `keep_hits` times; their sessions live
+      on in the rolling summary;
+    - with a `message_age`, messages older than that which the session
+      summary already covers are deleted, and evicted with them;
+    - with an `embedding_cache_age`, cached embeddings older than that are
+      deleted, so the cache table stays bounded by what was embedded
+      recently.
+
+    A tier whose tombstones reach `compact_ratio` of its rows is then
+    compacted, so eviction frees memory and search stops skipping dead
+    rows. Planning and compaction walk the whole index, so they run in a
+    worker thread under the store lock rather than on the event loop.
+    """
+
+    def __init__(
+        self,
+        store_factory: Callable[[], MemoryStore | TieredMemoryStore] = get_memory_store,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        hot_age: timedelta = timedelta(days=7),
+        evict_age: timedelta = timedelta(days=90),
+        keep_hits: int = 3,
+        message_age: Optional[timedelta] = None,
+        embedding_cache_age: Optional[timedelta] = None,
+        compact_ratio: float = 0.25,
+        batch_size: int = 10000,
+        interval: float = 3600.0,
+        enabled: bool = False,
+    ):
+        self.store_factory = store_factory
+        self.session_factory = session_factory
+        self.hot_age = hot_age
+        self.evict_age = evict_age
+        self.keep_hits = keep_hits
+        self.message_age = message_age
+        self.embedding_cache_age = embedding_cache_age
+        self.compact_ratio = compact_ratio
+        self.batch_size = batch_size
+        self.interval = interval
+        self.enabled = enabled
+        self._task = PeriodicTask(self.run_once, interval, "Retention run")
+
+    def start(self) -> None:
+        if self.enabled:
+            self._task.start()
+
+    async def stop(self) -> None:
+        await self._task.stop()
+
+    def plan(
+        self, store: MemoryStore | TieredMemoryStore, now: datetime
+    ) -> tuple[list[UUID], list[UUID]]:
+        """Ids to demote and ids to evict under the current policy"""
+        tiered = isinstance(store, TieredMemoryStore)
+        hot = store.hot.records() if tiered else store.records()
+        warm = store.warm.records() if tiered else []
+
+        session_active: dict[UUID, datetime] = {}
+        for record in hot + warm:
+            last = self._last_active(record)
+            current = session_active.get(record.session_id)
+            if current is None or last > current:
+                session_active[record.session_id] = last
+
+        demote, evict = [], []
+        for record in hot + warm:
+            idle = now - session_active[record.session_id]
+            if idle >= self.evict_age and record.hits < self.keep_hits:
+                if len(evict) < self.batch_size:
+                    evict.append(record.id)
+            elif (
+                tiered
+                and len(demote) < self.batch_size
+                and record.id in store.hot
+                and now - self._last_active(record) >= self.hot_age
+            ):
+                demote.append(record.id)
+        return demote, evict
+
+    def _compact(
+        self, store: MemoryStore | TieredMemoryStore, report: RetentionReport
+    ) -> None:
+        tiers = (
+            {"hot": store.hot, "warm": store.warm}
+            if isinstance(store, TieredMemoryStore)
+            else {"hot": store}
+        )
+        for tier, tier_store in tiers.items():
+            rows = len(tier_store) + tier_store.tombstones
+            if rows and tier_store.tombstones / rows >= self.compact_ratio:
+                report.compacted += tier_store.compact()
+            MEMORY_STORE_ROWS.labels(tier=tier).set(len(tier_store))
+
+    @staticmethod
+    def _last_active(record: MemoryRecord) -> datetime:
+        if record.last_used is None:
+            return record.created_at
+        return max(record.created_at, record.last_used)
+
+    async def run_once(self, now: Optional[datetime] = None) -> RetentionReport:
+        now = now or datetime.now(timezone.utc)
+        store = self.store_factory()
+        report = RetentionReport()
+
+        deleted = []
+        if self.message_age is not None:
+            async with self.session_factory() as db:
+                deleted = await message_crud.delete_summarized_messages(
+                    db, older_than=now - self.message_age, limit=self.batch_size
+                )
+            report.messages_deleted = len(deleted)
+
+        if self.embedding_cache_age is not None:
+            async with self.session_factory() as db:
+                report.cache_entries_deleted = (
+                    await embedding_cache_crud.delete_expired_embeddings(
+                        db,
+                        older_than=now - self.embedding_cache_age,
+                        limit=self.batch_size,
+                    )
+                )
+
+        def maintain_store() -> None:
+            with store.lock:
+                report.evicted += store.delete(deleted)
+                demote, evict = self.plan(store, now)
+                report.evicted += store.delete(evict)
+                if demote:
+                    report.demoted = store.demote(demote)
+                self._compact(store, report)
+
+        await asyncio.to_thread(maintain_store)
+
+        for action in (
+            "demoted",
+            "evicted",
+            "compacted",
+            "messages_deleted",
+            "cache_entries_deleted",
+        ):
+            RETENTION_ACTIONS.labels(action=action).inc(getattr(report, action))
+        logger.info(f"Retention run: {report}")
+        return report
+
+
+retention_engine = RetentionEngine(
+    hot_age=timedelta(days=settings.retention_hot_days),
+    evict_age=timedelta(days=settings.retention_evict_days),
+    keep_hits=settings.retention_keep_hits,
+    message_age=(
+        timedelta(days=settings.retention_message_days)
+        if settings.retention_message_days > 0
+        else None
+    ),
+    embedding_cache_age=(
+        timedelta(days=settings.retention_embedding_cache_days)
+        if settings.retention_embedding_cache_days > 0
+        else None
+    ),
+    compact_ratio=settings.retention_compact_ratio,
+    batch_size=settings.retention_batch_size,
+    interval=settings.retention_interval,
+    enabled=settings.retention_enabled,
+)
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from typing import Callable
+from uuid import UUID
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import SESSION_SUMMARIES
+from app.core.prompts import SUMMARIZE_PROMPT
+from app.core.tokens import count_tokens
+from app.crud import session_summary as summary_crud
+from app.services.context_builder import message_tokens
+from app.services.llm_service import LLMService, get_llm_service
+
+logger = logging.getLogger(__name__)
+
+
+class SessionSummarizer:
+    """Folds the older part of long sessions into a stored rolling summary.
+
+    After each turn `maybe_schedule` looks at the history the turn loaded
+    (everything the summary does not cover yet, capped at the history
+    window). Once it exceeds `trigger_tokens`, or fills the window so that
+    messages would start falling out of the prompt, a background task
+    summarizes all but the newest `keep_recent_tokens` of it into the
+    session's summary. The prompt then stays at roughly summary plus a
+    short tail however long the session runs. One task per session runs at
+    a time.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        llm_service_factory: Callable[[], LLMService] = get_llm_service,
+        trigger_tokens: int = 4000,
+        keep_recent_tokens: int = 1500,
+        max_messages: int = 500,
+        history_window: int = 50,
+        enabled: bool = True,
+    ):
+        self.session_factory = session_factory
+        self.llm_service_factory = llm_service_factory
+        self.trigger_tokens = trigger_tokens
+        self.keep_recent_tokens = keep_recent_tokens
+        self.max_messages = max_messages
+        self.history_window = history_window
+        self.enabled = enabled
+        self._tasks: dict[UUID, asyncio.Task] = {}
+
+    def needs_summary(self, history: list[dict]) -> bool:
+        if len(history) >= self.history_window:
+            return True
+        tokens = sum(
+            message_tokens(msg["content"], msg.get("token_count")) for msg in history
+        )
+        return tokens >= self.trigger_tokens
+
+    def maybe_schedule(self, session_id: UUID, history: list[dict]) -> bool:
+        if not self.enabled or session_id in self._tasks:
+            return False
+        if not self.needs_summary(history):
+            return False
+        task = asyncio.create_task(self._run(session_id))
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
+        return True
+
+    async def stop(self) -> None:
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def _run(self, session_id: UUID) -> None:
+        try:
+            await self.summarize(session_id)
+        except Exception as e:
+            SESSION_SUMMARIES.labels(result="error").inc()
+            logger.warning(f"Summarizing session {session_id} failed: {e}")
+
+    async def summarize(self, session_id: UUID) -> bool:
+        """Fold everything but the recent tail into the summary; returns
+        whether a new summary was stored"""
+        async with self.session_factory() as db:
+            current = await summary_crud.get_summary(db, session_id)
+            messages = await summary_crud.get_unsummarized_messages(
+                db, session_id, current, limit=self.max_messages
+            )
+
+        split, kept = len(messages), 0
+        while split > 0:
+            cost = message_tokens(
+                messages[split - 1].content, messages[split - 1].token_count
+            )
+            if kept + cost > self.keep_recent_tokens:
+                break
+            kept += cost
+            split -= 1
+        to_fold = messages[:split]
+        if not to_fold:
+            return False
+
+        transcript = "\n".join(f"{msg.role}: {msg.content}" for msg in to_fold)
+        previous = current.summary if current is not None else "(none)"
+        summary = await self.llm_service_factory().generate_response(
+            [
+                SystemMessage(content=SUMMARIZE_PROMPT),
+                HumanMessage(
+                    content=f"Current summary:\n{previous}\n\n"
+                    f"New messages:\n{transcript}"
+                ),
+            ],
+            session_id=str(session_id),
+        )
+        if not summary or not summary.strip():
+            SESSION_SUMMARIES.labels(result="empty").inc()
+            return False
+
+        async with self.session_factory() as db:
+            stored = await summary_crud.save_summary(
+                db,
+                session_id,
+                summary=summary.strip(),
+                token_count=count_tokens(summary),
+                covered_until=to_fold[-1].created_at,
+                covered_until_id=to_fold[-1].id,
+                previous_until_id=current.covered_until_id if current else None,
+            )
+        SESSION_SUMMARIES.labels(result="stored" if stored else "conflict").inc()
+        return stored
+
+
+session_summarizer = SessionSummarizer(
+    trigger_tokens=settings.summary_trigger_tokens,
+    keep_recent_tokens=settings.summary_keep_recent_tokens,
+    max_messages=settings.summary_max_messages,
+    history_window=settings.chat_history_window,
+    enabled=settings.summary_enabled,
+)
@@ -0,0 +1,397 @@
+"""Recall/latency benchmark of the memory store index types.
+
+Builds each index over a corpus, replays a query set against it and prints
+one JSON document with build time, index memory, query latency percentiles,
+recall@K against exact search, MRR and NDCG@K per configuration.
+
+Run from `backend/`:
+
+    # synthetic clustered vectors, no database or model needed
+    python -m tests.benchmark.retrieval_benchmark --scales 10000 100000
+
+    # replay message contents from the database, embedded with the
+    # configured model (MOCK_LLM=true uses the offline hashing embeddings)
+    python -m tests.benchmark.retrieval_benchmark --corpus messages \\
+        --scales 10000 --output results.json
+
+Query-time parameters (`--nprobe`, `--ef-search`) are swept over one build
+of each index. The pure Python HNSW build is slow: keep it to 10k-100k rows
+and use `--indexes flat ivf` at 1M.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Iterator
+from uuid import uuid4
+
+import numpy as np
+
+from app.services.memory_store.base import MemoryRecord, MemoryStore, normalize_rows
+from app.services.memory_store.hnsw_store import HNSWMemoryStore
+from app.services.memory_store.ivf_store import IVFMemoryStore
+from app.services.memory_store.numpy_store import NumpyMemoryStore
+
+logger = logging.getLogger("retrieval_benchmark")
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@dataclass
+class Corpus:
+    name: str
+    records: list[MemoryRecord]
+    vectors: np.ndarray
+    queries: np.ndarray
+    # Row each query was derived from, the one labelled relevant for MRR
+    targets: np.ndarray
+
+
+def synthetic_corpus(
+    size: int,
+    dimensions: int,
+    n_queries: int,
+    seed: int = 0,
+    clusters: int = 100,
+    spread: float = 2.0,
+    query_noise: float = 1.0,
+) -> Corpus:
+    """Clustered Gaussian vectors; queries are noisy copies of random rows.
+
+    `spread` is the per-dimension noise around the unit-variance cluster
+    centres: the default overlaps clusters enough that IVF and HNSW recall
+    actually depends on their parameters.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimensions)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, size)]
+    vectors += spread * rng.normal(size=(size, dimensions)).astype(np.float32)
+    vectors = normalize_rows(vectors)
+    targets = rng.choice(size, n_queries, replace=False)
+    queries = vectors[targets] + query_noise * rng.normal(
+        size=(n_queries, dimensions)
+    ).astype(np.float32) / math.sqrt(dimensions)
+    sessions = [uuid4() for _ in range(max(size // 100, 1))]
+    records = [
+        MemoryRecord(
+            id=uuid4(),
+            session_id=sessions[i % len(sessions)],
+            role="user",
+            content="",
+            created_at=START + timedelta(seconds=i),
+        )
+        for i in range(size)
+    ]
+    return Corpus("synthetic", records, vectors, normalize_rows(queries), targets)
+
+
+async def messages_corpus(
+    size: int, n_queries: int, seed: int = 0, batch_size: int = 256
+) -> Corpus:
+    """The newest `size` messages, embedded; each query is the first half of
+    a random message's words, labelled with that message"""
+    from sqlalchemy import select
+
+    from app.core.database import AsyncSessionLocal
+    from app.models.message import Message
+    from app.services.embeddings import get_embeddings
+
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(
+                Message.id,
+                Message.session_id,
+                Message.role,
+                Message.content,
+                Message.created_at,
+            )
+            .order_by(Message.created_at.desc())
+            .limit(size)
+        )
+        rows = [row for row in result.all() if row.content]
+    if not rows:
+        raise SystemExit("The messages table is empty")
+    if len(rows) < size:
+        logger.warning(f"Only {len(rows)} messages available, wanted {size}")
+
+    records = [MemoryRecord(*row) for row in rows]
+    embeddings = get_embeddings()
+    vectors = []
+    for i in range(0, len(records), batch_size):
+        batch = [record.content for record in records[i : i + batch_size]]
+        vectors.extend(await embeddings.aembed_documents(batch))
+
+    rng = np.random.default_rng(seed)
+    candidates = [
+        i for i, record in enumerate(records) if len(record.content.split()) >= 4
+    ]
+    targets = rng.choice(candidates, min(n_queries, len(candidates)), replace=False)
+    texts = []
+    for i in targets:
+        words = records[i].content.split()
+        texts.append(" ".join(words[: len(words) // 2]))
+    queries = await embeddings.aembed_documents(texts)
+    return Corpus(
+        "messages",
+        records,
+        normalize_rows(np.array(vectors)),
+        normalize_rows(np.array(queries)),
+        np.asarray(targets),
+    )
+
+
+def exact_neighbours(
+    vectors: np.ndarray, queries: np.ndarray, k: int, chunk: int = 256
+) -> np.ndarray:
+    """Row ids of the true top `k` of every query, best first"""
+    neighbours = []
+    for i in range(0, len(queries), chunk):
+        scores = queries[i : i + chunk] @ vectors.T
+        for row in scores:
+            neighbours.append(MemoryStore.top_k(row, k))
+    return np.array(neighbours)
+
+
+def recall_at_k(found: list[int], expected: np.ndarray) -> float:
+    return len(set(found) & set(expected.tolist())) / len(expected)
+
+
+def reciprocal_rank(found: list[int], target: int) -> float:
+    for rank, row in enumerate(found, start=1):
+        if row == target:
+            return 1 / rank
+    return 0.0
+
+
+def ndcg_at_k(found: list[int], expected: np.ndarray) -> float:
+    """NDCG with graded relevance from the exact ranking: the true nearest
+    neighbour is worth k, the k-th one 1, anything else 0"""
+    k = len(expected)
+    relevance = {row: k - rank for rank, row in enumerate(expected.tolist())}
+    dcg = sum(
+        relevance.get(row, 0) / math.log2(rank + 2)
+        for rank, row in enumerate(found[:k])
+    )
+    ideal = sum((k - rank) / math.log2(rank + 2) for rank in range(k))
+    return dcg / ideal
+
+
+def footprint(value, seen: set | None = None) -> int:
+    """Approximate bytes held by an index: NumPy buffers plus the Python
+    lists, ints and dicts of graph links and inverted lists"""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple, set)):
+        return sys.getsizeof(value) + sum(footprint(item, seen) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            footprint(key, seen) + footprint(item, seen) for key, item in value.items()
+        )
+    if isinstance(value, (int, float)):
+        return sys.getsizeof(value)
+    return 0
+
+
+def index_footprint(store: MemoryStore) -> int:
+    # Record metadata is the same for every index type and is left out
+    shared = {"_records", "_rows", "_session_keys"}
+    return sum(
+        footprint(value) for name, value in vars(store).items() if name not in shared
+    )
+
+
+def index_configs(args) -> Iterator[tuple[str, dict, list[dict]]]:
+    """(index, build params, query-time params to sweep) per build"""
+    if "flat" in args.indexes:
+        yield "flat", {}, [{}]
+    if "ivf" in args.indexes:
+        for nlist in args.nlist:
+            sweep = [{"nprobe": nprobe} for nprobe in args.nprobe if nprobe <= nlist]
+            yield "ivf", {"nlist": nlist}, sweep
+    if "hnsw" in args.indexes:
+        for m in args.m:
+            build = {"m": m, "ef_construction": args.ef_construction}
+            yield "hnsw", build, [{"ef_search": ef} for ef in args.ef_search]
+
+
+def build_index(
+    index: str, params: dict, dimensions: int, size: int, seed: int
+) -> MemoryStore:
+    if index == "flat":
+        return NumpyMemoryStore(dimensions)
+    if index == "ivf":
+        # Train on the whole corpus when it is smaller than the default sample
+        train_size = min(40 * params["nlist"], size)
+        return IVFMemoryStore(
+            dimensions,
+            train_size=train_size,
+            exact_search_threshold=0,
+            seed=seed,
+            **params,
+        )
+    if index == "hnsw":
+        return HNSWMemoryStore(
+            dimensions, exact_search_threshold=0, seed=seed, **params
+        )
+    raise ValueError(f"Unknown index type: {index}")
+
+
+def evaluate(
+    store: MemoryStore,
+    corpus: Corpus,
+    truth: np.ndarray,
+    k: int,
+    warmup: int = 10,
+) -> dict:
+    rows = {record.id: i for i, record in enumerate(corpus.records)}
+    for query in corpus.queries[:warmup]:
+        store.search(query, k=k)
+
+    latencies, recalls, reciprocal_ranks, ndcgs = [], [], [], []
+    for query, target, expected in zip(corpus.queries, corpus.targets, truth):
+        start = time.perf_counter()
+        results = store.search(query, k=k)
+        latencies.append(time.perf_counter() - start)
+        found = [rows[result.record.id] for result in results]
+        recalls.append(recall_at_k(found, expected))
+        reciprocal_ranks.append(reciprocal_rank(found, int(target)))
+        ndcgs.append(ndcg_at_k(found, expected))
+
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {
+        "latency_ms": {
+            "p50": round(float(p50), 4),
+            "p95": round(float(p95), 4),
+            "p99": round(float(p99), 4),
+            "mean": round(float(np.mean(latencies) * 1000), 4),
+        },
+        f"recall_at_{k}": round(float(np.mean(recalls)), 4),
+        "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+        f"ndcg_at_{k}": round(float(np.mean(ndcgs)), 4),
+    }
+
+
+def run_benchmark(args) -> dict:
+    results, corpora = [], []
+    for scale in args.scales:
+        if args.corpus == "synthetic":
+            corpus = synthetic_corpus(
+                scale,
+                args.dimensions,
+                args.queries,
+                seed=args.seed,
+                clusters=args.clusters,
+                spread=args.spread,
+                query_noise=args.query_noise,
+            )
+        else:
+            corpus = asyncio.run(messages_corpus(scale, args.queries, seed=args.seed))
+        size, dimensions = corpus.vectors.shape
+        logger.info(f"{corpus.name} corpus: {size} x {dimensions}")
+        truth = exact_neighbours(corpus.vectors, corpus.queries, args.k)
+        corpora.append(
+            {
+                "scale": scale,
+                "size": size,
+                "dimensions": dimensions,
+                "queries": len(corpus.queries),
+            }
+        )
+
+        for index, build_params, sweep in index_configs(args):
+            store = build_index(index, build_params, dimensions, size, args.seed)
+            start = time.perf_counter()
+            for i in range(0, size, args.batch_size):
+                store.add(
+                    corpus.records[i : i + args.batch_size],
+                    corpus.vectors[i : i + args.batch_size],
+                )
+            build_seconds = time.perf_counter() - start
+            memory_bytes = index_footprint(store)
+            logger.info(f"Built {index} {build_params} in {build_seconds:.1f}s")
+
+            for search_params in sweep:
+                for name, value in search_params.items():
+                    setattr(store, name, value)
+                results.append(
+                    {
+                        "scale": scale,
+                        "size": size,
+                        "index": index,
+                        "build_params": build_params,
+                        "search_params": search_params,
+                        "build_seconds": round(build_seconds, 4),
+                        "memory_bytes": memory_bytes,
+                        **evaluate(store, corpus, truth, args.k),
+                    }
+                )
+                logger.info(json.dumps(results[-1]))
+
+    return {
+        "corpus": args.corpus,
+        "k": args.k,
+        "seed": args.seed,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "corpora": corpora,
+        "results": results,
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--corpus", choices=("synthetic", "messages"), default="synthetic"
+    )
+    parser.add_argument("--scales", type=int, nargs="+", default=[10_000])
+    parser.add_argument("--dimensions", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=100)
+    parser.add_argument("--spread", type=float, default=2.0)
+    parser.add_argument("--query-noise", type=float, default=1.0)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument(
+        "--indexes",
+        nargs="+",
+        choices=("flat", "ivf", "hnsw"),
+        default=["flat", "ivf", "hnsw"],
+    )
+    parser.add_argument("--nlist", type=int, nargs="+", default=[256])
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--m", type=int, nargs="+", default=[16])
+    parser.add_argument("--ef-construction", type=int, default=100)
+    parser.add_argument("--ef-search", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    args = parse_args(argv)
+    report = json.dumps(run_benchmark(args), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
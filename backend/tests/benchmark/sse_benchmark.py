@@ -0,0 +1,168 @@
+"""Frame rate and CPU cost of chat stream framing.
+
+Runs many concurrent fake token streams through the per-token framing the
+chat stream used before (json.dumps per chunk, string concatenation) and
+through `coalesce_chunks` + `encode_event` at each coalescing window. Every
+frame is written to a local TCP connection, one write per frame as the
+server does, and one JSON document is printed with frames written,
+frames/sec, bytes and CPU time per token for each.
+
+Run from `backend/`:
+
+    python -m tests.benchmark.sse_benchmark --streams 500 --tokens 200 \\
+        --windows 0 0.02 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from typing import AsyncIterator
+
+from app.services.sse import coalesce_chunks, encode_event
+
+logger = logging.getLogger("sse_benchmark")
+
+TOKEN = "token "
+
+
+async def token_source(tokens: int, tokens_per_second: float) -> AsyncIterator[str]:
+    delay = 1 / tokens_per_second if tokens_per_second > 0 else 0
+    for _ in range(tokens):
+        await asyncio.sleep(delay)
+        yield TOKEN
+
+
+async def discard(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    while await reader.read(65536):
+        pass
+    writer.close()
+
+
+async def per_token_stream(
+    writer: asyncio.StreamWriter, tokens: int, tokens_per_second: float
+) -> tuple[int, int]:
+    """The framing `chat_stream` did before coalescing"""
+    frames = size = 0
+    full_response = ""
+    async for chunk in token_source(tokens, tokens_per_second):
+        full_response += chunk
+        frame = f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode()
+        writer.write(frame)
+        await writer.drain()
+        frames, size = frames + 1, size + len(frame)
+    return frames, size
+
+
+async def coalesced_stream(
+    writer: asyncio.StreamWriter,
+    tokens: int,
+    tokens_per_second: float,
+    window: float,
+    max_chars: int,
+) -> tuple[int, int]:
+    frames = size = 0
+    received = []
+    async for batch in coalesce_chunks(
+        token_source(tokens, tokens_per_second), window=window, max_chars=max_chars
+    ):
+        received.extend(batch)
+        frame = encode_event("".join(batch))
+        writer.write(frame)
+        await writer.drain()
+        frames, size = frames + 1, size + len(frame)
+    "".join(received)
+    return frames, size
+
+
+async def measure(args: argparse.Namespace, port: int, window: float | None) -> dict:
+    async def stream() -> tuple[int, int]:
+        _, writer = await asyncio.open_connection("127.0.0.1", port)
+        try:
+            if window is None:
+                return await per_token_stream(
+                    writer, args.tokens, args.tokens_per_second
+                )
+            return await coalesced_stream(
+                writer, args.tokens, args.tokens_per_second, window, args.max_chars
+            )
+        finally:
+            writer.close()
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    results = await asyncio.gather(*(stream() for _ in range(args.streams)))
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+
+    frames = sum(frames for frames, _ in results)
+    size = sum(size for _, size in results)
+    tokens = args.streams * args.tokens
+    return {
+        "framing": "per_token" if window is None else "coalesced",
+        "window": window,
+        "frames": frames,
+        "frames_per_second": round(frames / wall, 1),
+        "tokens_per_frame": round(tokens / frames, 2),
+        "bytes": size,
+        "wall_seconds": round(wall, 4),
+        "cpu_us_per_token": round(cpu / tokens * 1e6, 3),
+    }
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict:
+    server = await asyncio.start_server(discard, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        results = []
+        for window in [None, *args.windows]:
+            results.append(await measure(args, port, window))
+            logger.info(json.dumps(results[-1]))
+    finally:
+        server.close()
+        await server.wait_closed()
+    return {
+        "streams": args.streams,
+        "tokens": args.tokens,
+        "tokens_per_second": args.tokens_per_second,
+        "max_chars": args.max_chars,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument(
+        "--tokens-per-second",
+        type=float,
+        default=100.0,
+        help="per stream; 0 streams as fast as possible",
+    )
+    parser.add_argument("--windows", type=float, nargs="+", default=[0.0, 0.02, 0.05])
+    parser.add_argument("--max-chars", type=int, default=4096)
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    args = parse_args(argv)
+    report = json.dumps(asyncio.run(run_benchmark(args)), indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,12 @@ TestAsyncSessionLocal = async_sessionmaker(
 )
 
 
+@pytest_asyncio.fixture(scope="function")
+async def session_factory() -> async_sessionmaker[AsyncSession]:
+    """Session factory for components that open their own sessions"""
+    return TestAsyncSessionLocal
+
+
 @pytest_asyncio.fixture(scope="function")
 async def db_session() -> AsyncGenerator[AsyncSession, None]:
     """Session for direct CRUD tests (not through API)"""
@@ -0,0 +1,169 @@
+import asyncio
+import time
+from uuid import UUID, uuid4
+
+import pytest
+
+from app import main
+from app.core.exceptions import LLMAdmissionError
+from app.crud import message as message_crud
+from app.services.admission import AdmissionController
+from app.services.context_builder import get_prompt_budget
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_queues_until_release():
+    controller = AdmissionController(max_concurrency=1)
+    first = await controller.acquire("a")
+
+    second = asyncio.ensure_future(controller.acquire("b"))
+    await asyncio.sleep(0.01)
+    assert not second.done()
+    assert controller.waiting == 1
+
+    first.release()
+    first.release()  # idempotent
+    (await second).release()
+    assert controller.active == 0
+    assert controller.waiting == 0
+
+
+@pytest.mark.asyncio
+async def test_sessions_are_served_round_robin():
+    controller = AdmissionController(max_concurrency=1)
+    holder = await controller.acquire("busy")
+    admitted = []
+
+    async def call(key):
+        admission = await controller.acquire(key)
+        admitted.append(key)
+        await asyncio.sleep(0)
+        admission.release()
+
+    tasks = [asyncio.ensure_future(call(key)) for key in ["busy"] * 3 + ["quiet"]]
+    await asyncio.sleep(0.01)
+    holder.release()
+    await asyncio.gather(*tasks)
+
+    assert admitted == ["busy", "quiet", "busy", "busy"]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_and_timeouts_fail_fast():
+    controller = AdmissionController(
+        max_concurrency=1, queue_size=1, queue_timeout=0.05
+    )
+    holder = await controller.acquire("a")
+    waiting = asyncio.ensure_future(controller.acquire("b"))
+    await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    with pytest.raises(LLMAdmissionError) as rejected:
+        await controller.acquire("c")
+    assert time.perf_counter() - start < 0.01
+    assert rejected.value.retry_after >= 1
+
+    with pytest.raises(LLMAdmissionError, match="Timed out"):
+        await waiting
+    assert controller.waiting == 0
+    holder.release()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    controller = AdmissionController(max_concurrency=1)
+    holder = await controller.acquire("a")
+    waiting = asyncio.ensure_future(controller.acquire("b"))
+    await asyncio.sleep(0)
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    holder.release()
+
+    assert controller.waiting == 0
+    assert controller.active == 0
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_calls():
+    # One token per second; the first call drains the bucket
+    controller = AdmissionController(tokens_per_minute=60)
+    (await controller.acquire("a", cost=60)).release()
+
+    start = time.perf_counter()
+    (await controller.acquire("a", cost=0.1)).release()
+
+    assert 0.08 < time.perf_counter() - start < 0.5
+
+
+@pytest.mark.asyncio
+async def test_chat_is_rejected_with_retry_after(client, monkeypatch):
+    controller = AdmissionController(max_concurrency=1, queue_size=0)
+    monkeypatch.setattr(main, "llm_admission", controller)
+    holder = await controller.acquire("other")
+    session_id = (await client.post("/sessions")).json()["id"]
+
+    try:
+        for path in ("/chat", "/chat/stream"):
+            response = await client.post(
+                path, json={"session_id": session_id, "message": "Hi"}
+            )
+            assert response.status_code == 429
+            assert int(response.headers["Retry-After"]) >= 1
+    finally:
+        holder.release()
+
+
+@pytest.mark.asyncio
+async def test_rejected_chat_writes_no_message(client, db_session, monkeypatch):
+    controller = AdmissionController(max_concurrency=1, queue_size=0)
+    monkeypatch.setattr(main, "llm_admission", controller)
+    holder = await controller.acquire("other")
+    session_id = (await client.post("/sessions")).json()["id"]
+
+    try:
+        for path in ("/chat", "/chat/stream"):
+            response = await client.post(
+                path, json={"session_id": session_id, "message": "Hi"}
+            )
+            assert response.status_code == 429
+        await main.message_write_queue.flush()
+    finally:
+        holder.release()
+
+    count = await message_crud.count_messages_by_session(db_session, UUID(session_id))
+    assert count == 0
+
+
+class RecordingController(AdmissionController):
+    """Records what each call would be charged, then turns it away"""
+
+    def __init__(self):
+        super().__init__()
+        self.costs = []
+
+    async def acquire(self, key, cost=0):
+        self.costs.append(cost)
+        raise LLMAdmissionError("Recorded", 1)
+
+
+@pytest.mark.asyncio
+async def test_chat_is_charged_its_estimated_size(client, monkeypatch):
+    controller = RecordingController()
+    monkeypatch.setattr(main, "llm_admission", controller)
+    monkeypatch.setattr(main.settings, "memory_enabled", False)
+    session_id = (await client.post("/sessions")).json()["id"]
+
+    response = await client.post(
+        "/chat", json={"session_id": session_id, "message": "Hi"}
+    )
+    assert response.status_code == 429
+    # An unknown session is turned away before admission
+    response = await client.post(
+        "/chat", json={"session_id": str(uuid4()), "message": "Hi"}
+    )
+    assert response.status_code == 404
+
+    [cost] = controller.costs
+    assert cost < get_prompt_budget() / 2 + main.settings.llm_max_tokens
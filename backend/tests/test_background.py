@@ -0,0 +1,42 @@
+import asyncio
+
+import pytest
+
+from app.services.background import PeriodicTask
+
+
+@pytest.mark.asyncio
+async def test_periodic_task_keeps_running_after_a_failure():
+    calls = []
+
+    async def run():
+        calls.append(len(calls))
+        if len(calls) == 1:
+            raise RuntimeError("first run fails")
+
+    task = PeriodicTask(run, interval=0.01, description="Test run", immediate=True)
+    task.start()
+    task.start()  # already running
+    await asyncio.sleep(0.05)
+    await task.stop()
+
+    assert len(calls) >= 2
+    assert not task.running
+    count = len(calls)
+    await asyncio.sleep(0.03)
+    assert len(calls) == count
+
+
+@pytest.mark.asyncio
+async def test_periodic_task_waits_an_interval_unless_immediate():
+    calls = []
+
+    async def run():
+        calls.append(True)
+
+    task = PeriodicTask(run, interval=10, description="Test run")
+    task.start()
+    await asyncio.sleep(0.02)
+    await task.stop()
+
+    assert calls == []
@@ -0,0 +1,87 @@
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.crud import message as message_crud
+from app.crud import session as session_crud
+from app.services import chat_pipeline
+from app.services.embeddings import HashingEmbeddings
+from app.services.memory_store.base import MemoryRecord
+from app.services.memory_store.numpy_store import NumpyMemoryStore
+
+
+@pytest.fixture
+def memory(monkeypatch, session_factory):
+    embeddings = HashingEmbeddings(dimensions=64)
+    store = NumpyMemoryStore(64)
+    monkeypatch.setattr(settings, "memory_enabled", True)
+    monkeypatch.setattr(chat_pipeline, "get_embeddings", lambda: embeddings)
+    monkeypatch.setattr(chat_pipeline, "get_memory_store", lambda: store)
+    monkeypatch.setattr(chat_pipeline, "AsyncSessionLocal", session_factory)
+    return embeddings, store
+
+
+@pytest.mark.asyncio
+async def test_prepare_turn_adds_memories_outside_history(
+    db_session, memory, monkeypatch
+):
+    embeddings, store = memory
+    monkeypatch.setattr(settings, "chat_history_window", 2)
+    session = await session_crud.create_session(db_session)
+    contents = ["My cat is called Miso", "Nice name", "What is the weather", "Sunny"]
+    values = [
+        message_crud.build_message_values(session.id, "user", content)
+        for content in contents
+    ]
+    await message_crud.create_messages(db_session, values)
+    store.add(
+        [
+            MemoryRecord(
+                v["id"], v["session_id"], v["role"], v["content"], v["created_at"]
+            )
+            for v in values
+        ],
+        np.array(embeddings.embed_documents(contents)),
+    )
+
+    touch, touched = store.touch, []
+
+    def locked_touch(ids, at=None):
+        touched.append(store.lock.locked())
+        touch(ids, at)
+
+    monkeypatch.setattr(store, "touch", locked_touch)
+
+    turn = await chat_pipeline.prepare_turn(
+        db_session, session.id, "what is my cat called"
+    )
+
+    assert [m["content"] for m in turn.history] == ["What is the weather", "Sunny"]
+    assert turn.memories[0]["content"] == "My cat is called Miso"
+    history_ids = {m["id"] for m in turn.history}
+    assert not history_ids & {m["id"] for m in turn.memories}
+    # Usage is recorded under the store lock
+    assert touched == [True]
+    assert store.get(turn.memories[0]["id"]).hits == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_retrieval_degrades_without_delaying_turn(
+    db_session, memory, monkeypatch
+):
+    async def slow_retrieval(session_id, query):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(chat_pipeline, "retrieve_memories", slow_retrieval)
+    monkeypatch.setattr(settings, "memory_retrieval_timeout", 0.05)
+    session = await session_crud.create_session(db_session)
+
+    start = time.perf_counter()
+    turn = await chat_pipeline.prepare_turn(db_session, session.id, "Hello")
+
+    assert time.perf_counter() - start < 1
+    assert turn.memories == []
+    assert turn.message["content"] == "Hello"
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from pybreaker import CircuitBreaker, CircuitBreakerError
+
+from app.services.circuit_breaker import BreakerCall
+
+# BreakerCall relies on these pybreaker internals; an upgrade that changes
+# them should fail here rather than quietly skew breaker accounting.
+
+
+def test_breaker_internals_are_where_breaker_call_expects_them():
+    breaker = CircuitBreaker(fail_max=2, reset_timeout=60)
+
+    with breaker._lock:
+        # Re-entrant: the state methods below take it again
+        with breaker._lock:
+            breaker.state.before_call(lambda: None)
+
+    breaker.state._handle_error(ValueError("down"), reraise=False)
+    assert breaker.fail_counter == 1
+    breaker.state._handle_success()
+    assert breaker.fail_counter == 0
+
+    breaker.state._handle_error(ValueError("down"), reraise=False)
+    with pytest.raises(CircuitBreakerError):
+        breaker.state._handle_error(ValueError("down"), reraise=False)
+    assert breaker.current_state == "open"
+    with pytest.raises(CircuitBreakerError):
+        breaker.state.before_call(lambda: None)
+
+
+def test_breaker_call_reports_outcomes():
+    breaker = CircuitBreaker(fail_max=2, reset_timeout=60)
+
+    error = ValueError("down")
+    assert BreakerCall(breaker).finish(error) is error
+    assert breaker.fail_counter == 1
+
+    BreakerCall(breaker).finish(asyncio.CancelledError())
+    assert breaker.fail_counter == 1
+
+    assert BreakerCall(breaker).finish() is None
+    assert breaker.fail_counter == 0
+
+    BreakerCall(breaker).finish(error)
+    tripped = BreakerCall(breaker).finish(error)
+    assert isinstance(tripped, CircuitBreakerError)
+    with pytest.raises(CircuitBreakerError):
+        BreakerCall(breaker)
+
+
+def test_breaker_call_is_the_half_open_trial_after_the_timeout():
+    breaker = CircuitBreaker(fail_max=1, reset_timeout=0)
+    BreakerCall(breaker).finish(ValueError("down"))
+    assert breaker.current_state == "open"
+
+    call = BreakerCall(breaker)
+    assert breaker.current_state == "half-open"
+    # Half-opening records nothing until the call itself ends
+    assert breaker.fail_counter == 1
+    call.finish(asyncio.CancelledError())
+    assert breaker.current_state == "half-open"
+
+    BreakerCall(breaker).finish()
+    assert breaker.current_state == "closed"
@@ -0,0 +1,86 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.core.tokens import count_tokens
+from app.services.context_builder import (
+    MESSAGE_OVERHEAD_TOKENS,
+    build_context,
+    estimate_request_tokens,
+    get_prompt_budget,
+)
+
+
+def test_count_tokens():
+    assert count_tokens("") == 0
+    assert count_tokens("Hello, how are you?") > 0
+    assert count_tokens("Hello " * 100) > count_tokens("Hello")
+
+
+def test_build_context_keeps_full_history_within_budget():
+    history = [
+        {"role": "user", "content": "Hi"},
+        {"role": "assistant", "content": "Hello!"},
+    ]
+    messages = build_context("How are you?", history, "system", budget=1000)
+
+    assert isinstance(messages[0], SystemMessage)
+    assert isinstance(messages[1], HumanMessage)
+    assert isinstance(messages[2], AIMessage)
+    assert messages[-1].content == "How are you?"
+    assert len(messages) == 4
+
+
+def test_build_context_drops_oldest_history_over_budget():
+    history = [
+        {"role": "user", "content": "old", "token_count": 100},
+        {"role": "assistant", "content": "middle", "token_count": 10},
+        {"role": "user", "content": "recent", "token_count": 10},
+    ]
+    fixed = MESSAGE_OVERHEAD_TOKENS * 2 + count_tokens("system") + count_tokens("q")
+    budget = fixed + 2 * (10 + MESSAGE_OVERHEAD_TOKENS)
+
+    messages = build_context("q", history, "system", budget=budget)
+
+    assert [m.content for m in messages] == ["system", "middle", "recent", "q"]
+
+
+def test_prompt_budget_leaves_room_for_completion(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "llm_context_budget", 100000)
+    monkeypatch.setattr(settings, "llm_context_window", 16000)
+    monkeypatch.setattr(settings, "llm_max_tokens", 1000)
+
+    assert get_prompt_budget() == 15000
+
+
+def test_build_context_adds_memories_to_system_prompt(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "llm_memory_budget", 20)
+    memories = [
+        {"role": "user", "content": "My cat is called Miso"},
+        {"role": "user", "content": "word " * 50},
+    ]
+
+    messages = build_context("q", [], "system", budget=1000, memories=memories)
+
+    assert messages[0].content.startswith("system\n\n")
+    assert "- user: My cat is called Miso" in messages[0].content
+    assert "word" not in messages[0].content
+
+
+def test_estimate_request_tokens_from_stored_counts(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "llm_memory_budget", 50)
+    monkeypatch.setattr(settings, "llm_max_tokens", 1000)
+    history = [{"id": 1, "token_count": 30}, {"id": 2, "token_count": 20}]
+    fixed = 2 * MESSAGE_OVERHEAD_TOKENS + count_tokens("system") + count_tokens("q")
+
+    estimate = estimate_request_tokens("q", history, "system", memory_tokens=500)
+
+    assert estimate == fixed + 50 + 2 * MESSAGE_OVERHEAD_TOKENS + 50 + 1000
+
+    history.append({"id": 3, "token_count": 10**6})
+    estimate = estimate_request_tokens("q", history, "system")
+    assert estimate == get_prompt_budget() + 1000
@@ -0,0 +1,60 @@
+from copy import deepcopy
+
+import pytest
+from prometheus_client import REGISTRY
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import InstrumentedAsyncQueuePool
+
+
+def _checkout_count() -> float:
+    return REGISTRY.get_sample_value("memocha_db_pool_checkout_seconds_count") or 0
+
+
+def _query_count() -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "memocha_db_query_seconds_count", {"operation": "SELECT"}
+        )
+        or 0
+    )
+
+
+@pytest.mark.asyncio
+async def test_instrumented_pool_records_checkouts():
+    engine = create_async_engine(
+        settings.database_url, poolclass=InstrumentedAsyncQueuePool, pool_size=1
+    )
+    before = _checkout_count()
+    try:
+        async with engine.connect() as conn:
+            assert engine.pool.checkedout() == 1
+            await conn.execute(text("SELECT 1"))
+        assert engine.pool.checkedout() == 0
+    finally:
+        await engine.dispose()
+
+    assert _checkout_count() == before + 1
+
+
+@pytest.mark.asyncio
+async def test_failed_query_leaves_no_timer_behind():
+    try:
+        async with database.engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            info = deepcopy(conn.sync_connection.info)
+
+            with pytest.raises(DBAPIError):
+                await conn.execute(text("SELECT * FROM no_such_table"))
+            await conn.rollback()
+            assert conn.sync_connection.info == info
+
+            before = _query_count()
+            await conn.execute(text("SELECT 1"))
+            assert _query_count() == before + 1
+    finally:
+        await database.engine.dispose()
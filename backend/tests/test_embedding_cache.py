@@ -0,0 +1,60 @@
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.services.embedding_cache import CachedEmbeddings
+from app.services.embeddings import HashingEmbeddings
+from app.services.vector_codec import decode_vector, encode_vector
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    def __init__(self):
+        super().__init__(dimensions=64)
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+@pytest.mark.parametrize("encoding,size", [("float16", 128), ("int8", 64)])
+def test_vector_codec_round_trip(encoding, size):
+    vector = np.random.default_rng(0).normal(size=64).astype(np.float32)
+
+    data, scale = encode_vector(vector, encoding)
+    decoded = decode_vector(data, encoding, scale)
+
+    assert len(data) == size
+    cosine = decoded @ vector / (np.linalg.norm(decoded) * np.linalg.norm(vector))
+    assert cosine > 0.999
+
+
+@pytest.mark.asyncio
+async def test_cache_checks_memory_then_database(session_factory):
+    namespace = f"test-{uuid4()}"
+    model = CountingEmbeddings()
+    cache = CachedEmbeddings(model, namespace, session_factory=session_factory)
+
+    first = await cache.aembed_documents(
+        ["Hello, how are you?", "Hi", "Hello,  how are you? "]
+    )
+    assert model.embedded == ["Hello, how are you?", "Hi"]
+    assert first[0] == first[2]
+
+    await cache.aembed_query("Hi")
+    assert len(model.embedded) == 2
+
+    fresh_model = CountingEmbeddings()
+    restarted = CachedEmbeddings(
+        fresh_model, namespace, session_factory=session_factory
+    )
+    vector = await restarted.aembed_query("Hello, how are you?")
+    assert fresh_model.embedded == []
+    np.testing.assert_allclose(vector, first[0], atol=1e-3)
+
+    other = CachedEmbeddings(
+        fresh_model, f"{namespace}-v2", session_factory=session_factory
+    )
+    await other.aembed_query("Hi")
+    assert fresh_model.embedded == ["Hi"]
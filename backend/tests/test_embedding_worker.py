@@ -0,0 +1,179 @@
+import asyncio
+from datetime import timedelta
+
+import httpx
+import pytest
+from openai import APIConnectionError
+from prometheus_client import REGISTRY
+from tenacity import wait_none
+
+from app.crud import embedding_dead_letter as dead_letter_crud
+from app.crud import message as message_crud
+from app.crud import session as session_crud
+from app.services.circuit_breaker import embedding_circuit_breaker
+from app.services.embedding_worker import EmbeddingWorker
+from app.services.embeddings import HashingEmbeddings
+from app.services.memory_store.numpy_store import NumpyMemoryStore
+
+
+class RecordingEmbeddings(HashingEmbeddings):
+    def __init__(self, fail: bool = False):
+        super().__init__(dimensions=64)
+        self.fail = fail
+        self.batches = []
+
+    def embed_documents(self, texts):
+        if self.fail:
+            raise ValueError("embedding backend down")
+        self.batches.append(len(texts))
+        return super().embed_documents(texts)
+
+
+async def create_messages(db_session, count: int) -> list[dict]:
+    session = await session_crud.create_session(db_session)
+    values = [
+        message_crud.build_message_values(session.id, "user", f"Message number {i}")
+        for i in range(count)
+    ]
+    await message_crud.create_messages(db_session, values)
+    return values
+
+
+@pytest.mark.asyncio
+async def test_worker_batches_by_count_and_tokens(db_session, session_factory):
+    messages = await create_messages(db_session, 5)
+    embeddings = RecordingEmbeddings()
+    store = NumpyMemoryStore(64)
+    worker = EmbeddingWorker(
+        embeddings_factory=lambda: embeddings,
+        store_factory=lambda: store,
+        session_factory=session_factory,
+        batch_size=10,
+        max_batch_tokens=3 * messages[0]["token_count"],
+        flush_interval=0.05,
+    )
+
+    worker.submit(messages)
+    await worker.stop()
+
+    assert embeddings.batches == [3, 2]
+    assert len(store) == 5
+    top = store.search(embeddings.embed_query("Message number 4"), k=1)
+    assert top[0].record.id == messages[4]["id"]
+
+
+@pytest.mark.asyncio
+async def test_failed_batches_are_dead_lettered_and_replayed(
+    db_session, session_factory
+):
+    messages = await create_messages(db_session, 3)
+    embeddings = RecordingEmbeddings(fail=True)
+    store = NumpyMemoryStore(64)
+    worker = EmbeddingWorker(
+        embeddings_factory=lambda: embeddings,
+        store_factory=lambda: store,
+        session_factory=session_factory,
+        flush_interval=0.01,
+    )
+
+    try:
+        worker.submit(messages)
+        await worker.flush()
+    finally:
+        embedding_circuit_breaker.close()
+    assert len(store) == 0
+
+    embeddings.fail = False
+    assert await worker.replay_dead_letters() == 3
+    await worker.stop()
+
+    assert len(store) == 3
+    assert await worker.replay_dead_letters() == 0
+
+
+@pytest.mark.asyncio
+async def test_dead_letters_are_replayed_periodically(db_session, session_factory):
+    messages = await create_messages(db_session, 2)
+    await dead_letter_crud.record_dead_letters(db_session, messages, "earlier outage")
+    store = NumpyMemoryStore(64)
+    worker = EmbeddingWorker(
+        embeddings_factory=lambda: RecordingEmbeddings(),
+        store_factory=lambda: store,
+        session_factory=session_factory,
+        flush_interval=0.01,
+        replay_interval=0.05,
+    )
+
+    worker.start()
+    for _ in range(100):
+        if all(values["id"] in store for values in messages):
+            break
+        await asyncio.sleep(0.02)
+    await worker.stop()
+
+    assert all(values["id"] in store for values in messages)
+
+
+async def claim_ids(db_session, **kwargs) -> set:
+    return {
+        m["id"] for m in await dead_letter_crud.claim_dead_letters(db_session, **kwargs)
+    }
+
+
+@pytest.mark.asyncio
+async def test_claimed_dead_letters_wait_out_their_lease(db_session):
+    messages = await create_messages(db_session, 2)
+    ids = {values["id"] for values in messages}
+    await dead_letter_crud.record_dead_letters(db_session, messages, "outage")
+
+    assert ids <= await claim_ids(db_session)
+    # The replay died before embedding them: the rows are still there, and
+    # come back once the lease has passed
+    assert not ids & await claim_ids(db_session)
+    assert ids <= await claim_ids(db_session, lease=timedelta(0))
+
+    await dead_letter_crud.resolve_dead_letters(db_session, list(ids))
+    assert not ids & await claim_ids(db_session, lease=timedelta(0))
+
+
+@pytest.mark.asyncio
+async def test_dead_letters_are_parked_after_max_attempts(db_session):
+    messages = await create_messages(db_session, 1)
+    message_id = messages[0]["id"]
+    for _ in range(3):
+        await dead_letter_crud.record_dead_letters(db_session, messages, "bad input")
+
+    assert message_id not in await claim_ids(db_session, max_attempts=3)
+    assert message_id in await claim_ids(db_session, max_attempts=4)
+    await dead_letter_crud.resolve_dead_letters(db_session, [message_id])
+
+
+@pytest.mark.asyncio
+async def test_embedding_retries_have_their_own_metric(monkeypatch):
+    monkeypatch.setattr(EmbeddingWorker._embed.retry, "wait", wait_none())
+    embeddings = RecordingEmbeddings()
+    calls = []
+
+    async def flaky(texts):
+        calls.append(texts)
+        if len(calls) == 1:
+            raise APIConnectionError(request=httpx.Request("POST", "http://test"))
+        return embeddings.embed_documents(texts)
+
+    embeddings.aembed_documents = flaky
+    worker = EmbeddingWorker(embeddings_factory=lambda: embeddings)
+
+    def retries(metric, labels):
+        return REGISTRY.get_sample_value(metric, labels) or 0
+
+    embedding = ("memocha_embedding_retries_total", {"error": "APIConnectionError"})
+    llm = (
+        "memocha_llm_retries_total",
+        {"operation": "_embed", "error": "APIConnectionError"},
+    )
+    before = retries(*embedding), retries(*llm)
+
+    assert len(await worker._embed(["Hello"])) == 1
+
+    assert retries(*embedding) == before[0] + 1
+    assert retries(*llm) == before[1]
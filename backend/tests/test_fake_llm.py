@@ -0,0 +1,83 @@
+import pytest
+from tenacity import wait_none
+
+from app.core.exceptions import (
+    LLMConnectionError,
+    LLMRateLimitError,
+    LLMServiceError,
+)
+from app.services.circuit_breaker import llm_circuit_breaker
+from app.services.fake_llm import FakeChatModel
+from app.services.llm_service import LLMService
+
+
+def make_fake(**kwargs) -> FakeChatModel:
+    return FakeChatModel(
+        responses=["Hello from the fake model"],
+        latency_distribution="fixed",
+        latency_median=0,
+        tokens_per_second=0,
+        seed=1,
+        **kwargs,
+    )
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_streams_through_service():
+    service = LLMService(make_fake())
+
+    chunks = [chunk async for chunk in service.stream_chat_with_history("Hi")]
+
+    assert len(chunks) == 5
+    assert "".join(chunks) == "Hello from the fake model"
+    assert await service.chat("Hi") == "Hello from the fake model"
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_rate_limits_are_retried(monkeypatch):
+    fake = make_fake(rate_limit_rate=1.0)
+    service = LLMService(fake)
+    monkeypatch.setattr(LLMService.invoke.retry, "wait", wait_none())
+    calls = []
+    fake_fail = fake.maybe_fail
+    monkeypatch.setattr(
+        FakeChatModel,
+        "maybe_fail",
+        lambda self: calls.append(1) or fake_fail(),
+    )
+
+    try:
+        with pytest.raises(LLMRateLimitError):
+            await service.chat("Hi")
+    finally:
+        llm_circuit_breaker.close()
+
+    assert len(calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_fake_llm_connection_errors_open_the_breaker(monkeypatch):
+    service = LLMService(make_fake(connection_error_rate=1.0))
+    monkeypatch.setattr(LLMService.invoke.retry, "wait", wait_none())
+
+    try:
+        for _ in range(llm_circuit_breaker.fail_max - 1):
+            with pytest.raises(LLMConnectionError):
+                await service.chat("Hi")
+        with pytest.raises(LLMServiceError, match="temporily unavailable"):
+            await service.chat("Hi")
+        assert llm_circuit_breaker.current_state == "open"
+    finally:
+        llm_circuit_breaker.close()
+
+
+def test_fake_llm_latency_distributions():
+    lognormal = FakeChatModel(
+        latency_distribution="lognormal", latency_median=0.5, seed=7
+    )
+    samples = sorted(lognormal.sample_latency() for _ in range(1000))
+
+    assert all(s > 0 for s in samples)
+    assert samples[500] == pytest.approx(0.5, rel=0.1)
+    assert samples[990] > 2 * samples[500]
+    assert make_fake().sample_latency() == 0
@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from app.core.exceptions import LLMConnectionError
+from app.services.circuit_breaker import create_circuit_breaker
+from app.services.fake_llm import FakeChatModel
+from app.services.hedging import HedgePolicy
+from app.services.llm_router import LLMBackend, LLMRouter
+from app.services.llm_service import LLMService
+
+
+def make_backend(name: str, latency: float, **kwargs) -> LLMBackend:
+    llm = FakeChatModel(
+        model_name=name,
+        responses=[f"Hello from {name}"],
+        latency_distribution="fixed",
+        latency_median=latency,
+        tokens_per_second=0,
+        seed=1,
+        **kwargs,
+    )
+    return LLMBackend(
+        name=name, llm=llm, breaker=create_circuit_breaker(f"test:{name}")
+    )
+
+
+def test_delay_follows_the_latency_percentile():
+    policy = HedgePolicy(percentile=0.9, min_delay=0.01, max_delay=5, min_samples=10)
+    assert policy.delay() == 5
+
+    for i in range(1, 101):
+        policy.observe(i / 100)
+
+    assert policy.delay() == pytest.approx(0.9, abs=0.01)
+
+
+def test_budget_caps_the_hedge_rate():
+    policy = HedgePolicy(budget=0.1, burst=1)
+    hedges = 0
+    for _ in range(100):
+        policy.credit()
+        hedges += policy.try_spend()
+
+    # The initial burst, then one per ten calls
+    assert hedges == 10
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_to_another_backend():
+    slow, fast = make_backend("slow", latency=5), make_backend("fast", latency=0)
+    service = LLMService(LLMRouter([slow, fast]), hedging=HedgePolicy(max_delay=0.05))
+
+    start = time.perf_counter()
+    assert await service.chat("Hi") == "Hello from fast"
+
+    assert time.perf_counter() - start < 1
+    # The losing call was cancelled without counting against its backend
+    assert slow.in_flight == fast.in_flight == 0
+    assert slow.breaker.fail_counter == 0
+
+
+@pytest.mark.asyncio
+async def test_fast_call_is_not_hedged():
+    fast, other = make_backend("fast", latency=0), make_backend("other", latency=0)
+    policy = HedgePolicy(max_delay=1, burst=1)
+    service = LLMService(LLMRouter([fast, other]), hedging=policy)
+
+    assert await service.chat("Hi") == "Hello from fast"
+    assert policy.try_spend()
+
+
+@pytest.mark.asyncio
+async def test_both_attempts_failing_raises(monkeypatch):
+    backends = [
+        make_backend("a", latency=0.1, connection_error_rate=1.0),
+        make_backend("b", latency=0.1, connection_error_rate=1.0),
+    ]
+    service = LLMService(LLMRouter(backends), hedging=HedgePolicy(max_delay=0.01))
+    monkeypatch.setattr(LLMService.invoke.retry, "stop", lambda retry_state: True)
+
+    with pytest.raises(LLMConnectionError):
+        await service.chat("Hi")
+    assert all(backend.in_flight == 0 for backend in backends)
@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from app.crud import message as message_crud
+from app.crud import session as session_crud
+from app.services.embeddings import HashingEmbeddings
+from app.services.hybrid_retrieval import hybrid_search, reciprocal_rank_fusion
+from app.services.memory_store.base import MemoryRecord
+from app.services.memory_store.numpy_store import NumpyMemoryStore
+
+
+async def seed(db_session, contents):
+    session = await session_crud.create_session(db_session)
+    values = [
+        message_crud.build_message_values(session.id, "user", content)
+        for content in contents
+    ]
+    await message_crud.create_messages(db_session, values)
+    return session, values
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d"]], k=60)
+
+    assert [key for key, _ in fused] == ["c", "a", "b", "d"]
+    assert fused[0][1] == pytest.approx(1 / 63 + 1 / 61)
+
+
+def test_lexical_query_keeps_only_words():
+    assert message_crud.lexical_query("Order ZX-4471, order!") == "order | zx | 4471"
+    assert message_crud.lexical_query("?! ...") is None
+
+
+@pytest.mark.asyncio
+async def test_search_messages_matches_exact_codes(db_session):
+    session, _ = await seed(
+        db_session,
+        [
+            "My order number is ZX-4471",
+            "The weather is lovely today",
+            "Ordering pizza tonight",
+        ],
+    )
+    other, _ = await seed(db_session, ["Another ZX-4471 elsewhere"])
+
+    rows = await message_crud.search_messages(
+        db_session, "what was ZX-4471 again?", session_id=session.id
+    )
+
+    assert [row.content for row in rows] == ["My order number is ZX-4471"]
+    assert rows[0].rank > 0
+
+
+@pytest.mark.asyncio
+async def test_search_messages_respects_time_filters(db_session):
+    session, values = await seed(db_session, ["Invoice 991 sent", "Invoice 991 paid"])
+    first = values[0]["created_at"]
+
+    rows = await message_crud.search_messages(
+        db_session,
+        "invoice 991",
+        session_id=session.id,
+        created_after=first + timedelta(microseconds=1),
+    )
+
+    assert [row.content for row in rows] == ["Invoice 991 paid"]
+    assert await message_crud.search_messages(db_session, "the of and") == []
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_fuses_vector_and_lexical_hits(db_session, session_factory):
+    contents = ["My cat is called Miso", "Locker code is 5521", "It rained again"]
+    session, values = await seed(db_session, contents)
+    embeddings = HashingEmbeddings(dimensions=64)
+    store = NumpyMemoryStore(64)
+    store.add(
+        [
+            MemoryRecord(
+                v["id"], v["session_id"], v["role"], v["content"], v["created_at"]
+            )
+            for v in values
+        ],
+        np.array(embeddings.embed_documents(contents)),
+    )
+
+    hybrid = await hybrid_search(
+        "what is my locker code",
+        k=3,
+        embeddings=embeddings,
+        store=store,
+        session_factory=session_factory,
+        session_id=session.id,
+    )
+
+    # Full-text search only matches the locker message, so it is the one hit
+    # both retrievers vote for
+    assert hybrid[0]["id"] == values[1]["id"]
+    assert hybrid[0]["score"] > hybrid[1]["score"]
+
+
+@pytest.mark.asyncio
+async def test_hybrid_search_survives_a_failing_retriever(db_session):
+    session, values = await seed(db_session, ["Locker code is 5521"])
+    embeddings = HashingEmbeddings(dimensions=64)
+    store = NumpyMemoryStore(64)
+    record = values[0]
+    store.add(
+        [
+            MemoryRecord(
+                record["id"],
+                record["session_id"],
+                record["role"],
+                record["content"],
+                record["created_at"],
+            )
+        ],
+        np.array(embeddings.embed_documents([record["content"]])),
+    )
+
+    def broken_factory():
+        raise RuntimeError("database down")
+
+    results = await hybrid_search(
+        "Locker code is 5521",
+        k=3,
+        embeddings=embeddings,
+        store=store,
+        session_factory=broken_factory,
+        session_id=session.id,
+    )
+
+    assert [m["id"] for m in results] == [record["id"]]
@@ -0,0 +1,151 @@
+import asyncio
+import random
+from collections import Counter
+
+import pytest
+from pybreaker import CircuitBreaker, CircuitBreakerError
+from tenacity import wait_none
+
+from app.core.exceptions import LLMServiceError
+from app.services.fake_llm import FakeChatModel
+from app.services.llm_router import LLMBackend, LLMRouter
+from app.services.llm_service import LLMService
+
+
+def make_backend(name: str, weight: float = 1.0, **kwargs) -> LLMBackend:
+    llm = FakeChatModel(
+        model_name=name,
+        responses=[f"Hello from {name}"],
+        latency_distribution="fixed",
+        latency_median=0,
+        tokens_per_second=0,
+        seed=1,
+        **kwargs,
+    )
+    breaker = CircuitBreaker(name=f"test:{name}", fail_max=2, reset_timeout=60)
+    return LLMBackend(name=name, llm=llm, breaker=breaker, weight=weight)
+
+
+async def fail(backend):
+    raise ValueError("backend failed")
+
+
+@pytest.fixture(autouse=True)
+def no_retry_wait(monkeypatch):
+    monkeypatch.setattr(LLMService.invoke.retry, "wait", wait_none())
+    monkeypatch.setattr(LLMService.open_stream.retry, "wait", wait_none())
+
+
+@pytest.mark.asyncio
+async def test_failing_backend_falls_back_and_opens_its_breaker():
+    broken = make_backend("broken", connection_error_rate=1.0)
+    healthy = make_backend("healthy")
+    service = LLMService(LLMRouter([broken, healthy]))
+
+    for _ in range(3):
+        assert await service.chat("Hi") == "Hello from healthy"
+
+    assert broken.breaker.current_state == "open"
+    assert healthy.breaker.current_state == "closed"
+    assert service.router.rank("invoke")[-1] is broken
+
+
+@pytest.mark.asyncio
+async def test_streams_fall_back_and_release_their_backend():
+    broken = make_backend("broken", connection_error_rate=1.0)
+    healthy = make_backend("healthy")
+    service = LLMService(LLMRouter([broken, healthy]))
+
+    chunks = [chunk async for chunk in service.stream_chat_with_history("Hi")]
+
+    assert "".join(chunks) == "Hello from healthy"
+    assert broken.in_flight == healthy.in_flight == 0
+    assert "stream" in healthy.latency
+
+
+@pytest.mark.asyncio
+async def test_all_backends_open_is_unavailable():
+    backends = [make_backend("a"), make_backend("b")]
+    for backend in backends:
+        backend.breaker.open()
+    service = LLMService(LLMRouter(backends))
+
+    with pytest.raises(LLMServiceError, match="temporily unavailable"):
+        await service.chat("Hi")
+
+
+def test_least_latency_weighs_in_flight_calls():
+    fast, slow = make_backend("fast"), make_backend("slow")
+    fast.latency["invoke"] = 1.0
+    slow.latency["invoke"] = 2.5
+    router = LLMRouter([slow, fast])
+
+    assert router.rank("invoke")[0] is fast
+    fast.in_flight = 2
+    assert router.rank("invoke")[0] is slow
+    # Each operation keeps its own average
+    assert router.rank("stream")[0] is slow
+
+
+def test_latency_is_a_moving_average():
+    backend = make_backend("a")
+    router = LLMRouter([backend], alpha=0.5)
+
+    router._observe(backend, "invoke", 1.0)
+    router._observe(backend, "invoke", 3.0)
+
+    assert backend.latency["invoke"] == pytest.approx(2.0)
+
+
+def test_weighted_policy_follows_weights():
+    heavy, light = make_backend("heavy", weight=3), make_backend("light", weight=1)
+    router = LLMRouter([heavy, light], policy="weighted", rng=random.Random(0))
+
+    firsts = Counter(router.rank("invoke")[0].name for _ in range(4000))
+
+    assert firsts["heavy"] / 4000 == pytest.approx(0.75, abs=0.03)
+
+
+async def cancel_call(router: LLMRouter) -> None:
+    async def hang(backend):
+        await asyncio.sleep(10)
+
+    call = asyncio.ensure_future(router.call("invoke", hang))
+    await asyncio.sleep(0.01)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_leaves_the_breaker_alone():
+    backend = make_backend("slow")
+    backend.breaker = CircuitBreaker(fail_max=3, reset_timeout=60)
+    router = LLMRouter([backend])
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            await router.call("invoke", fail)
+
+    await cancel_call(router)
+    assert backend.breaker.fail_counter == 2
+    assert backend.in_flight == 0
+
+    backend.breaker.half_open()
+    await cancel_call(router)
+    assert backend.breaker.current_state == "half-open"
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_lets_a_trial_through_after_the_timeout():
+    backend = make_backend("flaky")
+    backend.breaker = CircuitBreaker(fail_max=1, reset_timeout=0)
+    router = LLMRouter([backend])
+    with pytest.raises(CircuitBreakerError):
+        await router.call("invoke", fail)
+    assert backend.breaker.current_state == "open"
+
+    async def succeed(backend):
+        return "ok"
+
+    assert await router.call("invoke", succeed) == "ok"
+    assert backend.breaker.current_state == "closed"
@@ -0,0 +1,176 @@
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.services.memory_store.base import MemoryRecord
+from app.services.memory_store.hnsw_store import HNSWMemoryStore
+from app.services.memory_store.ivf_store import IVFMemoryStore
+from app.services.memory_store.numpy_store import NumpyMemoryStore
+
+DIM = 32
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def make_records(n: int, sessions: list) -> list[MemoryRecord]:
+    return [
+        MemoryRecord(
+            id=uuid4(),
+            session_id=sessions[i % len(sessions)],
+            role="user",
+            content=f"memory {i}",
+            created_at=START + timedelta(minutes=i),
+        )
+        for i in range(n)
+    ]
+
+
+def exact_top_k(vectors: np.ndarray, query: np.ndarray, k: int) -> list[int]:
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    return list(np.argsort(-(normalized @ query))[:k])
+
+
+@pytest.fixture(params=["numpy", "hnsw", "ivf"])
+def make_store(request, tmp_path):
+    def factory():
+        if request.param == "numpy":
+            return NumpyMemoryStore(DIM, path=str(tmp_path / "memory"))
+        if request.param == "ivf":
+            return IVFMemoryStore(
+                DIM, nlist=4, nprobe=4, train_size=16, exact_search_threshold=0, seed=0
+            )
+        return HNSWMemoryStore(DIM, m=8, ef_construction=64, seed=0)
+
+    return factory
+
+
+def test_search_applies_session_and_time_filters(make_store):
+    store = make_store()
+    sessions = [uuid4(), uuid4()]
+    records = make_records(40, sessions)
+    vectors = np.random.default_rng(0).normal(size=(40, DIM))
+    store.add(records, vectors)
+
+    results = store.search(vectors[4], k=3)
+    assert results[0].record.id == records[4].id
+    assert results[0].score == pytest.approx(1.0, abs=1e-5)
+
+    in_session = store.search(vectors[4], k=50, session_id=sessions[1])
+    assert len(in_session) == 20
+    assert {r.record.session_id for r in in_session} == {sessions[1]}
+
+    window = store.search(
+        vectors[4],
+        k=50,
+        created_after=START + timedelta(minutes=10),
+        created_before=START + timedelta(minutes=20),
+    )
+    assert sorted(r.record.content for r in window) == sorted(
+        f"memory {i}" for i in range(10, 20)
+    )
+    assert store.search(vectors[4], session_id=uuid4()) == []
+
+
+def test_delete_and_replace(make_store):
+    store = make_store()
+    records = make_records(10, [uuid4()])
+    vectors = np.eye(10, DIM)
+    store.add(records, vectors)
+
+    assert store.delete([records[0].id]) == 1
+    assert store.search(vectors[0], k=1)[0].record.id != records[0].id
+
+    store.add([records[1]], vectors[2:3])
+    top = store.search(vectors[2], k=2)
+    assert {r.record.id for r in top} == {records[1].id, records[2].id}
+    assert len(store) == 9
+
+
+def test_numpy_store_reopens_from_disk(tmp_path):
+    path = str(tmp_path / "memory")
+    store = NumpyMemoryStore(DIM, path=path)
+    records = make_records(100, [uuid4()])
+    vectors = np.random.default_rng(1).normal(size=(100, DIM))
+    store.add(records[:70], vectors[:70])
+    store.add(records[70:], vectors[70:])
+    store.delete([records[3].id])
+    store.flush()
+
+    reopened = NumpyMemoryStore(DIM, path=path)
+
+    assert len(reopened) == 99
+    assert reopened.get(records[3].id) is None
+    assert reopened.search(vectors[80], k=1)[0].record == records[80]
+
+
+def test_hnsw_recall_against_exact_search():
+    rng = np.random.default_rng(2)
+    vectors = rng.normal(size=(1000, DIM))
+    records = make_records(1000, [uuid4()])
+    store = HNSWMemoryStore(DIM, exact_search_threshold=0, seed=0)
+    store.add(records, vectors)
+
+    queries = rng.normal(size=(50, DIM))
+    hits = 0
+    for query in queries:
+        query /= np.linalg.norm(query)
+        expected = {records[i].id for i in exact_top_k(vectors, query, 10)}
+        hits += len(expected & {r.record.id for r in store.search(query, k=10)})
+
+    assert hits / (10 * len(queries)) >= 0.9
+
+
+def test_ivf_recall_against_exact_search():
+    rng = np.random.default_rng(3)
+    centers = rng.normal(size=(20, DIM))
+    vectors = centers[rng.integers(0, 20, 2000)] + 0.3 * rng.normal(size=(2000, DIM))
+    records = make_records(2000, [uuid4()])
+    store = IVFMemoryStore(DIM, nlist=20, nprobe=4, exact_search_threshold=0, seed=0)
+    store.add(records[:500], vectors[:500])
+    assert not store.trained
+    store.add(records[500:], vectors[500:])
+    assert store.trained
+
+    hits = 0
+    for i in rng.choice(2000, 50, replace=False):
+        query = vectors[i] / np.linalg.norm(vectors[i])
+        expected = {records[j].id for j in exact_top_k(vectors, query, 10)}
+        hits += len(expected & {r.record.id for r in store.search(query, k=10)})
+
+    assert hits / (10 * 50) >= 0.9
+
+
+def test_compact_drops_tombstones(make_store):
+    store = make_store()
+    records = make_records(60, [uuid4()])
+    vectors = np.random.default_rng(4).normal(size=(60, DIM))
+    store.add(records, vectors)
+    store.delete([record.id for record in records[::2]])
+
+    assert store.compact() == 30
+    assert store.tombstones == 0 and len(store) == 30
+    assert store.search(vectors[7], k=1)[0].record.id == records[7].id
+    assert store.search(vectors[8], k=1)[0].record.id != records[8].id
+
+
+def test_int8_store_scores_close_to_float(tmp_path):
+    records = make_records(200, [uuid4()])
+    vectors = np.random.default_rng(5).normal(size=(200, DIM))
+    exact = NumpyMemoryStore(DIM)
+    quantized = NumpyMemoryStore(DIM, path=str(tmp_path / "warm"), encoding="int8")
+    exact.add(records, vectors)
+    quantized.add(records, vectors)
+
+    expected = exact.search(vectors[3], k=5)
+    found = quantized.search(vectors[3], k=5)
+    assert found[0].record.id == records[3].id
+    assert [r.score for r in found] == pytest.approx(
+        [r.score for r in expected], abs=0.02
+    )
+
+    quantized.delete([record.id for record in records[:100]])
+    quantized.compact()
+    reopened = NumpyMemoryStore(DIM, path=str(tmp_path / "warm"), encoding="int8")
+    assert len(reopened) == 100
+    assert reopened.search(vectors[150], k=1)[0].record.id == records[150].id
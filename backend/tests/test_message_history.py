@@ -85,3 +85,27 @@ async def test_message_history_isolation(db_session):
     assert len(messages2) == 1
     assert messages1[0].session_id == session1.id
     assert messages2[0].session_id == session2.id
+
+
+@pytest.mark.asyncio
+async def test_message_history_keyset_pagination(db_session):
+    session = await session_crud.create_session(db_session)
+
+    for i in range(5):
+        await message_crud.create_message(
+            db=db_session, session_id=session.id, role="user", content=f"Message {i}"
+        )
+
+    page1 = await message_crud.get_messages_by_session(db_session, session.id, limit=2)
+    last = page1[-1]
+    page2 = await message_crud.get_messages_by_session(
+        db_session, session.id, limit=2, after=(last.created_at, last.id)
+    )
+    assert [m.content for m in page1] == ["Message 0", "Message 1"]
+    assert [m.content for m in page2] == ["Message 2", "Message 3"]
+
+    first = page2[0]
+    previous = await message_crud.get_messages_by_session(
+        db_session, session.id, limit=5, before=(first.created_at, first.id)
+    )
+    assert [m.content for m in previous] == ["Message 0", "Message 1"]
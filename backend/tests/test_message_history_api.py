@@ -107,3 +107,66 @@ async def test_get_message_history_invalid_session(client):
     fake_id = "00000000-0000-0000-0000-000000000000"
     response = await client.get(f"/sessions/{fake_id}/messages")
     assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_get_message_history_cursor_pagination(client, db_session):
+    session_response = await client.post("/sessions")
+    session_id = session_response.json()["id"]
+
+    session = await session_crud.get_session(db_session, UUID(session_id))
+    for i in range(5):
+        await message_crud.create_message(
+            db=db_session, session_id=session.id, role="user", content=f"Message {i}"
+        )
+    await db_session.commit()
+
+    contents = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["after"] = cursor
+        response = await client.get(f"/sessions/{session_id}/messages", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        contents.extend(m["content"] for m in data["messages"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    assert contents == [f"Message {i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_get_message_history_total_on_cursor_pages(client, db_session):
+    session_response = await client.post("/sessions")
+    session_id = session_response.json()["id"]
+
+    session = await session_crud.get_session(db_session, UUID(session_id))
+    for i in range(3):
+        await message_crud.create_message(
+            db=db_session, session_id=session.id, role="user", content=f"Message {i}"
+        )
+    await db_session.commit()
+    url = f"/sessions/{session_id}/messages"
+
+    first = (await client.get(url, params={"limit": 1})).json()
+    assert first["total"] == 3
+
+    params = {"limit": 1, "after": first["next_cursor"]}
+    assert (await client.get(url, params=params)).json()["total"] is None
+
+    params["include_total"] = True
+    assert (await client.get(url, params=params)).json()["total"] == 3
+
+
+@pytest.mark.asyncio
+async def test_get_message_history_invalid_cursor(client):
+    session_response = await client.post("/sessions")
+    session_id = session_response.json()["id"]
+
+    response = await client.get(
+        f"/sessions/{session_id}/messages", params={"after": "not-a-cursor"}
+    )
+    assert response.status_code == 400
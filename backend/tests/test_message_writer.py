@@ -0,0 +1,114 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.crud import message as message_crud
+from app.crud import session as session_crud
+from app.services.message_writer import MessageWriteQueue
+
+
+@pytest.mark.asyncio
+async def test_write_queue_persists_batched_messages(db_session, session_factory):
+    session = await session_crud.create_session(db_session)
+    queue = MessageWriteQueue(session_factory=session_factory, batch_size=10)
+
+    for i in range(5):
+        await queue.enqueue(session.id, "assistant", f"Reply {i}")
+    await queue.stop()
+
+    messages = await message_crud.get_messages_by_session(db_session, session.id)
+    assert [m.content for m in messages] == [f"Reply {i}" for i in range(5)]
+    assert all(m.token_count > 0 for m in messages)
+
+
+@pytest.mark.asyncio
+async def test_write_queue_writes_inline_when_full(db_session, session_factory):
+    session = await session_crud.create_session(db_session)
+    queue = MessageWriteQueue(
+        session_factory=session_factory, max_size=1, enqueue_timeout=0
+    )
+
+    for i in range(3):
+        await queue.enqueue(session.id, "assistant", f"Reply {i}")
+    await queue.stop()
+
+    count = await message_crud.count_messages_by_session(db_session, session.id)
+    assert count == 3
+
+
+@pytest.mark.asyncio
+async def test_write_queue_exposes_unflushed_messages(db_session, session_factory):
+    session = await session_crud.create_session(db_session)
+    queue = MessageWriteQueue(session_factory=session_factory, flush_interval=1.0)
+
+    await queue.enqueue(session.id, "assistant", "Not yet written")
+    history = queue.with_pending(session.id, [{"role": "user", "content": "Hi"}])
+    assert [m["content"] for m in history] == ["Hi", "Not yet written"]
+
+    await queue.stop()
+    assert queue.with_pending(session.id, []) == []
+
+
+@pytest.mark.asyncio
+async def test_write_queue_drops_only_rejected_rows(db_session, session_factory):
+    session = await session_crud.create_session(db_session)
+    queue = MessageWriteQueue(session_factory=session_factory, flush_interval=1.0)
+
+    for i in range(4):
+        await queue.enqueue(session.id, "assistant", f"Reply {i}")
+    # No such session: the foreign key rejects this row
+    await queue.enqueue(uuid4(), "assistant", "Orphan")
+    for i in range(4, 6):
+        await queue.enqueue(session.id, "assistant", f"Reply {i}")
+    await queue.stop()
+
+    messages = await message_crud.get_messages_by_session(db_session, session.id)
+    assert [m.content for m in messages] == [f"Reply {i}" for i in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_enqueue_is_not_pending(db_session, session_factory):
+    session = await session_crud.create_session(db_session)
+    queue = MessageWriteQueue(session_factory=session_factory, max_size=1, batch_size=1)
+    written = asyncio.Event()
+
+    async def write_batch(batch):
+        await written.wait()
+
+    # The worker holds the first message, the second fills the queue
+    queue._write_batch = write_batch
+    await queue.enqueue(session.id, "assistant", "Held")
+    await asyncio.sleep(0.01)
+    await queue.enqueue(session.id, "assistant", "Queued")
+
+    enqueue = asyncio.ensure_future(queue.enqueue(session.id, "assistant", "Lost"))
+    await asyncio.sleep(0.01)
+    assert len(queue.with_pending(session.id, [])) == 3
+    enqueue.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await enqueue
+
+    pending = queue.with_pending(session.id, [])
+    assert [m["content"] for m in pending] == ["Held", "Queued"]
+    await queue._worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_failing_on_written_keeps_the_writer_running(db_session, session_factory):
+    session = await session_crud.create_session(db_session)
+
+    def on_written(batch):
+        raise ValueError("embedding worker gone")
+
+    queue = MessageWriteQueue(
+        session_factory=session_factory, flush_interval=0.01, on_written=on_written
+    )
+
+    await queue.enqueue(session.id, "assistant", "First")
+    await queue.flush()
+    await queue.enqueue(session.id, "assistant", "Second")
+    await queue.stop()
+
+    messages = await message_crud.get_messages_by_session(db_session, session.id)
+    assert [m.content for m in messages] == ["First", "Second"]
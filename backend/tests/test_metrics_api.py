@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_exposes_route_latency(client):
+    await client.get("/health")
+    fake_id = "00000000-0000-0000-0000-000000000000"
+    await client.get(f"/sessions/{fake_id}")
+
+    response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert 'route="/health"' in body
+    assert 'route="/sessions/{session_id}",status="404"' in body
+    assert "memocha_sse_active_streams" in body
+    assert 'memocha_llm_circuit_breaker_state{breaker="llm"}' in body
@@ -0,0 +1,12 @@
+from app.core import observability
+from app.core.config import settings
+
+
+def test_tracing_disabled_without_keys(monkeypatch):
+    monkeypatch.setattr(settings, "langfuse_public_key", "")
+    monkeypatch.setattr(settings, "langfuse_secret_key", "")
+
+    observability.init_tracing()
+
+    assert observability.get_langfuse_handler() is None
+    observability.shutdown_tracing()
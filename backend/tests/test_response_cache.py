@@ -0,0 +1,79 @@
+import time
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from app.services.embeddings import HashingEmbeddings
+from app.services.fake_llm import FakeChatModel
+from app.services.llm_service import LLMService
+from app.services.response_cache import ResponseCache
+
+
+def conversation(question: str, history: tuple = ()) -> list:
+    return [SystemMessage(content="Be helpful"), *history, HumanMessage(question)]
+
+
+@pytest.mark.asyncio
+async def test_exact_hit_ignores_whitespace():
+    cache = ResponseCache()
+    lookup = await cache.lookup(conversation("What is Memocha?"))
+    assert lookup.result == "miss"
+    cache.store(lookup, "A chat app")
+
+    hit = await cache.lookup(conversation("  What is   Memocha? "))
+    assert (hit.result, hit.response) == ("exact_hit", "A chat app")
+    other = await cache.lookup(conversation("What is Memocha?"), namespace="gpt-x")
+    assert other.result == "miss"
+
+
+@pytest.mark.asyncio
+async def test_semantic_hit_requires_identical_context():
+    cache = ResponseCache(embeddings=HashingEmbeddings(), similarity_threshold=0.8)
+    cache.store(await cache.lookup(conversation("How do I reset my password?")), "A")
+
+    hit = await cache.lookup(conversation("how do i reset my password"))
+    assert (hit.result, hit.response) == ("semantic_hit", "A")
+
+    history = (HumanMessage("Hi"), AIMessage("Hello"))
+    miss = await cache.lookup(conversation("how do i reset my password", history))
+    assert miss.result == "miss"
+    unrelated = await cache.lookup(conversation("Tell me a joke about cats"))
+    assert unrelated.result == "miss"
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_lru_eviction(monkeypatch):
+    cache = ResponseCache(ttl=10, max_entries=2, embeddings=HashingEmbeddings())
+    for question in ("one", "two"):
+        cache.store(await cache.lookup(conversation(question)), question)
+    await cache.lookup(conversation("one"))
+    cache.store(await cache.lookup(conversation("three")), "three")
+
+    assert len(cache) == 2
+    assert (await cache.lookup(conversation("two"))).result == "miss"
+    assert (await cache.lookup(conversation("one"))).result == "exact_hit"
+
+    now = time.monotonic()
+    monkeypatch.setattr("app.services.response_cache.time.monotonic", lambda: now + 11)
+    assert (await cache.lookup(conversation("one"))).result == "miss"
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_streaming_replays_cached_answer(monkeypatch):
+    llm = FakeChatModel(
+        responses=["Cached answer here"], latency_distribution="fixed", latency_median=0
+    )
+    service = LLMService(llm, cache=ResponseCache())
+    calls = []
+    monkeypatch.setattr(
+        FakeChatModel, "maybe_fail", lambda self: calls.append(1), raising=True
+    )
+
+    first = [c async for c in service.stream_chat_with_history("Hi")]
+    second = [c async for c in service.stream_chat_with_history("Hi")]
+
+    assert "".join(second) == "".join(first) == "Cached answer here"
+    assert len(second) == 3
+    assert await service.chat_with_history("Hi") == "Cached answer here"
+    assert len(calls) == 1
@@ -0,0 +1,190 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from sqlalchemy import update
+
+from app.crud import embedding_cache as embedding_cache_crud
+from app.crud import message as message_crud
+from app.crud import session as session_crud
+from app.crud import session_summary as summary_crud
+from app.models.embedding_cache import EmbeddingCacheEntry
+from app.services.memory_store.base import MemoryRecord
+from app.services.memory_store.numpy_store import NumpyMemoryStore
+from app.services.memory_store.tiered_store import TieredMemoryStore
+from app.services.retention import RetentionEngine
+
+DIM = 16
+NOW = datetime(2026, 6, 1, tzinfo=timezone.utc)
+
+
+def record(session_id, age_days: float) -> MemoryRecord:
+    return MemoryRecord(
+        id=uuid4(),
+        session_id=session_id,
+        role="user",
+        content="memory",
+        created_at=NOW - timedelta(days=age_days),
+    )
+
+
+def tiered_store() -> TieredMemoryStore:
+    return TieredMemoryStore(
+        NumpyMemoryStore(DIM), NumpyMemoryStore(DIM, encoding="int8")
+    )
+
+
+def test_demoted_memories_stay_searchable():
+    store = tiered_store()
+    records = [record(uuid4(), 0) for _ in range(10)]
+    vectors = np.random.default_rng(0).normal(size=(10, DIM))
+    store.add(records, vectors)
+
+    assert store.demote([r.id for r in records[:5]]) == 5
+
+    assert len(store.hot) == 5 and len(store.warm) == 5
+    assert store.search(vectors[2], k=1)[0].record.id == records[2].id
+    assert store.search(vectors[7], k=1)[0].record.id == records[7].id
+
+
+@pytest.mark.asyncio
+async def test_run_once_demotes_evicts_and_compacts():
+    store = tiered_store()
+    active, idle = uuid4(), uuid4()
+    fresh = record(active, 1)
+    stale = record(active, 30)
+    ancient = record(idle, 200)
+    important = record(idle, 200)
+    important.hits = 5
+    records = [fresh, stale, ancient, important]
+    store.add(records, np.random.default_rng(1).normal(size=(4, DIM)))
+    engine = RetentionEngine(
+        store_factory=lambda: store,
+        hot_age=timedelta(days=7),
+        evict_age=timedelta(days=90),
+        keep_hits=3,
+        compact_ratio=0.1,
+    )
+
+    report = await engine.run_once(now=NOW)
+
+    assert report.evicted == 1 and report.demoted == 2
+    assert ancient.id not in store
+    assert fresh.id in store.hot
+    assert stale.id in store.warm and important.id in store.warm
+    # Both tiers were compacted, so no dead rows are left behind
+    assert report.compacted == 3
+    assert store.hot.tombstones == 0 and store.warm.tombstones == 0
+
+
+@pytest.mark.asyncio
+async def test_recent_use_keeps_memories_hot():
+    store = tiered_store()
+    old = record(uuid4(), 30)
+    store.add([old], np.ones((1, DIM)))
+    store.touch([old.id], at=NOW - timedelta(days=1))
+    engine = RetentionEngine(store_factory=lambda: store)
+
+    report = await engine.run_once(now=NOW)
+
+    assert report.demoted == 0 and old.id in store.hot
+
+
+@pytest.mark.asyncio
+async def test_run_once_waits_for_the_store_off_the_loop():
+    store = tiered_store()
+    store.add([record(uuid4(), 200)], np.ones((1, DIM)))
+    engine = RetentionEngine(store_factory=lambda: store, compact_ratio=0.1)
+
+    with store.lock:
+        run = asyncio.ensure_future(engine.run_once(now=NOW))
+        # The loop keeps running while retention waits for the lock
+        await asyncio.sleep(0.05)
+        assert not run.done()
+    report = await run
+
+    assert report.evicted == 1 and len(store) == 0
+
+
+@pytest.mark.asyncio
+async def test_only_summarized_messages_are_deleted(db_session, session_factory):
+    session = await session_crud.create_session(db_session)
+    values = [
+        message_crud.build_message_values(session.id, "user", f"Message {i}")
+        for i in range(4)
+    ]
+    await message_crud.create_messages(db_session, values)
+    unsummarized = await session_crud.create_session(db_session)
+    await message_crud.create_messages(
+        db_session,
+        [message_crud.build_message_values(unsummarized.id, "user", "Keep me")],
+    )
+    await summary_crud.save_summary(
+        db_session,
+        session.id,
+        summary="Early chat",
+        token_count=2,
+        covered_until=values[1]["created_at"],
+        covered_until_id=values[1]["id"],
+        previous_until_id=None,
+    )
+    store = NumpyMemoryStore(DIM)
+    store.add(
+        [
+            MemoryRecord(
+                v["id"], v["session_id"], v["role"], v["content"], v["created_at"]
+            )
+            for v in values
+        ],
+        np.random.default_rng(2).normal(size=(4, DIM)),
+    )
+    engine = RetentionEngine(
+        store_factory=lambda: store,
+        session_factory=session_factory,
+        message_age=timedelta(0),
+    )
+
+    report = await engine.run_once(now=datetime.now(timezone.utc))
+
+    # The shared test database may hold other summarized sessions
+    assert report.messages_deleted >= 2
+    remaining = await message_crud.get_messages_by_session(db_session, session.id)
+    assert [m.content for m in remaining] == ["Message 2", "Message 3"]
+    assert values[0]["id"] not in store and values[2]["id"] in store
+    assert (
+        await message_crud.count_messages_by_session(db_session, unsummarized.id) == 1
+    )
+
+
+@pytest.mark.asyncio
+async def test_old_cached_embeddings_are_deleted(db_session, session_factory):
+    old, recent = uuid4().hex, uuid4().hex
+    await embedding_cache_crud.put_cached_embeddings(
+        db_session,
+        [
+            {"content_hash": key, "encoding": "float32", "scale": 1.0, "vector": b""}
+            for key in (old, recent)
+        ],
+    )
+    now = datetime.now(timezone.utc)
+    await db_session.execute(
+        update(EmbeddingCacheEntry)
+        .where(EmbeddingCacheEntry.content_hash == old)
+        .values(created_at=now - timedelta(days=31))
+    )
+    await db_session.commit()
+    engine = RetentionEngine(
+        store_factory=lambda: NumpyMemoryStore(DIM),
+        session_factory=session_factory,
+        embedding_cache_age=timedelta(days=30),
+    )
+
+    report = await engine.run_once(now=now)
+
+    assert report.cache_entries_deleted >= 1
+    entries = await embedding_cache_crud.get_cached_embeddings(
+        db_session, [old, recent]
+    )
+    assert [entry.content_hash for entry in entries] == [recent]
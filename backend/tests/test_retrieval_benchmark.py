@@ -0,0 +1,57 @@
+import json
+
+import numpy as np
+import pytest
+from tests.benchmark import retrieval_benchmark as benchmark
+
+
+def test_ranking_metrics():
+    expected = np.array([7, 3, 5])
+
+    assert benchmark.recall_at_k([3, 9, 7], expected) == pytest.approx(2 / 3)
+    assert benchmark.reciprocal_rank([3, 9, 7], 7) == pytest.approx(1 / 3)
+    assert benchmark.reciprocal_rank([3, 9], 7) == 0.0
+    assert benchmark.ndcg_at_k([7, 3, 5], expected) == pytest.approx(1.0)
+    assert 0 < benchmark.ndcg_at_k([5, 3, 7], expected) < 1
+
+
+def test_benchmark_reports_every_configuration(tmp_path):
+    output = tmp_path / "results.json"
+    benchmark.main(
+        [
+            "--scales",
+            "1500",
+            "--dimensions",
+            "32",
+            "--queries",
+            "30",
+            "--nlist",
+            "16",
+            "--nprobe",
+            "2",
+            "16",
+            "--m",
+            "8",
+            "--ef-construction",
+            "32",
+            "--ef-search",
+            "32",
+            "--output",
+            str(output),
+        ]
+    )
+    report = json.loads(output.read_text())
+
+    configs = [(r["index"], r["search_params"]) for r in report["results"]]
+    assert configs == [
+        ("flat", {}),
+        ("ivf", {"nprobe": 2}),
+        ("ivf", {"nprobe": 16}),
+        ("hnsw", {"ef_search": 32}),
+    ]
+    flat, ivf_narrow, ivf_full, hnsw = report["results"]
+    assert flat["recall_at_10"] == 1.0 and flat["ndcg_at_10"] == 1.0
+    assert ivf_full["recall_at_10"] == 1.0
+    assert ivf_narrow["latency_ms"]["p50"] <= ivf_narrow["latency_ms"]["p99"]
+    assert hnsw["memory_bytes"] > flat["memory_bytes"] > 0
+    assert report["corpora"][0]["size"] == 1500
@@ -0,0 +1,86 @@
+from datetime import datetime
+from uuid import UUID
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from app.core.database import get_db
+from app.crud import session as session_crud
+from app.crud.pagination import encode_cursor
+from app.main import app
+
+
+@pytest.mark.asyncio
+async def test_get_sessions_cursor_pagination(client):
+    created = [(await client.post("/sessions")).json() for _ in range(3)]
+    cursors = [
+        encode_cursor(
+            datetime.fromisoformat(s["created_at"].replace("Z", "+00:00")),
+            UUID(s["id"]),
+        )
+        for s in created
+    ]
+
+    response = await client.get(
+        "/sessions",
+        params={
+            "limit": 2,
+            "after": cursors[0],
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert [s["id"] for s in data["sessions"]] == [s["id"] for s in created[1:]]
+    assert data["next_cursor"] is not None
+
+    response = await client.get(
+        "/sessions",
+        params={
+            "limit": 2,
+            "before": cursors[-1],
+        },
+    )
+    assert [s["id"] for s in response.json()["sessions"]] == [
+        s["id"] for s in created[:2]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_get_sessions_exact_total(db_session):
+    await session_crud.create_session(db_session)
+    # Serve the request from this test's transaction, in one snapshot, so the
+    # raw count below sees exactly the rows the endpoint counted
+    await db_session.connection(
+        execution_options={"isolation_level": "REPEATABLE READ"}
+    )
+    app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            response = await client.get(
+                "/sessions", params={"limit": 1, "total": "exact"}
+            )
+    finally:
+        app.dependency_overrides.clear()
+
+    count = await db_session.scalar(text("SELECT count(*) FROM sessions"))
+    assert count > 0
+    assert response.json()["total"] == count
+
+
+@pytest.mark.asyncio
+async def test_get_sessions_total_modes(client, db_session):
+    await client.post("/sessions")
+    exact = await db_session.scalar(text("SELECT count(*) FROM sessions"))
+
+    await db_session.execute(text("ANALYZE sessions"))
+    response = await client.get("/sessions", params={"limit": 1, "total": "estimate"})
+    assert response.json()["total"] == pytest.approx(exact, rel=0.1, abs=5)
+
+    response = await client.get("/sessions", params={"limit": 1, "total": "none"})
+    assert response.json()["total"] is None
+
+    response = await client.get("/sessions", params={"total": "approximate"})
+    assert response.status_code == 422
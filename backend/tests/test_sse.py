@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from app.services.sse import coalesce_chunks, encode_event
+
+
+async def tokens(*delays_and_chunks, error=None, closed=None):
+    try:
+        for delay, chunk in delays_and_chunks:
+            await asyncio.sleep(delay)
+            yield chunk
+        if error is not None:
+            raise error
+    finally:
+        if closed is not None:
+            closed.append(True)
+
+
+async def collect(chunks, **kwargs):
+    return [batch async for batch in coalesce_chunks(chunks, **kwargs)]
+
+
+def test_encode_event():
+    assert encode_event("héllo\n") == b'data: "h\xc3\xa9llo\\n"\n\n'
+    assert encode_event({"session_id": "s"}, event="complete") == (
+        b'event: complete\ndata: {"session_id":"s"}\n\n'
+    )
+
+
+@pytest.mark.asyncio
+async def test_first_chunk_alone_then_coalesced_by_window():
+    source = tokens((0, "a"), (0, "b"), (0, "c"), (0.1, "d"), (0, "e"))
+
+    assert await collect(source, window=0.05) == [["a"], ["b", "c"], ["d", "e"]]
+
+
+@pytest.mark.asyncio
+async def test_max_chars_flushes_early():
+    source = tokens(*((0, "xx") for _ in range(5)))
+
+    batches = await collect(source, window=10, max_chars=4)
+
+    assert batches[0] == ["xx"]
+    assert all(len("".join(batch)) >= 4 for batch in batches[1:-1])
+    assert "".join(sum(batches, [])) == "xx" * 5
+
+
+@pytest.mark.asyncio
+async def test_zero_window_passes_chunks_through():
+    source = tokens((0, "a"), (0, "b"), (0, "c"))
+
+    assert await collect(source, window=0) == [["a"], ["b"], ["c"]]
+
+
+@pytest.mark.asyncio
+async def test_buffered_chunks_are_flushed_before_the_error():
+    source = tokens((0, "a"), (0, "b"), (0, "c"), error=ConnectionError("gone"))
+    batches = []
+
+    with pytest.raises(ConnectionError):
+        async for batch in coalesce_chunks(source, window=10):
+            batches.append(batch)
+
+    assert batches == [["a"], ["b", "c"]]
+
+
+@pytest.mark.asyncio
+async def test_closing_early_closes_the_source():
+    closed = []
+    batches = coalesce_chunks(tokens((0, "a"), (10, "b"), closed=closed))
+
+    assert await anext(batches) == ["a"]
+    await batches.aclose()
+
+    assert closed == [True]
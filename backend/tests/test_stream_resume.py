@@ -0,0 +1,111 @@
+import pytest
+from pybreaker import CircuitBreaker
+
+from app.core.exceptions import LLMConnectionError
+from app.services.fake_llm import FakeChatModel
+from app.services.llm_router import LLMBackend, LLMRouter
+from app.services.llm_service import LLMService
+
+
+def make_model(**kwargs) -> FakeChatModel:
+    return FakeChatModel(
+        responses=["Hello there, world"],
+        latency_distribution="fixed",
+        latency_median=0,
+        tokens_per_second=0,
+        seed=1,
+        **kwargs,
+    )
+
+
+def make_service(
+    max_stream_resumes: int = 2, supports_prefill: bool = True, **kwargs
+) -> LLMService:
+    breaker = CircuitBreaker(name="test:stream", fail_max=3, reset_timeout=60)
+    backend = LLMBackend(
+        "stream", make_model(**kwargs), breaker, supports_prefill=supports_prefill
+    )
+    return LLMService(LLMRouter([backend]), max_stream_resumes=max_stream_resumes)
+
+
+@pytest.mark.asyncio
+async def test_dropped_stream_resumes_from_the_partial_answer():
+    service = make_service(stream_drop_rate=1.0)
+
+    chunks = [chunk async for chunk in service.stream_chat_with_history("Hi")]
+
+    # Each resumed request continues after what was already sent
+    assert "".join(chunks) == "Hello there, world"
+    backend = service.router.primary
+    assert backend.in_flight == 0
+    # The completed stream cleared the failures of the dropped ones
+    assert backend.breaker.fail_counter == 0
+
+
+@pytest.mark.asyncio
+async def test_drop_past_the_resume_limit_is_an_error():
+    service = make_service(max_stream_resumes=0, stream_drop_rate=1.0)
+
+    chunks = []
+    with pytest.raises(LLMConnectionError):
+        async for chunk in service.stream_chat_with_history("Hi"):
+            chunks.append(chunk)
+
+    assert 0 < len(chunks) < 3
+    backend = service.router.primary
+    assert backend.in_flight == 0
+    # A stream breaking off midway counts against its backend
+    assert backend.breaker.fail_counter == 1
+
+
+@pytest.mark.asyncio
+async def test_stream_counts_for_the_breaker_only_when_it_ends():
+    service = make_service()
+    backend = service.router.primary
+    backend.breaker._state_storage.increment_counter()
+
+    stream = service.stream_chat_with_history("Hi")
+    assert await anext(stream) == "Hello "
+    assert backend.breaker.fail_counter == 1
+    assert backend.in_flight == 1
+
+    assert "".join([chunk async for chunk in stream]) == "there, world"
+    assert backend.breaker.fail_counter == 0
+    assert backend.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_drop_is_an_error_without_prefill_support():
+    service = make_service(supports_prefill=False, stream_drop_rate=1.0)
+
+    chunks = []
+    with pytest.raises(LLMConnectionError):
+        async for chunk in service.stream_chat_with_history("Hi"):
+            chunks.append(chunk)
+
+    # Nothing was sent twice
+    assert "Hello there, world".startswith("".join(chunks))
+
+
+@pytest.mark.asyncio
+async def test_resume_goes_to_a_backend_with_prefill_support():
+    dropping = LLMBackend(
+        "dropping",
+        make_model(stream_drop_rate=1.0),
+        CircuitBreaker(fail_max=3, reset_timeout=60),
+    )
+    prefill = LLMBackend(
+        "prefill",
+        make_model(),
+        CircuitBreaker(fail_max=3, reset_timeout=60),
+        supports_prefill=True,
+    )
+    # The dropping backend is ranked first while unmeasured
+    prefill.latency["stream"] = 1.0
+    service = LLMService(LLMRouter([dropping, prefill]))
+
+    chunks = [chunk async for chunk in service.stream_chat_with_history("Hi")]
+
+    assert "".join(chunks) == "Hello there, world"
+    assert dropping.breaker.fail_counter == 1
+    assert prefill.breaker.fail_counter == 0
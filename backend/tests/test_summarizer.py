@@ -0,0 +1,54 @@
+import pytest
+
+from app.crud import message as message_crud
+from app.crud import session as session_crud
+from app.crud import turn as turn_crud
+from app.services.summarizer import SessionSummarizer
+
+
+class StubLLMService:
+    def __init__(self):
+        self.prompts = []
+
+    async def generate_response(self, messages, session_id=None):
+        self.prompts.append(messages[-1].content)
+        return f"Summary #{len(self.prompts)}"
+
+
+@pytest.mark.asyncio
+async def test_summary_folds_old_messages_and_trims_history(
+    db_session, session_factory
+):
+    session = await session_crud.create_session(db_session)
+    values = [
+        message_crud.build_message_values(session.id, "user", f"Message {i} " * 20)
+        for i in range(10)
+    ]
+    await message_crud.create_messages(db_session, values)
+    llm = StubLLMService()
+    per_message = values[0]["token_count"] + 4
+    summarizer = SessionSummarizer(
+        session_factory=session_factory,
+        llm_service_factory=lambda: llm,
+        trigger_tokens=5 * per_message,
+        keep_recent_tokens=3 * per_message,
+    )
+
+    context = await turn_crud.get_session_context(db_session, session.id)
+    assert summarizer.needs_summary(context.history)
+    assert await summarizer.summarize(session.id)
+
+    context = await turn_crud.get_session_context(db_session, session.id)
+    assert context.summary == "Summary #1"
+    assert [m["id"] for m in context.history] == [v["id"] for v in values[7:]]
+    assert not summarizer.needs_summary(context.history)
+    assert "Message 6" in llm.prompts[0] and "Message 7" not in llm.prompts[0]
+
+    for i in range(10, 13):
+        await message_crud.create_message(db_session, session.id, "user", f"M{i} " * 20)
+    assert await summarizer.summarize(session.id)
+    assert "Summary #1" in llm.prompts[1]
+    context = await turn_crud.get_session_context(db_session, session.id)
+    assert context.summary == "Summary #2"
+    assert context.history[-1]["content"].startswith("M12")
+    assert sum(m["token_count"] + 4 for m in context.history) <= 3 * per_message
@@ -0,0 +1,84 @@
+from uuid import uuid4
+
+import pytest
+
+from app.crud import message as message_crud
+from app.crud import session as session_crud
+from app.crud import turn as turn_crud
+
+
+@pytest.mark.asyncio
+async def test_start_turn_creates_session(db_session):
+    turn = await turn_crud.start_turn(db_session, None, "Hello")
+    assert turn is not None
+    assert turn.history == []
+
+    session = await session_crud.get_session(db_session, turn.session_id)
+    assert session is not None
+    messages = await message_crud.get_messages_by_session(db_session, turn.session_id)
+    assert [(m.role, m.content) for m in messages] == [("user", "Hello")]
+
+
+@pytest.mark.asyncio
+async def test_start_turn_loads_history_before_user_message(db_session):
+    session = await session_crud.create_session(db_session)
+    for i in range(4):
+        await message_crud.create_message(
+            db=db_session, session_id=session.id, role="user", content=f"Message {i}"
+        )
+
+    turn = await turn_crud.start_turn(db_session, session.id, "Latest", history_limit=2)
+    assert [m["content"] for m in turn.history] == ["Message 2", "Message 3"]
+    assert all(m["token_count"] > 0 for m in turn.history)
+
+    context = await turn_crud.get_session_context(db_session, session.id, limit=1)
+    assert [(m["role"], m["content"]) for m in context.history] == [("user", "Latest")]
+
+
+@pytest.mark.asyncio
+async def test_start_turn_unknown_session(db_session):
+    assert await turn_crud.start_turn(db_session, uuid4(), "Hello") is None
+
+
+@pytest.mark.asyncio
+async def test_get_session_context_returns_tail_in_order(db_session):
+    session = await session_crud.create_session(db_session)
+    for i in range(5):
+        await message_crud.create_message(
+            db=db_session, session_id=session.id, role="user", content=f"Message {i}"
+        )
+
+    context = await turn_crud.get_session_context(db_session, session.id, limit=3)
+    assert [m["content"] for m in context.history] == [
+        "Message 2",
+        "Message 3",
+        "Message 4",
+    ]
+    assert all(m["role"] == "user" for m in context.history)
+
+
+@pytest.mark.asyncio
+async def test_get_session_context_empty_session(db_session):
+    session = await session_crud.create_session(db_session)
+    context = await turn_crud.get_session_context(db_session, session.id)
+    assert context.history == []
+    assert context.summary is None
+
+
+@pytest.mark.asyncio
+async def test_get_context_size_returns_token_counts_only(db_session):
+    session = await session_crud.create_session(db_session)
+    for i in range(3):
+        await message_crud.create_message(
+            db=db_session, session_id=session.id, role="user", content=f"Message {i}"
+        )
+
+    context = await turn_crud.get_context_size(db_session, session.id, limit=2)
+    full = await turn_crud.get_session_context(db_session, session.id, limit=2)
+    assert sorted(m["token_count"] for m in context.history) == sorted(
+        m["token_count"] for m in full.history
+    )
+    assert {m["id"] for m in context.history} == {m["id"] for m in full.history}
+    assert all("content" not in m for m in context.history)
+
+    assert await turn_crud.get_context_size(db_session, uuid4()) is None
@@ -24,7 +24,8 @@ export interface ChatResponse {
 export interface MessageHistoryResponse {
     messages: Message[];
     session_id: string;
-    total: number;
+    total: number | null;
     skip: number;
     limit: number;
+    next_cursor?: string | null;
 }